@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# =================================================================================
+# --- ALERT ENGINE (SQLite, WAL mode) ---
+# Shared alert log for every Dash thread and every gunicorn worker on the host.
+# SQLite allocates alert ids atomically (INTEGER PRIMARY KEY) and WAL mode lets
+# readers run concurrently with the single writer.
+#
+# Every process evaluates the alert rules itself, so rule alerts are deduplicated here:
+# one latch row per (station, rule) is claimed in the same transaction as the insert,
+# and the alert is dropped while the latch is open or the rule's cooldown is running.
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ALERT_DB_PATH = os.environ.get("ALERT_DB_PATH", os.path.join(BASE_DIR, "alerts.db"))
+
+ALERT_STATUSES = ('NEW', 'ACKNOWLEDGED', 'RESOLVED')
+ALERT_PRIORITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+ALERT_COLUMNS = ('id', 'timestamp', 'station_id', 'station_name', 'priority', 'type', 'message', 'status')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    station_id TEXT NOT NULL,
+    station_name TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'NEW'
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_id ON alerts (status, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_priority_id ON alerts (priority, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_station_id ON alerts (station_id, id);
+
+-- Per-status counters maintained by triggers, so badge counts are a single-row read
+CREATE TABLE IF NOT EXISTS alert_counts (
+    status TEXT PRIMARY KEY,
+    n INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_alerts_count_insert AFTER INSERT ON alerts
+BEGIN
+    INSERT INTO alert_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_alerts_count_update AFTER UPDATE OF status ON alerts
+WHEN OLD.status != NEW.status
+BEGIN
+    UPDATE alert_counts SET n = n - 1 WHERE status = OLD.status;
+    INSERT INTO alert_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_alerts_count_delete AFTER DELETE ON alerts
+BEGIN
+    UPDATE alert_counts SET n = n - 1 WHERE status = OLD.status;
+END;
+
+-- Shared rule state: open while the condition holds (cleared = 0), fired_at drives the cooldown
+CREATE TABLE IF NOT EXISTS alert_latches (
+    station_id TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    fired_at REAL NOT NULL,
+    cleared INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (station_id, rule)
+);
+"""
+
+# Claims a (station, rule) latch; changes nothing (rowcount 0) while it is open or cooling down
+_CLAIM_LATCH = """
+INSERT INTO alert_latches (station_id, rule, fired_at) VALUES (:station_id, :rule, :fired_at)
+ON CONFLICT (station_id, rule) DO UPDATE SET fired_at = excluded.fired_at, cleared = 0
+WHERE alert_latches.cleared = 1 AND excluded.fired_at - alert_latches.fired_at >= :cooldown_seconds
+"""
+
+# Operators accepted from the DataTable filter syntax, mapped to SQL
+FILTER_OPERATORS = {
+    'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=',
+    'contains': 'LIKE', 'datestartswith': 'LIKE',
+}
+
+
+class AlertEngine:
+    """Thread- and process-safe alert log backed by a SQLite database in WAL mode."""
+
+    def __init__(self, db_path=ALERT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        # Seed the counters for a log created before they existed
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT COUNT(*) FROM alert_counts").fetchone()[0] == 0:
+            conn.execute("INSERT INTO alert_counts (status, n) SELECT status, COUNT(*) FROM alerts GROUP BY status")
+        conn.execute("COMMIT")
+
+    def _conn(self):
+        """One connection per thread; sqlite3 connections must not be shared across threads."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN/COMMIT ourselves so write transactions stay short
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def raise_alerts(self, alerts):
+        """
+        Inserts alerts in a single transaction and returns them with their allocated ids.
+        An alert with a 'rule' key (and optional 'cooldown_seconds' and epoch 'fired_at') is only
+        inserted if it claims that station's latch for the rule; otherwise it is left out of the result.
+        """
+        if not alerts:
+            return []
+        conn = self._conn()
+        stored = []
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for alert in alerts:
+                if alert.get('rule') is not None:
+                    claim = conn.execute(_CLAIM_LATCH, {
+                        'station_id': alert['station_id'], 'rule': alert['rule'],
+                        'fired_at': alert.get('fired_at', now), 'cooldown_seconds': alert.get('cooldown_seconds', 0),
+                    })
+                    if claim.rowcount == 0:
+                        continue  # Already raised by this or another process
+                row = {
+                    'timestamp': alert.get('timestamp') or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'station_id': alert['station_id'],
+                    'station_name': alert['station_name'],
+                    'priority': alert['priority'],
+                    'type': alert['type'],
+                    'message': alert['message'],
+                    'status': alert.get('status', 'NEW'),
+                }
+                cursor = conn.execute(
+                    "INSERT INTO alerts (timestamp, station_id, station_name, priority, type, message, status) "
+                    "VALUES (:timestamp, :station_id, :station_name, :priority, :type, :message, :status)",
+                    row
+                )
+                stored.append({'id': cursor.lastrowid, **row})
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return stored
+
+    def release_latches(self, latches):
+        """Marks (station_id, rule) latches as cleared, so the rule can fire again after its cooldown."""
+        latches = [(str(station_id), rule) for station_id, rule in latches]
+        if not latches:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE alert_latches SET cleared = 1 WHERE station_id = ? AND rule = ? AND cleared = 0",
+                             latches)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set_status(self, alert_ids, status):
+        """Moves the given alerts to a new status (primary-key lookups). Returns the number updated."""
+        if status not in ALERT_STATUSES:
+            raise ValueError(f"Unknown alert status '{status}'.")
+        alert_ids = [int(a) for a in alert_ids]
+        if not alert_ids:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                "UPDATE alerts SET status = ? WHERE id = ? AND status != ?",
+                [(status, alert_id, status) for alert_id in alert_ids]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def list_alerts(self, status=None, priority=None, limit=50, offset=0):
+        """Returns the newest alerts first, optionally filtered by status and/or priority."""
+        clauses, params = [], []
+        if status and status != 'ALL':
+            clauses.append("status = ?")
+            params.append(status)
+        if priority:
+            clauses.append("priority = ?")
+            params.append(priority)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_page(self, status=None, filters=(), sort_by=(), page=0, page_size=10):
+        """
+        Returns (rows, total) for one page of the alert log.
+        filters: (column, operator, value) tuples using FILTER_OPERATORS keys.
+        sort_by: (column, 'asc'|'desc') tuples; newest-first is the tie breaker.
+        """
+        clauses, params = [], []
+        if status and status != 'ALL':
+            clauses.append("status = ?")
+            params.append(status)
+        for column, operator, value in filters:
+            if column not in ALERT_COLUMNS or operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported alert filter: {column} {operator}")
+            if operator == 'contains':
+                value = f"%{value}%"
+            elif operator == 'datestartswith':
+                value = f"{value}%"
+            clauses.append(f"{column} {FILTER_OPERATORS[operator]} ?")
+            params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        order_terms = []
+        for column, direction in sort_by:
+            if column not in ALERT_COLUMNS:
+                raise ValueError(f"Unsupported alert sort column: {column}")
+            order_terms.append(f"{column} {'ASC' if direction == 'asc' else 'DESC'}")
+        order_terms.append("id DESC")
+
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts {where} "
+            f"ORDER BY {', '.join(order_terms)} LIMIT ? OFFSET ?",
+            (*params, page_size, page * page_size)
+        ).fetchall()
+
+        # A pure status filter is answered by the maintained counters
+        if not filters:
+            total = self.count(status)
+        else:
+            total = conn.execute(f"SELECT COUNT(*) FROM alerts {where}", params).fetchone()[0]
+        return [dict(row) for row in rows], total
+
+    def count(self, status=None):
+        """Counts alerts, optionally for a single status, from the trigger-maintained counters."""
+        conn = self._conn()
+        if status and status != 'ALL':
+            row = conn.execute("SELECT n FROM alert_counts WHERE status = ?", (status,)).fetchone()
+            return row[0] if row else 0
+        return conn.execute("SELECT COALESCE(SUM(n), 0) FROM alert_counts").fetchone()[0]
+
+    def latest_id(self):
+        """Returns the newest allocated alert id (0 when the log is empty)."""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
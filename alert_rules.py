@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+# =================================================================================
+# --- DECLARATIVE ALERT RULES ---
+# Rules are loaded from alert_rules.json and evaluated against every station at once.
+# Each rule has a trigger threshold, a clear threshold (hysteresis) and a cooldown,
+# so a station that stays in breach raises one alert instead of one per tick. The
+# engine latches per process; with a shared latch store (AlertEngine) the alert log
+# also gets one alert per breach when several processes evaluate the same fleet.
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ALERT_RULES_PATH = os.environ.get("ALERT_RULES_PATH", os.path.join(BASE_DIR, "alert_rules.json"))
+
+RULE_DEFAULTS = {
+    "clear_threshold": None,  # Defaults to the trigger threshold (no hysteresis)
+    "cooldown_seconds": 0,
+    "priority": "MEDIUM",
+}
+REQUIRED_RULE_KEYS = ("name", "metric", "op", "threshold", "type", "message")
+
+
+def load_alert_rules(path=ALERT_RULES_PATH):
+    """Reads and validates the alert rule list from a JSON config file."""
+    with open(path, encoding="utf-8") as f:
+        raw_rules = json.load(f)
+
+    rules = []
+    for raw in raw_rules:
+        missing = [k for k in REQUIRED_RULE_KEYS if k not in raw]
+        if missing:
+            raise ValueError(f"Alert rule {raw.get('name', '?')!r} is missing keys: {missing}")
+        if raw["op"] not in (">", "<"):
+            raise ValueError(f"Alert rule {raw['name']!r} has unsupported op {raw['op']!r} (use '>' or '<').")
+        rule = {**RULE_DEFAULTS, **raw}
+        if rule["clear_threshold"] is None:
+            rule["clear_threshold"] = rule["threshold"]
+        rules.append(rule)
+    return rules
+
+
+class AlertRuleEngine:
+    """
+    Evaluates all rules against all stations per tick using NumPy array comparisons.
+    latches: optional shared store (AlertEngine) told when a latched condition clears.
+    """
+
+    def __init__(self, rules, latches=None):
+        self.rules = rules
+        self.latches = latches
+        self._station_ids = ()
+        # Per (rule, station) state: whether the condition is latched, and when it last fired
+        self._active = np.zeros((len(rules), 0), dtype=bool)
+        self._last_fired = np.zeros((len(rules), 0), dtype=np.float64)
+
+    def _align_stations(self, station_ids):
+        """Keeps per-station state aligned when the fleet changes (cheap no-op when it does not)."""
+        station_ids = tuple(station_ids)
+        if station_ids == self._station_ids:
+            return
+        old_pos = {sid: i for i, sid in enumerate(self._station_ids)}
+        active = np.zeros((len(self.rules), len(station_ids)), dtype=bool)
+        last_fired = np.full((len(self.rules), len(station_ids)), -np.inf)
+        for new_i, sid in enumerate(station_ids):
+            old_i = old_pos.get(sid)
+            if old_i is not None:
+                active[:, new_i] = self._active[:, old_i]
+                last_fired[:, new_i] = self._last_fired[:, old_i]
+        self._station_ids, self._active, self._last_fired = station_ids, active, last_fired
+
+    def evaluate(self, station_ids, station_names, metrics, now=None):
+        """
+        Returns new alert dicts for this tick.
+        metrics maps metric name -> array aligned with station_ids; every array is also
+        available to the rule's message template by name, except that {value} is reserved for
+        the rule's own metric.
+        """
+        now = time.time() if now is None else now
+        self._align_stations(station_ids)
+        timestamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+
+        alerts, released = [], []
+        for r, rule in enumerate(self.rules):
+            values = np.asarray(metrics[rule["metric"]], dtype=np.float64)
+            with np.errstate(invalid='ignore'):
+                if rule["op"] == ">":
+                    breached = values > rule["threshold"]
+                    cleared = values <= rule["clear_threshold"]
+                else:
+                    breached = values < rule["threshold"]
+                    cleared = values >= rule["clear_threshold"]
+
+            was_active = self._active[r]
+            # Fire only on a fresh breach (not while latched) and outside the cooldown window. Only
+            # rows that fired latch, so a breach held through the cooldown fires once it ends.
+            fire = breached & ~was_active & ((now - self._last_fired[r]) >= rule["cooldown_seconds"])
+            released.extend((station_ids[i], rule["name"]) for i in np.flatnonzero(was_active & cleared))
+            self._active[r] = (was_active | fire) & ~cleared
+            self._last_fired[r][fire] = now
+
+            for i in np.flatnonzero(fire):
+                context = {name: float(arr[i]) for name, arr in metrics.items()}
+                alerts.append({
+                    'timestamp': timestamp,
+                    'station_id': station_ids[i],
+                    'station_name': station_names[i],
+                    'priority': rule["priority"],
+                    'type': rule["type"],
+                    'message': rule["message"].format(**{**context, 'value': float(values[i])}),
+                    'status': 'NEW',
+                    'rule': rule["name"],
+                    'cooldown_seconds': rule["cooldown_seconds"],
+                    'fired_at': now,
+                })
+
+        if self.latches is not None and released:
+            self.latches.release_latches(released)
+        return alerts
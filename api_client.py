@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from metrics import CACHE_LOOKUPS
+
+# =================================================================================
+# --- PREDICTION API CLIENT (for the dashboard) ---
+# Pooled keep-alive HTTP client that asks /predict_batch for the whole visible station
+# set in one request. Results are served stale-while-revalidate: a cached value is
+# returned immediately while a background refresh runs, and callers never wait longer
+# than their per-tick deadline, so a slow API cannot stall the 1-second UI cycle.
+# =================================================================================
+
+PREDICTION_API_URL = os.environ.get("PREDICTION_API_URL")  # e.g. http://localhost:8000
+
+FRESH_SECONDS = 1.0  # Younger results are served without a refresh
+MAX_STALE_SECONDS = 30.0  # Older results are dropped rather than shown
+REQUEST_TIMEOUT_SECONDS = 5.0
+DEFAULT_DEADLINE_SECONDS = 0.3  # Longest a caller waits for stations with no cached value
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Prediction API refresh failed: {future.exception()}")
+
+
+class PredictionClient:
+    """Batched, cached client for the /predict_batch endpoint."""
+
+    def __init__(self, base_url=PREDICTION_API_URL, http_client=None, fresh_seconds=FRESH_SECONDS,
+                 max_stale_seconds=MAX_STALE_SECONDS):
+        # Any httpx.Client works, e.g. fastapi.testclient.TestClient(main_api.app) for in-process tests
+        if http_client is None:
+            import httpx  # Deferred so dashboards running without the API don't pay for it at startup
+        self._http = http_client or httpx.Client(
+            base_url=base_url,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=60.0),
+        )
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._cache = {}  # station_id -> (fetched_at, result)
+        self._missing = {}  # Ids the API reported as unknown -> when; asked again after max_stale_seconds
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediction-refresh")
+        self._in_flight = None
+
+    def _fetch(self, station_ids):
+        response = self._http.post("/predict_batch", json={"station_ids": station_ids})
+        response.raise_for_status()
+        payload = response.json()
+        fetched_at = time.monotonic()
+        with self._lock:
+            for station_id, result in payload["results"].items():
+                self._cache[station_id] = (fetched_at, result)
+                self._missing.pop(station_id, None)
+            self._missing.update(dict.fromkeys(payload.get("missing", ()), fetched_at))
+        return payload["results"]
+
+    def _refresh(self, station_ids):
+        """Starts one background batch refresh unless one is already running."""
+        with self._lock:
+            if self._in_flight is not None and not self._in_flight.done():
+                return self._in_flight
+            self._in_flight = self._executor.submit(self._fetch, station_ids)
+            self._in_flight.add_done_callback(_log_failure)
+            return self._in_flight
+
+    def get_predictions(self, station_ids, deadline_seconds=DEFAULT_DEADLINE_SECONDS):
+        """
+        Returns {station_id: result} for the stations that have a usable prediction.
+        Stale entries trigger a background refresh; only stations with no cached value wait,
+        and at most deadline_seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Stations added to the API's registry later (or before it was seeded) get picked up
+            wanted = [sid for sid in dict.fromkeys(station_ids)
+                      if now - self._missing.get(sid, -float('inf')) > self.max_stale_seconds]
+            cached = {sid: self._cache.get(sid) for sid in wanted}
+
+        needs_refresh = [sid for sid, entry in cached.items() if entry is None or now - entry[0] > self.fresh_seconds]
+        misses = sum(entry is None for entry in cached.values())
+        CACHE_LOOKUPS.inc(len(cached) - len(needs_refresh), cache="prediction_client", result="hit")
+        CACHE_LOOKUPS.inc(len(needs_refresh) - misses, cache="prediction_client", result="stale")
+        CACHE_LOOKUPS.inc(misses, cache="prediction_client", result="miss")
+        if needs_refresh:
+            future = self._refresh(wanted)
+            if any(cached[sid] is None for sid in needs_refresh):
+                try:
+                    future.result(timeout=deadline_seconds)
+                except FutureTimeoutError:
+                    pass  # Serve what we have; the refresh keeps running in the background
+                except Exception:
+                    pass  # Logged by _log_failure; fall back to whatever is cached
+                with self._lock:
+                    cached = {sid: self._cache.get(sid) for sid in wanted}
+
+        now = time.monotonic()
+        return {sid: entry[1] for sid, entry in cached.items()
+                if entry is not None and now - entry[0] <= self.max_stale_seconds}
+
+    def get_scenario(self, station_id, scenarios=None, seed=None, timeout=REQUEST_TIMEOUT_SECONDS):
+        """
+        Runs what-if ensembles on /scenario (scenarios: list of dicts shaped like
+        main_api.ScenarioSpec). Not cached; returns the response payload, or None on failure.
+        """
+        payload = {"station_id": station_id, "seed": seed}
+        if scenarios is not None:
+            payload["scenarios"] = list(scenarios)
+        try:
+            response = self._http.post("/scenario", json=payload, timeout=timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Scenario request failed: {e}")
+            return None
+        return response.json()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._http.close()
@@ -0,0 +1,21 @@
+// Subscribes the dashboard to the server's SSE stream for the selected station and
+// pushes each event into the 'live-stream-store' (replaces 1-second interval polling).
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    stream: {
+        subscribe: function (stationId) {
+            if (window.aquaSightEventSource) {
+                window.aquaSightEventSource.close();
+                window.aquaSightEventSource = null;
+            }
+            if (!stationId) {
+                return window.dash_clientside.no_update;
+            }
+            const source = new EventSource('/stream/' + encodeURIComponent(stationId));
+            source.addEventListener('reading', function (event) {
+                window.dash_clientside.set_props('live-stream-store', {data: JSON.parse(event.data)});
+            });
+            window.aquaSightEventSource = source;
+            return stationId;
+        }
+    }
+});
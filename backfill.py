@@ -0,0 +1,207 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import indices
+from inference import BASE_DIR, load_models, run_models
+from precision import INFERENCE_PRECISION, PRECISION_MODES, apply_precision, cast_frame, feature_dtype
+from timeseries_store import TIMESERIES_DIR, TimeSeriesStore
+
+# =================================================================================
+# --- HISTORICAL BACKFILL ---
+# Runs the five models and the custom indices over a full prepared-data archive and
+# writes the results to the time-series store.
+#
+#   python backfill.py                                   # prepared_data.csv, all CPUs
+#   python backfill.py --data archive.csv --workers 8 --chunk-rows 200000
+#   python backfill.py --restart                         # ignore the checkpoint
+#   python backfill.py --precision float32               # see precision.py
+#
+# The CSV is streamed in chunks (dated rows in date order, as 01_data_pipeline.py
+# writes them). Each chunk is scored in one vectorized pass per model by a worker
+# process, and results are written back in chunk order by this process, the store's
+# only writer. A JSON checkpoint records how many rows are done, so an interrupted
+# run resumes at the next chunk. A chunk cut off mid-write is written again on resume.
+# The hourly and daily rollups average duplicate rows out, but the raw tier keeps them.
+# =================================================================================
+
+DEFAULT_DATA_PATH = os.path.join(BASE_DIR, "prepared_data.csv")
+DEFAULT_CHECKPOINT_PATH = os.path.join(BASE_DIR, "backfill_checkpoint.json")
+DEFAULT_CHUNK_ROWS = 50000
+STATION_KEY_COLUMNS = ['Lat', 'Lon', 'Elevation']  # A station is identified by its location
+
+_worker_models = None
+_worker_dtype = np.float64
+
+
+def station_key(lat, lon, elevation):
+    return f"GW_{lat:.4f}_{lon:.4f}_{int(elevation)}"
+
+
+# --- Checkpoints ---
+
+def load_checkpoint(path, data_path):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {'data': os.path.abspath(data_path), 'rows_done': 0, 'stations': {}}
+    if checkpoint.get('data') != os.path.abspath(data_path):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('data')}; use --restart or --checkpoint.")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    checkpoint['updated_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- Scoring (runs in worker processes) ---
+
+def init_worker(model_dir, threads, precision=INFERENCE_PRECISION):
+    """Loads the models once per worker process."""
+    global _worker_models, _worker_dtype
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+    _worker_models = apply_precision(load_models(model_dir), precision)
+    _worker_dtype = feature_dtype(precision)
+    if threads:
+        for name in ("rf", "iforest"):
+            if hasattr(_worker_models[name], "n_jobs"):
+                _worker_models[name].n_jobs = threads
+        _worker_models["xgb"].set_params(n_jobs=threads)
+
+
+def score_chunk(chunk):
+    """Scores every row of a chunk. Returns {station_id: (ts, {column: values})}, ts ascending."""
+    chunk = chunk.reset_index(drop=True)
+    outputs = run_models(_worker_models, cast_frame(chunk, _worker_dtype))
+
+    water_level = chunk['Water_Level'].to_numpy(dtype=np.float64)
+    severity = indices.anomaly_severity(outputs['anomaly_score'])
+    # Historical rows have no simulated noise terms, so those default to zero
+    index_values = indices.compute_indices(water_level, chunk['Lat'].to_numpy(), chunk['Lon'].to_numpy(), severity)
+
+    columns = {
+        'water_level': water_level,
+        'rainfall_mm': chunk['Rainfall_mm'].to_numpy(dtype=np.float64),
+        'avg_temp_c': chunk['Avg_Temp_C'].to_numpy(dtype=np.float64),
+        'pet_mm': chunk['PET_mm'].to_numpy(dtype=np.float64),
+        'next_day_level': outputs['next_day_level'],
+        'risk_proba': outputs['risk_proba'],
+        'recharge_30d': outputs['recharge_30d'],
+        'extraction_rate': outputs['extraction_rate'],
+        'anomaly_score': severity,
+        'mtdi': index_values['MTDI'],
+        'hcrs': index_values['HCRS'],
+        'p_conflict': index_values['PConflict'],
+        'sti': index_values['STI'],
+    }
+    ts = pd.to_datetime(chunk['Date']).to_numpy().astype('datetime64[s]').astype(np.int64).astype(np.float64)  # UTC
+
+    results = {}
+    for key, rows in chunk.groupby(STATION_KEY_COLUMNS, sort=False).indices.items():
+        rows = rows[np.argsort(ts[rows], kind='stable')]
+        results[station_key(*key)] = (ts[rows], {name: values[rows] for name, values in columns.items()})
+    return results
+
+
+# --- Driver ---
+
+def read_chunks(data_path, chunk_rows, rows_done):
+    """Streams the archive in chunks, skipping rows already covered by the checkpoint."""
+    skip = range(1, rows_done + 1) if rows_done else None
+    return pd.read_csv(data_path, chunksize=chunk_rows, skiprows=skip)
+
+
+def write_results(store, results, checkpoint):
+    rows = 0
+    for station_id, (ts, values) in results.items():
+        store.append_many(station_id, ts, values)
+        station = checkpoint['stations'].setdefault(station_id, {'rows': 0, 'last_ts': None})
+        station['rows'] += len(ts)
+        station['last_ts'] = float(ts[-1])
+        rows += len(ts)
+    return rows
+
+
+def run_backfill(data_path=DEFAULT_DATA_PATH, store_dir=TIMESERIES_DIR, checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+                 workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, threads_per_worker=1, model_dir=BASE_DIR,
+                 restart=False, precision=INFERENCE_PRECISION):
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = load_checkpoint(checkpoint_path, data_path)
+    store = TimeSeriesStore(store_dir)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows_at_start = checkpoint['rows_done']
+
+    if checkpoint['rows_done']:
+        print(f"Resuming after {checkpoint['rows_done']:,} rows.")
+
+    # 'spawn' keeps TensorFlow out of forked children; each worker loads the models once
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                             initargs=(model_dir, threads_per_worker, precision)) as pool:
+        in_flight = deque()
+
+        def drain_one():
+            future, n_rows = in_flight.popleft()
+            write_results(store, future.result(), checkpoint)
+            checkpoint['rows_done'] += n_rows
+            save_checkpoint(checkpoint_path, checkpoint)
+            done = checkpoint['rows_done'] - rows_at_start
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            print(f"{checkpoint['rows_done']:,} rows done ({rate:,.0f} rows/s, "
+                  f"{len(checkpoint['stations'])} stations)")
+
+        for chunk in read_chunks(data_path, chunk_rows, checkpoint['rows_done']):
+            in_flight.append((pool.submit(score_chunk, chunk), len(chunk)))
+            # Bound memory: at most two chunks per worker are queued or being written
+            while len(in_flight) >= 2 * workers:
+                drain_one()
+        while in_flight:
+            drain_one()
+
+    # Roll completed days up into the hourly/daily tiers now rather than at the next append
+    store.maintain()
+    checkpoint['completed'] = True
+    save_checkpoint(checkpoint_path, checkpoint)
+    print(f"Backfill complete: {checkpoint['rows_done'] - rows_at_start:,} rows in "
+          f"{time.perf_counter() - started:.1f}s into {store_dir}")
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill model outputs and indices over historical data.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Prepared data CSV (date-ordered)")
+    parser.add_argument("--store", default=TIMESERIES_DIR, help="Time-series store directory")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--model-dir", default=BASE_DIR)
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start over")
+    parser.add_argument("--precision", choices=PRECISION_MODES, default=INFERENCE_PRECISION,
+                        help="Inference precision (see precision.py)")
+    args = parser.parse_args()
+
+    run_backfill(args.data, args.store, args.checkpoint, args.workers, args.chunk_rows, args.threads_per_worker,
+                 args.model_dir, args.restart, args.precision)
+
+
+if __name__ == "__main__":
+    main()
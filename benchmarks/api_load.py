@@ -0,0 +1,173 @@
+import argparse
+import contextlib
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from benchmarks.common import stage_percentiles, summarize_ms, write_results
+
+# =================================================================================
+# --- API LOAD BENCHMARK ---
+# Drives the prediction endpoints at several concurrency levels and reports throughput,
+# end-to-end latency percentiles (client side) and per-stage percentiles (features,
+# iforest, lstm, xgb, rf, logreg, ... from the API's /metrics histograms, so they are
+# bucket-interpolated). Requests shed by admission control (503) are counted and timed
+# separately from other errors. Runs main_api.app in-process by default (with its alert store,
+# station registry and time-series store in a scratch directory), or against a server:
+#
+#   python -m benchmarks.api_load
+#   python -m benchmarks.api_load --concurrency 1 8 32 --requests 500 --output api.json
+#   uvicorn main_api:app --port 8000 &  python -m benchmarks.api_load --url http://localhost:8000
+# =================================================================================
+
+ENDPOINTS = ('predict_all', 'predict_batch', 'forecast', 'scenario')
+READY_TIMEOUT_SECONDS = 300
+
+
+def request_body(endpoint, station_ids, rng):
+    if endpoint == 'predict_all':
+        return '/predict_all', {'station_id': rng.choice(station_ids)}
+    if endpoint == 'predict_batch':
+        return '/predict_batch', {'station_ids': station_ids}
+    if endpoint == 'forecast':
+        return '/forecast', {'station_ids': station_ids, 'horizon_days': 30}
+    return '/scenario', {'station_id': rng.choice(station_ids), 'scenarios': [{'members': 1000}]}
+
+
+def wait_until_ready(client):
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if client.get('/ready').status_code == 200:
+            return
+        time.sleep(0.2)
+    raise SystemExit("API did not become ready in time.")
+
+
+def run_level(client, endpoint, station_ids, concurrency, total_requests):
+    """Sends total_requests requests from `concurrency` threads. Returns one result dict."""
+    latencies = []
+    rejections = []
+    errors = []
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        while next(counter) < total_requests:
+            path, body = request_body(endpoint, station_ids, rng)
+            started = time.perf_counter()
+            try:
+                status = client.post(path, json=body).status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                elif status == 503:
+                    rejections.append(elapsed)
+                else:
+                    errors.append(status)
+
+    metrics_before = client.get('/metrics').text
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, seed) for seed in range(concurrency)]:
+            future.result()
+    duration = time.perf_counter() - started
+    metrics_after = client.get('/metrics').text
+
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': len(latencies) + len(rejections) + len(errors),
+        'rejected': len(rejections),
+        'errors': len(errors),
+        'error_codes': sorted({str(e) for e in errors}),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(latencies) / duration, 2) if duration else None,
+        'latency': summarize_ms(latencies),
+        'rejected_latency': summarize_ms(rejections),
+        'stages': stage_percentiles(metrics_before, metrics_after),
+    }
+
+
+def in_process_client(stack):
+    """A TestClient for main_api.app whose local stores live in a scratch directory (closed with stack)."""
+    scratch = stack.enter_context(tempfile.TemporaryDirectory(prefix="api-bench-"))
+    # main_api reads these at import, so they must be set before it (or station_registry) is imported
+    stack.enter_context(mock.patch.dict(os.environ, {
+        "ALERT_DB_PATH": os.path.join(scratch, "alerts.db"),
+        "STATION_DB_PATH": os.path.join(scratch, "stations.db"),
+        "TIMESERIES_DIR": os.path.join(scratch, "timeseries_data"),
+    }))
+    from fastapi.testclient import TestClient
+
+    import main_api
+
+    if main_api.TS_STORE.root != os.environ["TIMESERIES_DIR"]:
+        raise SystemExit("main_api was imported before the benchmark could point its stores at a scratch "
+                         "directory; run the in-process benchmark in a fresh interpreter.")
+    return TestClient(main_api.app)
+
+
+def run(endpoints=ENDPOINTS, concurrency_levels=(1, 4, 16), total_requests=200, url=None, station_ids=None):
+    """Runs every endpoint x concurrency level; returns {'runs': [...]}."""
+    stack = contextlib.ExitStack()
+    if url:
+        import httpx
+
+        client = httpx.Client(base_url=url, timeout=60.0,
+                              limits=httpx.Limits(max_connections=max(concurrency_levels)))
+    else:
+        client = in_process_client(stack)
+        from station_registry import SEED_STATIONS
+
+        station_ids = station_ids or [station['station_id'] for station in SEED_STATIONS]
+    if not station_ids:
+        raise SystemExit("--station-ids is required with --url.")
+
+    runs = []
+    with stack, client:
+        wait_until_ready(client)
+        for endpoint in endpoints:
+            run_level(client, endpoint, station_ids, 1, min(10, total_requests))  # Untimed warm-up
+            for concurrency in concurrency_levels:
+                result = run_level(client, endpoint, station_ids, concurrency, total_requests)
+                runs.append(result)
+                latency = result['latency']
+                print(f"{endpoint:>14} c={concurrency:<3} {result['throughput_rps']:>8} rps  "
+                      f"p50 {latency.get('p50_ms')} ms  p95 {latency.get('p95_ms')} ms  "
+                      f"p99 {latency.get('p99_ms')} ms  rejected {result['rejected']}  errors {result['errors']}")
+                for stage, stats in result['stages'].items():
+                    print(f"{'':>20} {stage:<10} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                          f"p99 {stats['p99_ms']} ms  (n={stats['count']})")
+    return {'mode': 'url' if url else 'in-process', 'url': url, 'station_ids': station_ids, 'runs': runs}
+
+
+def add_arguments(parser):
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of in-process")
+    parser.add_argument("--station-ids", nargs="+", default=None, help="Station ids (default: the registry's seed stations)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction API.")
+    add_arguments(parser)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.endpoints, args.concurrency, args.requests, args.url, args.station_ids)
+    if args.output:
+        write_results(args.output, {'api_load': results})
+
+
+if __name__ == "__main__":
+    main()
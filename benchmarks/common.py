@@ -0,0 +1,121 @@
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# =================================================================================
+# --- SHARED BENCHMARK HELPERS ---
+# Percentile summaries, run metadata and JSON output for the benchmark suite, plus a
+# reader for the API's Prometheus histograms so per-stage percentiles can be taken
+# from /metrics whether the app runs in-process or behind uvicorn.
+# =================================================================================
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_VERSION = 1
+
+_SAMPLE_LINE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def summarize_ms(seconds):
+    """p50/p95/p99/mean/max in milliseconds for a list of durations in seconds."""
+    if not len(seconds):
+        return {'count': 0}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'count': int(len(ms)), 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'mean_ms': round(float(ms.mean()), 3), 'max_ms': round(float(ms.max()), 3)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata():
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'argv': sys.argv[1:],
+    }
+
+
+def write_results(path, suites):
+    """Writes {'version', 'metadata', 'suites': {name: results}} as JSON."""
+    payload = {'version': RESULTS_VERSION, 'metadata': run_metadata(), 'suites': suites}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    print(f"Wrote benchmark results to {path}")
+
+
+# --- Prometheus histograms from /metrics ---
+
+def parse_histogram(text, name):
+    """{label tuple (without le): {upper bound: cumulative count}} for one histogram in exposition text."""
+    series = {}
+    for line in text.splitlines():
+        match = _SAMPLE_LINE.match(line)
+        if not match or match['name'] != f"{name}_bucket":
+            continue
+        labels = dict(_LABEL.findall(match['labels'] or ''))
+        bound = float(labels.pop('le'))
+        series.setdefault(tuple(sorted(labels.items())), {})[bound] = float(match['value'])
+    return series
+
+
+def histogram_delta(before, after):
+    """Bucket counts observed between two parse_histogram() results."""
+    delta = {}
+    for key, buckets in after.items():
+        previous = before.get(key, {})
+        delta[key] = {bound: count - previous.get(bound, 0.0) for bound, count in buckets.items()}
+    return delta
+
+
+def histogram_quantile(q, buckets):
+    """Linear interpolation inside the bucket holding the q-th observation (as PromQL histogram_quantile)."""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]]
+    if total <= 0:
+        return None
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound  # Beyond the last finite bucket: report its bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return bounds[-1]
+
+
+def stage_percentiles(before_text, after_text, name='groundwater_stage_seconds', label='stage'):
+    """Per-label p50/p95/p99 (ms, bucket-interpolated) of the observations between two scrapes."""
+    delta = histogram_delta(parse_histogram(before_text, name), parse_histogram(after_text, name))
+    summary = {}
+    for key, buckets in sorted(delta.items()):
+        count = buckets.get(float('inf'), 0.0)
+        if count <= 0:
+            continue
+        stage = dict(key).get(label, '')
+        summary[stage] = {'count': int(count)}
+        for q in (0.5, 0.95, 0.99):
+            value = histogram_quantile(q, buckets)
+            summary[stage][f"p{round(q * 100)}_ms"] = None if value is None else round(value * 1000, 3)
+    return summary
@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+
+# =================================================================================
+# --- BENCHMARK COMPARISON ---
+# Compares two result files from the benchmark suite and lists every latency/time
+# metric that got slower (or throughput that dropped) by more than the threshold.
+# Exits with status 1 when there are regressions, so it can gate CI.
+#
+#   python -m benchmarks.compare baseline.json benchmark_results.json --threshold 0.15
+# =================================================================================
+
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 'median_s')
+HIGHER_IS_BETTER = ('throughput_rps',)
+
+
+def flatten(node, path=()):
+    """{path tuple: number} for every comparable metric. API runs are keyed by endpoint and concurrency."""
+    found = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            found.update(flatten(value, path + (str(key),)))
+    elif isinstance(node, list):
+        for item in node:
+            key = f"{item['endpoint']}@c{item['concurrency']}" if isinstance(item, dict) and 'endpoint' in item else None
+            if key is not None:
+                found.update(flatten(item, path + (key,)))
+    elif isinstance(node, (int, float)) and path and path[-1] in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        found[path] = float(node)
+    return found
+
+
+def compare(baseline, current, threshold):
+    """Returns (regressions, improvements) as lists of (path, old, new, relative change)."""
+    old_metrics, new_metrics = flatten(baseline['suites']), flatten(current['suites'])
+    regressions, improvements = [], []
+    for path in sorted(old_metrics.keys() & new_metrics.keys()):
+        old, new = old_metrics[path], new_metrics[path]
+        if old <= 0:
+            continue
+        change = (new - old) / old
+        worse = change > threshold if path[-1] in LOWER_IS_BETTER else change < -threshold
+        better = change < -threshold if path[-1] in LOWER_IS_BETTER else change > threshold
+        if worse:
+            regressions.append((path, old, new, change))
+        elif better:
+            improvements.append((path, old, new, change))
+    return regressions, improvements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change to report (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions, improvements = compare(baseline, current, args.threshold)
+
+    print(f"baseline {baseline['metadata'].get('git_revision')}  ->  current {current['metadata'].get('git_revision')}")
+    for title, rows in (("Regressions", regressions), ("Improvements", improvements)):
+        print(f"{title} (>{args.threshold:.0%}): {len(rows)}")
+        for path, old, new, change in rows:
+            print(f"  {'/'.join(path):<70} {old:>10.3f} -> {new:>10.3f}  ({change:+.1%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
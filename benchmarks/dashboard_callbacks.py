@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from benchmarks.common import REPO_DIR, summarize_ms, write_results
+
+# =================================================================================
+# --- DASHBOARD CALLBACK BENCHMARK ---
+# Latency of the fleet worker cycle and the heaviest callbacks (update_dashboard,
+# update_dwlr_map, update_state_median_chart) at synthetic fleet sizes. dash_app builds
+# its fleet-wide state once per process (on first use), so every size runs in a fresh
+# interpreter pointed at its own fleet snapshot, alert store, station registry and
+# time-series store.
+#
+#   python -m benchmarks.dashboard_callbacks                  # 10^2 ... 10^5 stations
+#   python -m benchmarks.dashboard_callbacks --fleet-sizes 1000 --callback-repeats 20
+# =================================================================================
+
+FLEET_SIZES = (100, 1000, 10000, 100000)
+
+
+def time_calls(fn, repeats):
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+    return summarize_ms(seconds)
+
+
+def measure_in_process(repeats):
+    """Runs inside the per-size interpreter; returns {step: latency summary}."""
+    import dash_app
+
+    worker = dash_app.FLEET_WORKER
+    worker.interval_seconds = 3600.0  # The benchmark drives the cycles itself
+    station = dash_app.get_dashboard_fleet().sensors[0]
+    subscription = dash_app.STREAM_BROADCASTER.subscribe(station['id'])  # Make the station "watched"
+    worker.start()
+    worker.wait_for_snapshot(timeout=600)
+
+    seq = iter(range(10 ** 9, 2 * 10 ** 9))
+    results = {'fleet_cycle': time_calls(lambda: dash_app.run_fleet_cycle(next(seq)), repeats)}
+
+    snapshot = dash_app.run_fleet_cycle(next(seq))
+    event = {'seq': snapshot.seq, 'station_id': station['id'], 'time': snapshot.time_label,
+             'results': snapshot.results[station['id']], 'latest_alert_id': snapshot.latest_alert_id}
+    state = station['State']
+
+    # update_state_median_chart reads the trigger from the callback context
+    stream_trigger = SimpleNamespace(triggered_id='live-stream-store')
+    with mock.patch.object(dash_app.dash, 'callback_context', stream_trigger):
+        results['update_dashboard'] = time_calls(
+            lambda: dash_app.update_dashboard(event, station['id'], 'bench-session', None, 'en'), repeats)
+        results['update_dwlr_map'] = time_calls(lambda: dash_app.update_dwlr_map(station['id'], None), repeats)
+        results['update_dwlr_map_state'] = time_calls(lambda: dash_app.update_dwlr_map(station['id'], state),
+                                                      repeats)
+        results['update_state_median_chart'] = time_calls(
+            lambda: dash_app.update_state_median_chart(event, None, 'tab-comparative-analytics'), repeats)
+
+    dash_app.STREAM_BROADCASTER.unsubscribe(subscription)
+    worker.stop()
+    return results
+
+
+def run_fleet_size(stations, repeats):
+    """Builds a synthetic fleet and measures it in a child interpreter."""
+    with tempfile.TemporaryDirectory(prefix="dash-bench-") as work_dir:
+        env = dict(os.environ,
+                   FLEET_SNAPSHOT_PATH=os.path.join(work_dir, "fleet_snapshot.pkl"),
+                   ALERT_DB_PATH=os.path.join(work_dir, "alerts.db"),
+                   STATION_DB_PATH=os.path.join(work_dir, "stations.db"),
+                   TIMESERIES_DIR=os.path.join(work_dir, "timeseries_data"),
+                   PREDICTION_API_URL="")
+        subprocess.run([sys.executable, "station_fleet.py", "--stations", str(stations),
+                        "--output", env["FLEET_SNAPSHOT_PATH"]], cwd=REPO_DIR, env=env, check=True,
+                       capture_output=True)
+        child = subprocess.run([sys.executable, "-m", "benchmarks.dashboard_callbacks", "--child",
+                                "--callback-repeats", str(repeats)], cwd=REPO_DIR, env=env, capture_output=True,
+                               text=True)
+    if child.returncode != 0:
+        raise RuntimeError(f"Dashboard benchmark failed for {stations} stations:\n{child.stderr[-2000:]}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def run(fleet_sizes=FLEET_SIZES, repeats=10):
+    results = {}
+    for stations in fleet_sizes:
+        results[str(stations)] = run_fleet_size(stations, repeats)
+        for step, stats in results[str(stations)].items():
+            print(f"{stations:>8,} stations  {step:<26} p50 {stats['p50_ms']:>9.1f} ms  "
+                  f"p95 {stats['p95_ms']:>9.1f} ms  p99 {stats['p99_ms']:>9.1f} ms")
+    return {'fleet_sizes': results}
+
+
+def add_arguments(parser):
+    parser.add_argument("--fleet-sizes", type=int, nargs="+", default=list(FLEET_SIZES))
+    parser.add_argument("--callback-repeats", type=int, default=10, help="Calls per callback and fleet size")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard callback latency at synthetic fleet sizes.")
+    add_arguments(parser)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_in_process(args.callback_repeats)))
+        return
+    results = run(args.fleet_sizes, args.callback_repeats)
+    if args.output:
+        write_results(args.output, {'dashboard_callbacks': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+
+import forecasting
+from inference import load_models
+
+# =================================================================================
+# --- FORECAST ROLLOUT BENCHMARK ---
+# Stations x horizon throughput of the batched autoregressive rollout, against the
+# naive approach of one predict() call per station per day (timed on a sample and
+# extrapolated).
+#
+#   python -m benchmarks.forecast_rollout
+#   python -m benchmarks.forecast_rollout --stations 100 1000 10000 --horizons 7 30 90
+# =================================================================================
+
+
+def random_windows(rng, n):
+    return forecasting.feature_rows(rng.uniform(40, 80, (n, forecasting.SEQ_LENGTH)),
+                                    rng.uniform(0, 10, (n, forecasting.SEQ_LENGTH)),
+                                    rng.uniform(1, 6, (n, forecasting.SEQ_LENGTH)),
+                                    rng.uniform(20, 35, (n, forecasting.SEQ_LENGTH)))
+
+
+def naive_seconds_per_call(lstm, scaler, windows, calls=20):
+    """Time of one single-station predict() call, the unit cost of an N x H loop."""
+    scaled = scaler.transform(windows[0]).reshape(1, forecasting.SEQ_LENGTH, -1)
+    lstm.predict(scaled, verbose=0)
+    start = time.perf_counter()
+    for _ in range(calls):
+        lstm.predict(scaled, verbose=0)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the batched LSTM forecast rollout.")
+    parser.add_argument("--stations", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7, 30, 90])
+    args = parser.parse_args()
+
+    models = load_models()
+    lstm, scaler = models["lstm"], models["lstm_scaler"]
+    rng = np.random.default_rng(0)
+    per_call = naive_seconds_per_call(lstm, scaler, random_windows(rng, 1))
+    print(f"naive baseline: {per_call * 1000:.1f} ms per single-station predict() call")
+    print(f"{'stations':>9} {'horizon':>8} {'rollout s':>10} {'station-days/s':>15} {'naive s (est.)':>15}")
+
+    for n in args.stations:
+        windows = random_windows(rng, n)
+        forecasting.rollout(lstm, scaler, windows, 1)  # Trace the step function for this batch size
+        for horizon in args.horizons:
+            start = time.perf_counter()
+            forecasting.rollout(lstm, scaler, windows, horizon)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>9,} {horizon:>8} {elapsed:>10.2f} {n * horizon / elapsed:>15,.0f} "
+                  f"{n * horizon * per_call:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
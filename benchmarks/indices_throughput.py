@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import numpy as np
+
+import indices
+
+# =================================================================================
+# --- INDEX THROUGHPUT BENCHMARK ---
+# Computes MTDI, HCRS, P-Conflict and STI for stations x time steps in one vectorized
+# call and compares it with the scalar per-reading loop the dashboard used to run.
+#
+#   python -m benchmarks.indices_throughput                      # 1,000 stations x 1,000 steps
+#   python -m benchmarks.indices_throughput --stations 10000 --steps 100
+# =================================================================================
+
+
+def scalar_indices(level, lat, lon, anomaly, trend_noise, density_noise, data_gap):
+    """Reference: the original per-reading Python arithmetic."""
+    mtdi = round(abs(level - 100) * 0.1 + trend_noise, 4)
+    hcrs = max(0, min(100, round((105.0 - level) / 0.1, 0)))
+    density = 0.3 if lat < 20 and lon > 78 else 0.05
+    p_conflict = round(min(1.0, mtdi * indices.WEIGHT_LEVEL_DISPARITY
+                           + (100 - hcrs) / 100 * indices.WEIGHT_RESILIENCE + density + density_noise), 4)
+    sti = max(0, min(100, round(100.0 - anomaly * 500 - data_gap * 10, 0)))
+    return mtdi, hcrs, p_conflict, sti
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the vectorized index library.")
+    parser.add_argument("--stations", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scalar-sample", type=int, default=20000,
+                        help="Readings to time with the scalar loop (extrapolated)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shape = (args.stations, args.steps)
+    n = args.stations * args.steps
+    lat = rng.uniform(8, 35, (args.stations, 1))
+    lon = rng.uniform(68, 97, (args.stations, 1))
+    level = rng.uniform(95, 105, shape)
+    anomaly = rng.uniform(0.01, 0.9, shape)
+    trend_noise, density_noise, data_gap = indices.draw_noise(rng, shape)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = indices.compute_indices(level, lat, lon, anomaly, trend_noise, density_noise, data_gap)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"vectorized: {n:,} station-readings in {best * 1000:.1f} ms "
+          f"({n / best / 1e6:.1f} M readings/s, best of {args.repeat})")
+
+    # Scalar loop on a sample, checked against the vectorized output
+    sample = min(args.scalar_sample, n)
+    flat = [a.ravel()[:sample].tolist() for a in (level, anomaly, trend_noise, density_noise, data_gap)]
+    lat_flat = np.broadcast_to(lat, shape).ravel()[:sample].tolist()
+    lon_flat = np.broadcast_to(lon, shape).ravel()[:sample].tolist()
+    start = time.perf_counter()
+    scalar = [scalar_indices(flat[0][i], lat_flat[i], lon_flat[i], flat[1][i], flat[2][i], flat[3][i], flat[4][i])
+              for i in range(sample)]
+    scalar_seconds = (time.perf_counter() - start) * n / sample
+    print(f"scalar loop: ~{scalar_seconds:.2f} s for {n:,} readings (extrapolated from {sample:,}), "
+          f"speed-up ~{scalar_seconds / best:.0f}x")
+
+    expected = np.array(scalar)
+    got = np.column_stack([result[k].ravel()[:sample] for k in ('MTDI', 'HCRS', 'PConflict', 'STI')])
+    print(f"max abs difference vs scalar: {np.abs(expected - got).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
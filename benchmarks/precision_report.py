@@ -0,0 +1,127 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import REPO_DIR, summarize_ms, write_results
+from forecasting import SEQ_LENGTH
+from inference import LSTM_FEATURES, load_models, lstm_forward, round_outputs, run_models
+from precision import PRECISION_MODES, QuantizedLSTM, apply_precision, cast_frame, feature_dtype
+
+# =================================================================================
+# --- PRECISION REPORT ---
+# What each INFERENCE_PRECISION mode costs in accuracy and buys in speed and memory,
+# against the float64 pipeline on prepared_data.csv:
+#
+#   outputs      per-model |delta| (max, mean, p99) over every row, the share of served
+#                (rounded) values that change, and anomaly-flag / risk-class agreement
+#   lstm_windows the same for the LSTM on the 30-day sliding windows of the archive,
+#                where quantization error can build up over the recurrence
+#   timing       run_models() latency on a backfill-sized chunk (the archive, tiled)
+#   memory       bytes of that chunk's feature frame and of the LSTM weights
+#
+#   python -m benchmarks.precision_report
+#   python -m benchmarks.precision_report --modes float32 int8 --rows 200000 --output precision.json
+# =================================================================================
+
+DATA_PATH = f"{REPO_DIR}/prepared_data.csv"
+RISK_CLASS_THRESHOLD = 0.5  # Same cut-off as the logistic regression's predict()
+
+
+def delta_stats(baseline, values):
+    delta = np.abs(np.asarray(values, dtype=np.float64) - np.asarray(baseline, dtype=np.float64))
+    return {'max_abs': float(delta.max()), 'mean_abs': float(delta.mean()),
+            'p99_abs': float(np.percentile(delta, 99))}
+
+
+def compare_outputs(baseline, outputs):
+    """Per-output deltas, plus how often the served values and the derived classes still agree."""
+    served_baseline, served = round_outputs(baseline), round_outputs(outputs)
+    report = {}
+    for name in baseline:
+        report[name] = {**delta_stats(baseline[name], outputs[name]),
+                        'served_changed': float(np.mean(served_baseline[name] != served[name]))}
+    report['anomaly_flag_agreement'] = float(np.mean(served_baseline['is_anomaly'] == served['is_anomaly']))
+    report['risk_class_agreement'] = float(np.mean((baseline['risk_proba'] >= RISK_CLASS_THRESHOLD)
+                                                   == (outputs['risk_proba'] >= RISK_CLASS_THRESHOLD)))
+    return report
+
+
+def lstm_windows(models, data):
+    """Scaled (N, SEQ_LENGTH, features) sliding windows over the archive's LSTM features."""
+    scaled = models["lstm_scaler"].transform(data[LSTM_FEATURES].to_numpy(dtype=np.float64))
+    windows = np.lib.stride_tricks.sliding_window_view(scaled, SEQ_LENGTH, axis=0)  # (N, features, SEQ_LENGTH)
+    return np.ascontiguousarray(windows.transpose(0, 2, 1), dtype=np.float32)
+
+
+def keras_weight_bytes(model):
+    return sum(weights.nbytes for weights in model.get_weights())
+
+
+def time_run_models(models, frame, repeats):
+    run_models(models, frame)  # Traces/initializes anything still lazy for this batch size
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run_models(models, frame)
+        seconds.append(time.perf_counter() - started)
+    return summarize_ms(seconds)
+
+
+def run(modes=PRECISION_MODES, rows=50000, repeats=5):
+    base_models = load_models()
+    data = pd.read_csv(DATA_PATH)
+    chunk = pd.concat([data] * -(-rows // len(data)), ignore_index=True).iloc[:rows]
+    windows = lstm_windows(base_models, data)
+
+    baseline = run_models(base_models, cast_frame(data, np.float64))
+    baseline_levels = lstm_forward(base_models["lstm"], windows)
+    results = {'rows': len(data), 'timing_rows': len(chunk), 'lstm_windows': len(windows), 'modes': {}}
+
+    for mode in ('float64', *[m for m in modes if m != 'float64']):
+        models = apply_precision(dict(base_models), mode)
+        dtype = feature_dtype(mode)
+        chunk_frame = cast_frame(chunk, dtype)
+        lstm = models["lstm"]
+        results['modes'][mode] = {
+            'outputs': compare_outputs(baseline, run_models(models, cast_frame(data, dtype))),
+            'lstm_windows': delta_stats(baseline_levels, lstm_forward(lstm, windows)),
+            'timing': time_run_models(models, chunk_frame, repeats),
+            'memory': {'frame_bytes': int(chunk_frame.memory_usage(deep=True).sum()),
+                       'lstm_weight_bytes': lstm.weight_bytes if isinstance(lstm, QuantizedLSTM)
+                       else keras_weight_bytes(lstm)},
+        }
+
+    print(f"{'mode':<8} {'run_models p50':>15} {'frame MiB':>10} {'LSTM KiB':>9} {'level max|d|':>13} "
+          f"{'window max|d|':>14} {'recharge max|d|':>16} {'risk max|d|':>12} {'flags':>7} {'risk cls':>9}")
+    for mode, report in results['modes'].items():
+        outputs = report['outputs']
+        print(f"{mode:<8} {report['timing']['p50_ms']:>12.1f} ms {report['memory']['frame_bytes'] / 2 ** 20:>10.1f} "
+              f"{report['memory']['lstm_weight_bytes'] / 1024:>9.1f} {outputs['next_day_level']['max_abs']:>13.2e} "
+              f"{report['lstm_windows']['max_abs']:>14.2e} {outputs['recharge_30d']['max_abs']:>16.2e} "
+              f"{outputs['risk_proba']['max_abs']:>12.2e} {outputs['anomaly_flag_agreement']:>7.2%} "
+              f"{outputs['risk_class_agreement']:>9.2%}")
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument("--modes", nargs="+", choices=PRECISION_MODES, default=list(PRECISION_MODES),
+                        help="Modes to compare with float64")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows per timed run_models() call")
+    parser.add_argument("--precision-repeats", type=int, default=5, help="Timed calls per mode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy, speed and memory of the reduced-precision modes.")
+    add_arguments(parser)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.modes, args.rows, args.precision_repeats)
+    if args.output:
+        write_results(args.output, {'precision_report': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+
+from benchmarks import api_load, dashboard_callbacks, precision_report, training_fit
+from benchmarks.common import write_results
+
+# =================================================================================
+# --- BENCHMARK SUITE ---
+# Runs the API load test, training fit times, dashboard callback latencies and the
+# precision report and writes one JSON file; compare two runs with benchmarks.compare.
+#
+#   python -m benchmarks.run_suite                              # -> benchmark_results.json
+#   python -m benchmarks.run_suite --suites api_load --concurrency 1 8 --output api.json
+#   python -m benchmarks.compare baseline.json benchmark_results.json
+# =================================================================================
+
+SUITES = ('training_fit', 'dashboard_callbacks', 'precision_report', 'api_load')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and write JSON results.")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--output", default="benchmark_results.json")
+    api_load.add_arguments(parser.add_argument_group("api_load"))
+    training_fit.add_arguments(parser.add_argument_group("training_fit"))
+    dashboard_callbacks.add_arguments(parser.add_argument_group("dashboard_callbacks"))
+    precision_report.add_arguments(parser.add_argument_group("precision_report"))
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suites:
+        print(f"--- {suite} ---")
+        if suite == 'training_fit':
+            results[suite] = training_fit.run(args.fit_repeats, args.keep_data)
+        elif suite == 'dashboard_callbacks':
+            results[suite] = dashboard_callbacks.run(args.fleet_sizes, args.callback_repeats)
+        elif suite == 'precision_report':
+            results[suite] = precision_report.run(args.modes, args.rows, args.precision_repeats)
+        else:
+            results[suite] = api_load.run(args.endpoints, args.concurrency, args.requests, args.url, args.station_ids)
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
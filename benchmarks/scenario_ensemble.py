@@ -0,0 +1,56 @@
+import argparse
+import statistics
+import time
+
+from inference import build_feature_frame, load_models
+from scenario_engine import Scenario, ScenarioEngine
+
+# =================================================================================
+# --- SCENARIO ENSEMBLE BENCHMARK ---
+# Wall time of one station's what-if ensemble (XGB + RF + logistic risk over every
+# member) at several ensemble sizes, in-process and on the process pool.
+#
+#   python -m benchmarks.scenario_ensemble
+#   python -m benchmarks.scenario_ensemble --members 1000 100000 --workers 4
+# =================================================================================
+
+STATION = {'lat': 23.0, 'lon': 77.0, 'elevation': 300.0, 'soil_type': 'Loam', 'lulc': 'Agri',
+           'water_level': 15.0, 'rainfall_mm': 5.0, 'avg_temp_c': 25.0, 'pet_mm': 3.5}
+
+
+def time_run(engine, input_df, members, repeats):
+    scenarios = [Scenario(members=members)]
+    engine.run(input_df, scenarios, seed=0)  # Warm-up (starts the pool's workers if used)
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.run(input_df, scenarios, seed=0)
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of scenario ensembles for one station.")
+    parser.add_argument("--members", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, default=None, help="Pool workers (default: all CPUs)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    models = load_models()
+    input_df = build_feature_frame([STATION], models["ohe"])
+    inline = ScenarioEngine(models, workers=1)
+    pooled = ScenarioEngine(models, workers=args.workers, pool_min_members=0)
+
+    print(f"{'members':>9} {'inline ms':>10} {f'pool ms ({pooled.workers}w)':>14} {'members/s':>12}")
+    try:
+        for members in args.members:
+            inline_s = time_run(inline, input_df, members, args.repeats)
+            pooled_s = time_run(pooled, input_df, members, args.repeats) if pooled.workers > 1 else float('nan')
+            best = min(inline_s, pooled_s) if pooled.workers > 1 else inline_s
+            print(f"{members:>9,} {inline_s * 1000:>10.1f} {pooled_s * 1000:>14.1f} {members / best:>12,.0f}")
+    finally:
+        pooled.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# =================================================================================
+# --- STARTUP BENCHMARK ---
+# Imports a module in a fresh interpreter under `python -X importtime` and reports the
+# wall time plus the slowest imports (cumulative microseconds), i.e. what every new
+# gunicorn worker pays before it can serve a request.
+#
+#   python -m benchmarks.startup_importtime                 # dash_app, 5 runs
+#   python -m benchmarks.startup_importtime --module main_api --runs 3
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Returns [(module, depth, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        name = name[1:].rstrip()  # Nesting is shown as two spaces per level
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(module, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of a service module.")
+    parser.add_argument("--module", default="dash_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    # Keep local stores and snapshots out of the working tree while measuring
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as scratch:
+        env = dict(os.environ,
+                   ALERT_DB_PATH=os.path.join(scratch, "alerts.db"),
+                   STATION_DB_PATH=os.path.join(scratch, "stations.db"),
+                   FLEET_SNAPSHOT_PATH=os.path.join(scratch, "fleet_snapshot.pkl"),
+                   TIMESERIES_DIR=os.path.join(scratch, "timeseries"))
+
+        run_once(args.module, env)  # Warm the OS file cache and build any first-use snapshots
+        timings, rows = [], []
+        for _ in range(args.runs):
+            elapsed, rows = run_once(args.module, env)
+            timings.append(elapsed)
+
+    timings.sort()
+    print(f"import {args.module}: median {timings[len(timings) // 2] * 1000:.0f} ms, "
+          f"min {timings[0] * 1000:.0f} ms over {args.runs} runs")
+
+    # Depth 1 rows are the imports made directly by the benchmarked module
+    total = next((cumulative for name, depth, _, cumulative in rows if depth == 0 and name == args.module), None)
+    if total is not None:
+        print(f"{args.module} cumulative import time: {total / 1000:.0f} ms")
+    direct = [(name, cumulative) for name, depth, _, cumulative in rows if depth == 1]
+    print("Slowest direct imports by cumulative time (last run):")
+    for name, cumulative in sorted(direct, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
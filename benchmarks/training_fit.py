@@ -0,0 +1,89 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import REPO_DIR, write_results
+
+# =================================================================================
+# --- TRAINING FIT-TIME BENCHMARK ---
+# Times each training script's entry point (01_data_pipeline.py ... 06_model_if_anomaly.py)
+# in a scratch copy of the repo, so the committed artifacts are never overwritten. The
+# scripts run in order, as in a full retrain; module import time is excluded.
+#
+#   python -m benchmarks.training_fit
+#   python -m benchmarks.training_fit --repeats 3 --keep-data --output fit.json
+# =================================================================================
+
+TRAINING_SCRIPTS = [
+    ('01_data_pipeline.py', 'load_and_engineer_data'),
+    ('02_model_lstm_water_level.py', 'train_lstm_model'),
+    ('03_model_xgb_recharge.py', 'train_xgb_recharge_model'),
+    ('04_model_logreg_risk.py', 'train_logreg_risk_model'),
+    ('05_model_rf_budget.py', 'train_rf_budget_model'),
+    ('06_model_if_anomaly.py', 'train_if_anomaly_model'),
+]
+
+
+def load_script(path):
+    spec = importlib.util.spec_from_file_location(f"bench_{os.path.basename(path)[:2]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(repeats=1, keep_data=False):
+    """Fit time per script. keep_data=True skips 01 and trains on the committed prepared_data.csv."""
+    scripts = TRAINING_SCRIPTS[1:] if keep_data else TRAINING_SCRIPTS
+    timings = {filename: [] for filename, _ in scripts}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="fit-bench-") as work_dir:
+        for filename, _ in TRAINING_SCRIPTS:
+            shutil.copy2(os.path.join(REPO_DIR, filename), work_dir)
+        shutil.copy2(os.path.join(REPO_DIR, 'prepared_data.csv'), work_dir)
+        os.chdir(work_dir)  # The scripts read and write relative to the working directory
+        try:
+            for _ in range(repeats):
+                for filename, entry_point in scripts:
+                    train = getattr(load_script(os.path.join(work_dir, filename)), entry_point)
+                    output = io.StringIO()
+                    started = time.perf_counter()
+                    with contextlib.redirect_stdout(output):
+                        train()
+                    timings[filename].append(time.perf_counter() - started)
+        finally:
+            os.chdir(previous_dir)
+
+    results = {}
+    for filename, seconds in timings.items():
+        results[filename] = {'runs': len(seconds), 'median_s': round(statistics.median(seconds), 3),
+                             'min_s': round(min(seconds), 3), 'max_s': round(max(seconds), 3)}
+        print(f"{filename:<30} median {results[filename]['median_s']:>8.3f} s  "
+              f"(min {results[filename]['min_s']:.3f}, max {results[filename]['max_s']:.3f}, n={len(seconds)})")
+    return {'keep_data': keep_data, 'scripts': results}
+
+
+def add_arguments(parser):
+    parser.add_argument("--fit-repeats", type=int, default=1, help="Full retrains to time")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="Skip 01_data_pipeline.py and train on the committed prepared_data.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit time of each training script.")
+    add_arguments(parser)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.fit_repeats, args.keep_data)
+    if args.output:
+        write_results(args.output, {'training_fit': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,32 @@
 import dash
-from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output, State
-import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from dash import Patch, dcc, html, dash_table
+from dash.dependencies import Input, Output, State, ClientsideFunction
+from dash.exceptions import PreventUpdate
+from flask import Response, abort, stream_with_context
+import os
 import random
+import re
+import threading
 from datetime import datetime
-from collections import deque
+from functools import lru_cache, wraps
 import time
+from types import MappingProxyType
+
+import numpy as np
+
+import indices
+import metrics
+from alert_engine import AlertEngine
+from api_client import PREDICTION_API_URL, PredictionClient
+from alert_rules import AlertRuleEngine, load_alert_rules
+from event_stream import Broadcaster, sse_stream
+from fleet_worker import FleetSnapshot, FleetWorker, freeze_records
+from peer_groups import DEFAULT_K, DEFAULT_RADIUS_KM, from_records as build_peer_index
+from session_store import create_session_store, new_session_key
+from station_fleet import INDIAN_REGIONS, get_fleet
+from station_registry import StationRegistry, seed_registry
+from station_search import StationSearchIndex
+from timeseries_store import TimeSeriesStore, lookback_window
 
 # =================================================================================
 # --- UI REDESIGN CONFIGURATION: BRIGHT, AIRY, AND VIBRANT ---
@@ -38,12 +56,30 @@ GRID_STYLE = {
     "fontFamily": "Inter, sans-serif"
 }
 
+# dbc.themes.BOOTSTRAP and dbc.icons.BOOTSTRAP, spelled out so dash_bootstrap_components is only
+# imported when the layout is first built
+BOOTSTRAP_STYLESHEETS = [
+    "https://cdn.jsdelivr.net/npm/bootstrap@5.3.6/dist/css/bootstrap.min.css",
+    "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.css",
+]
+
 MAX_HISTORY_POINTS = 20
 
-# --- NEW METRIC WEIGHTS ---
-WEIGHT_LEVEL_DISPARITY = 0.4
-WEIGHT_RESILIENCE = 0.4
-# -------------------------
+# Server-side session state: the browser only holds a session key, history lives here.
+SESSION_STORE = create_session_store()
+HISTORY_BUFFER = 'water_level_history'
+
+# Persistent per-station history (readings + model outputs) for long-range chart views
+TS_STORE = TimeSeriesStore()
+HISTORY_RANGE_OPTIONS = [
+    {'label': 'Live', 'value': 'live'},
+    {'label': '24h', 'value': 1},
+    {'label': '7d', 'value': 7},
+    {'label': '30d', 'value': 30},
+    {'label': '90d', 'value': 90},
+    {'label': '1y', 'value': 365},
+]
+CHART_MAX_POINTS = 1000  # Range views are averaged down to at most this many points
 
 # =================================================================================
 # --- I18n TRANSLATION DICTIONARY AND FUNCTION ---
@@ -144,133 +180,155 @@ TRANSLATIONS = {
 }
 
 
+# Compiled catalogs: every key gets an integer message id, and each language is one flat list
+# indexed by that id (English is the key itself), so a lookup is a single list index.
+MESSAGE_IDS = {}
+CATALOGS = {lang: [] for lang in LANGUAGES}
+
+
+def msg_id(key):
+    """Returns the message id for a key, adding untranslated keys to every catalog on first use."""
+    message_id = MESSAGE_IDS.get(key)
+    if message_id is None:
+        message_id = len(MESSAGE_IDS)
+        MESSAGE_IDS[key] = message_id
+        for lang, catalog in CATALOGS.items():
+            catalog.append(key if lang == 'en' else TRANSLATIONS.get(key, {}).get(lang, key))
+    return message_id
+
+
+for _key in TRANSLATIONS:
+    msg_id(_key)
+
+
+def tr(message_id, lang_code):
+    """Translated text for a message id, falling back to English."""
+    return CATALOGS.get(lang_code, CATALOGS['en'])[message_id]
+
+
 def get_text(key, lang_code):
     """Retrieves the translated text for a key, falling back to English."""
-    if lang_code == 'en':
+    message_id = MESSAGE_IDS.get(key)
+    if message_id is None:
         return key
-    return TRANSLATIONS.get(key, {}).get(lang_code, key)
+    return tr(message_id, lang_code)
+
+
+# Message ids for text rendered on every stream tick
+MSG_DATA_FEED_TIME = msg_id("Data Feed Time:")
+MSG_STATION = msg_id("Station:")
+MSG_TYPE_ELEVATION = msg_id("Type/Elevation:")
+MSG_ANOMALY_CHECK = msg_id("Anomaly Check:")
+MSG_EXTRACTION_RATE = msg_id("Simulated Extraction Rate:")
+MSG_M_PER_DAY = msg_id("m/day")
+MSG_STATUS_CRITICAL = msg_id("CRITICAL ALERT: Anomaly Detected. Immediate action required for ")
+MSG_STATUS_OK = msg_id("✅ System Operational: Data feed active and stable for ")
+MSG_LAST_UPDATED = msg_id("Last updated: ")
+MSG_LOGIN = msg_id("Login")
+MSG_LOGOUT = msg_id("Logout")
 
 
 # =================================================================================
 # --- DWLR SENSORS DATA (Distributed based on Foreign Border Criteria & Mainland Only) ---
-# (Data generation and setup remains the same, but now ALL_RAW_STATIONS is stored for global use)
 # =================================================================================
 
-# Status simulation options (weighted towards NORMAL)
-STATUS_OPTIONS = ['NORMAL', 'NORMAL', 'NORMAL', 'NORMAL', 'LOW_ALERT', 'ANOMALY']
-
-# --- Geospatial Data: Bounding Boxes for Indian States/UTs (Excluding Islands) ---
-INDIAN_REGIONS = {
-    "Haryana": (27.5, 30.7, 74.5, 77.7), "Madhya Pradesh": (21.0, 26.9, 74.0, 82.8),
-    "Chhattisgarh": (17.5, 23.5, 80.0, 84.0), "Jharkhand": (22.0, 25.5, 83.5, 88.0),
-    "Telangana": (15.7, 19.5, 77.0, 81.8), "Jammu and Kashmir (UT)": (32.5, 36.0, 73.5, 76.5),
-    "Ladakh (UT)": (32.0, 36.5, 75.0, 80.0), "Himachal Pradesh": (30.0, 33.5, 75.5, 79.0),
-    "Punjab": (29.5, 32.5, 73.5, 77.5), "Uttarakhand": (29.0, 31.5, 77.5, 81.0),
-    "Delhi (NCT)": (28.3, 28.8, 76.8, 77.3), "Uttar Pradesh": (23.5, 31.0, 77.0, 84.8),
-    "Chandigarh (UT)": (30.7, 30.8, 76.7, 76.8), "Rajasthan": (23.0, 30.0, 69.5, 78.5),
-    "Gujarat": (20.0, 24.5, 68.0, 74.5), "Maharashtra": (15.5, 22.0, 72.5, 80.8),
-    "Goa": (14.9, 15.9, 73.7, 74.5), "Daman, Diu, Dadra & Nagar Haveli (UT)": (20.0, 20.7, 72.8, 73.5),
-    "Bihar": (24.0, 27.5, 83.5, 88.5), "West Bengal": (21.5, 27.5, 86.0, 89.5),
-    "Odisha": (17.5, 22.5, 81.5, 87.5), "Andhra Pradesh": (12.5, 19.5, 77.0, 84.5),
-    "Karnataka": (11.5, 18.5, 74.0, 78.5), "Kerala": (8.0, 12.8, 74.8, 77.5),
-    "Tamil Nadu": (8.0, 13.5, 76.5, 80.5), "Puducherry (UT)": (11.8, 12.0, 79.8, 80.0),
-    "Sikkim": (27.0, 28.0, 88.0, 88.8), "Arunachal Pradesh": (26.5, 29.5, 91.5, 97.0),
-    "Assam": (24.5, 27.8, 89.8, 96.0), "Meghalaya": (25.0, 26.0, 90.0, 92.5),
-    "Nagaland": (25.0, 27.0, 93.5, 95.5), "Manipur": (23.8, 25.7, 93.0, 95.0),
-    "Mizoram": (21.5, 24.5, 92.2, 93.5), "Tripura": (22.5, 24.5, 91.0, 92.5),
-}
-MOCK_STATES = list(INDIAN_REGIONS.keys())
-LANDLOCKED_STATES = ["Haryana", "Madhya Pradesh", "Chhattisgarh", "Jharkhand", "Telangana"]
-COASTAL_BORDER_REGIONS = [state for state in MOCK_STATES if state not in LANDLOCKED_STATES]
-
-RAW_STATION_DATA = [
-    {"Agency_Name": "Andhra Pradesh GW", "State_Name": "Andhra Pradesh", "District_Name": "KURNOOL",
-     "Tahsil_Name": "KURNOOL", "Station_Name": "KURNOOL -AWS", "Latitude": 15.75064, "Longitude": 78.0668,
-     "Station_Type": "SURFACE", "Station_Status": "INSTALLED"},
-    {"Agency_Name": "Tamil Nadu GW", "State_Name": "Tamil Nadu", "District_Name": "CHENNAI",
-     "Tahsil_Name": "CHENNAI", "Station_Name": "CHENNAI -CITY", "Latitude": 13.0827, "Longitude": 80.2707,
-     "Station_Type": "GROUND", "Station_Status": "INSTALLED"},
-    {"Agency_Name": "Maharashtra GW", "State_Name": "Maharashtra", "District_Name": "PUNE",
-     "Tahsil_Name": "PUNE", "Station_Name": "PUNE -WEST", "Latitude": 18.5204, "Longitude": 73.8567,
-     "Station_Type": "GROUND", "Station_Status": "INSTALLED"},
-]
-NUM_REAL_STATIONS = len(RAW_STATION_DATA)
-TOTAL_TARGET_DOTS = 1000
-TARGET_LANDLOCKED = 100
-TARGET_COASTAL_BORDER = 20
-TOTAL_MOCK_DOTS = TARGET_LANDLOCKED + TARGET_COASTAL_BORDER
-TOTAL_DOTS = NUM_REAL_STATIONS + TOTAL_MOCK_DOTS
-NUM_RANDOM_STATIONS = TOTAL_DOTS - NUM_REAL_STATIONS
-
-ALLOCATION = {}
-points_per_landlocked = TARGET_LANDLOCKED // len(LANDLOCKED_STATES)
-for state in LANDLOCKED_STATES:
-    ALLOCATION[state] = points_per_landlocked
-points_per_coastal_border_base = TARGET_COASTAL_BORDER // len(COASTAL_BORDER_REGIONS)
-coastal_border_remainder = TARGET_COASTAL_BORDER % len(COASTAL_BORDER_REGIONS)
-for idx, state in enumerate(COASTAL_BORDER_REGIONS):
-    ALLOCATION[state] = points_per_coastal_border_base + (1 if idx < coastal_border_remainder else 0)
-
-
-def generate_random_station(i, state_name):
-    region_key = state_name if state_name in INDIAN_REGIONS else random.choice(MOCK_STATES)
-    lat_min, lat_max, lon_min, lon_max = INDIAN_REGIONS[region_key]
-    lat = round(random.uniform(lat_min, lat_max), 5)
-    lon = round(random.uniform(lon_min, lon_max), 5)
-    station_name = f"MOCK-{state_name.split()[0].upper()}-{i}"
-    return {
-        "Agency_Name": "Mock Network", "State_Name": region_key,
-        "District_Name": f"Mock District {i % 10}",
-        "Tahsil_Name": "Mock Tahsil", "Station_Name": station_name,
-        "Latitude": lat, "Longitude": lon,
-        "Station_Type": random.choice(["GROUND", "SURFACE"]),
-        "Station_Status": "INSTALLED"
-    }
+# Fleet-wide state (the fleet, its registry entries, the search and peer indexes and the alert
+# store) is built on first use rather than at import, so a new worker starts serving sooner and
+# a process that never touches the dashboard never builds it.
+_BUILD_LOCK = threading.RLock()
+
+
+def built_on_first_use(build):
+    """Decorator: build() runs once, on the first call, and its result is returned from then on."""
+    built = []
+
+    @wraps(build)
+    def get():
+        if not built:
+            with _BUILD_LOCK:  # Re-entrant: builders call each other
+                if not built:
+                    built.append(build())
+        return built[0]
+    return get
+
+
+# The station registry shared with the prediction API: the fleet is registered there (so the
+# API can predict fleet stations), and edits made in the registry are copied onto the fleet's
+# sensors - before the indexes below are built, and again on every fleet cycle. Positions and
+# states edited after startup reach the search, peer and state indexes on the next restart.
+get_station_registry = built_on_first_use(StationRegistry)
+_registry_version = 0
+
+
+@built_on_first_use
+def get_dashboard_fleet():
+    """The fleet from the prebuilt binary snapshot (python station_fleet.py rebuilds it), with registry edits."""
+    fleet = get_fleet()
+    seed_registry(get_station_registry(), fleet.sensors)
+    apply_registry_changes(fleet.by_id)
+    return fleet
+
+
+def apply_registry_changes(sensors_by_id):
+    """Copies registry edits (name, area, position, type) onto the matching fleet sensors."""
+    global _registry_version
+    _registry_version, changed = get_station_registry().changed_since(_registry_version)
+    for station in changed:
+        sensor = sensors_by_id.get(station.station_id)
+        if sensor is None:
+            continue
+        sensor.update(Station_Name_Full=station.name, lat=station.lat, lon=station.lon,
+                      State=station.state or sensor['State'], District=station.district or sensor['District'],
+                      Tahsil=station.tahsil or sensor['Tahsil'], type=station.station_type or sensor['type'])
 
 
-RANDOM_STATIONS = []
-station_counter = 0
-for state, num_points in ALLOCATION.items():
-    for i in range(num_points):
-        RANDOM_STATIONS.append(generate_random_station(station_counter, state))
-        station_counter += 1
+# Server-side typeahead: the dropdown only ever holds the top matches for what was typed
+STATION_SEARCH_LIMIT = 25
 
-ALL_RAW_STATIONS = RAW_STATION_DATA + RANDOM_STATIONS  # Global for map/comparative data
 
-MOCK_DWLR_SENSORS = []
-STATION_IDS = []
+@built_on_first_use
+def get_station_search_index():
+    return StationSearchIndex(get_dashboard_fleet().sensors)
 
-for i, item in enumerate(ALL_RAW_STATIONS):
-    station_id = f"{item['Station_Name'].replace(' ', '_').replace('-', '_').replace('(', '').replace(')', '').upper()}_{i}"
-    state_name = item['State_Name'].replace(' (UT)', '').replace(' (NCT)', '')
-    simulated_status = random.choice(STATUS_OPTIONS) if 'MOCK-' in item['Station_Name'] else STATUS_OPTIONS[
-        i % len(STATUS_OPTIONS)]
-    simulated_level = round(100.0 + random.uniform(-5.0, 5.0), 2)
 
-    MOCK_DWLR_SENSORS.append({
-        'id': station_id, 'lat': item['Latitude'], 'lon': item['Longitude'],
-        'status': simulated_status, 'level': simulated_level, 'type': item['Station_Type'],
-        'Station_Name_Full': item['Station_Name'], 'District': item['District_Name'],
-        'Tahsil': item['Tahsil_Name'], 'State': item['State_Name'],
-        'PConflict_Initial': 0.0  # Placeholder for initial calculation
-    })
-    STATION_IDS.append(station_id)
+def station_option(sensor, search_value=''):
+    # The dropdown still filters options client-side by their 'search' text; prefixing the typed
+    # query keeps server-side matches (district, tahsil, typo-tolerant) from being hidden again.
+    label = f"{sensor['Station_Name_Full']} ({sensor['State']})"
+    return {'label': label, 'value': sensor['id'],
+            'search': f"{search_value} {label} {sensor['District']} {sensor['Tahsil']}"}
 
-DROPDOWN_SAMPLE_SIZE = min(100, len(MOCK_DWLR_SENSORS))
-SAMPLED_STATIONS = MOCK_DWLR_SENSORS[:DROPDOWN_SAMPLE_SIZE]
 
-DROPDOWN_OPTIONS = [
-    {
-        'label': f"{s['Station_Name_Full']} ({s['State']})",
-        'value': s['id']
-    }
-    for s in SAMPLED_STATIONS
+def default_station_options():
+    return [station_option(s) for s in get_station_search_index().search('', limit=STATION_SEARCH_LIMIT)]
+
+
+# --- Peer Groups for P-Conflict Benchmarking (positions index into snapshot.stations) ---
+@built_on_first_use
+def get_peer_groups():
+    """(peer index, State/UT -> fleet positions); the index builds its Haversine BallTree on first lookup."""
+    sensors = get_dashboard_fleet().sensors
+    positions_by_state = {}
+    for position, sensor in enumerate(sensors):
+        positions_by_state.setdefault(sensor['State'], []).append(position)
+    return build_peer_index(sensors), positions_by_state
+
+
+PEER_MODE_OPTIONS = [
+    {'label': 'Same State', 'value': 'state'},
+    {'label': f'{DEFAULT_K} Nearest', 'value': 'knn'},
+    {'label': f'Within {DEFAULT_RADIUS_KM:.0f} km', 'value': 'radius'},
 ]
 
-# --- Global Alert Log (Deque for fixed size) ---
-MAX_ALERTS = 50
-ALERT_LOG = deque(maxlen=MAX_ALERTS)
-ALERT_ID_COUNTER = 0
+# --- Shared Alert Log (SQLite/WAL: safe across threads and gunicorn workers) ---
+ALERT_PAGE_SIZE = 10  # Rows per alert log page (paging, sorting and filtering run server-side)
+get_alert_engine = built_on_first_use(AlertEngine)
+
+
+# Declarative alert rules (alert_rules.json), evaluated over the whole fleet each tick
+@built_on_first_use
+def get_alert_rule_engine():
+    return AlertRuleEngine(load_alert_rules(), latches=get_alert_engine())
 
 # =================================================================================
 # --- AUTHENTICATION CONFIGURATION ---
@@ -285,18 +343,15 @@ MOCK_PASSWORD = "password"
 
 def get_station_by_id(station_id):
     """Retrieves the full sensor data for the selected ID."""
-    for sensor in MOCK_DWLR_SENSORS:
-        if sensor['id'] == station_id:
-            return sensor
-    return MOCK_DWLR_SENSORS[0] if MOCK_DWLR_SENSORS else None
-
+    fleet = get_dashboard_fleet()
+    sensor = fleet.by_id.get(station_id)
+    if sensor is not None:
+        return sensor
+    return fleet.sensors[0] if fleet.sensors else None
 
-def generate_live_data(last_level, selected_station_id, override_rainfall_str):
-    """MOCK data generation, calculates MTDI, HCRS, PConflict, STI."""
-    selected_station = get_station_by_id(selected_station_id)
-    if not selected_station:
-        selected_station = MOCK_DWLR_SENSORS[0]
 
+def simulate_station_reading(selected_station, override_rainfall_str=None):
+    """MOCK reading and predictions for one station; calculates MTDI, HCRS, PConflict, STI."""
     last_level = selected_station.get('level', 100.0)
     water_level = round(last_level + random.uniform(-0.1, 0.1), 2)
     water_level = max(95.0, min(105.0, water_level))
@@ -318,10 +373,9 @@ def generate_live_data(last_level, selected_station_id, override_rainfall_str):
     avg_temp = round(random.uniform(20, 35), 1)
     pet = round(random.uniform(3, 7), 2)
 
-    # --- Metrics Calculation ---
-    mtdi = round(abs(water_level - 100) * 0.1 + random.uniform(0.05, 0.2), 4)
-    hcrs = round((105.0 - water_level) / 0.1, 0)
-    hcrs = max(0, min(100, hcrs))
+    # --- Metrics Calculation (formulas live in indices.py) ---
+    mtdi = float(indices.mtdi(water_level, random.uniform(0.05, 0.2)))
+    hcrs = float(indices.hcrs(water_level))
     risk_proba = random.uniform(0.1, 0.75)
     is_anomaly = "FALSE"
     anomaly_score = round(random.uniform(0.01, 0.1), 4)
@@ -332,48 +386,19 @@ def generate_live_data(last_level, selected_station_id, override_rainfall_str):
         anomaly_score = round(random.uniform(0.5, 0.9), 4)
 
     # P-Conflict Score Calculation
-    lat, lon = selected_station['lat'], selected_station['lon']
-    density_base = 0.05
-    if lat < 20 and lon > 78: density_base = 0.3
-    pop_density_factor = density_base + random.uniform(0.0, 0.1)
-
-    p_conflict_score = (mtdi * WEIGHT_LEVEL_DISPARITY) + \
-                       ((100 - hcrs) / 100 * WEIGHT_RESILIENCE) + \
-                       pop_density_factor
-    p_conflict_score = round(min(1.0, p_conflict_score), 4)
+    pop_density_factor = indices.density_base(selected_station['lat'], selected_station['lon']) + \
+                         random.uniform(0.0, 0.1)
+    p_conflict_score = float(indices.p_conflict(mtdi, hcrs, pop_density_factor))
 
     # STI Calculation
-    data_gap_factor = random.uniform(0.0, 0.1)
-    sti = round(100.0 - (anomaly_score * 500) - (data_gap_factor * 10), 0)
-    sti = max(0, min(100, sti))
+    sti = float(indices.sti(anomaly_score, random.uniform(0.0, 0.1)))
 
-    # Update the level and PConflict in the MOCK_DWLR_SENSORS list for consistency
+    # Update the level and PConflict in the fleet's sensor records for consistency
     selected_station['level'] = water_level
     selected_station['PConflict_Initial'] = p_conflict_score
+    selected_station['HCRS'] = hcrs
+    selected_station['Anomaly_Score'] = anomaly_score
 
-    # Global update of MOCK_DWLR_SENSORS data for the comparative analytics
-    for sensor in MOCK_DWLR_SENSORS:
-        if sensor['id'] == selected_station_id:
-            # We already updated the selected one, so skip it
-            continue
-
-        # Simulate a slight variation in all other stations for the comparative view
-        sensor['level'] = max(95.0, min(105.0, sensor['level'] + random.uniform(-0.01, 0.01)))
-
-        # Recalculate PConflict for all for comparative view
-        simulated_mtdi = round(abs(sensor['level'] - 100) * 0.1 + random.uniform(0.05, 0.2), 4)
-        simulated_hcrs = max(0, min(100, round((105.0 - sensor['level']) / 0.1, 0)))
-
-        # Keep density factor roughly constant for non-selected stations
-        sim_lat, sim_lon = sensor['lat'], sensor['lon']
-        sim_density_base = 0.05
-        if sim_lat < 20 and sim_lon > 78: sim_density_base = 0.3
-
-        sim_p_conflict_score = (simulated_mtdi * WEIGHT_LEVEL_DISPARITY) + \
-                               ((100 - simulated_hcrs) / 100 * WEIGHT_RESILIENCE) + \
-                               sim_density_base + random.uniform(-0.01, -0.01)  # Small random noise
-        sensor['PConflict_Initial'] = round(min(1.0, sim_p_conflict_score), 4)
-    # --- END Global update ---
 
     return {
         "Real_Time_Input": {
@@ -394,62 +419,206 @@ def generate_live_data(last_level, selected_station_id, override_rainfall_str):
     }
 
 
+FLEET_RNG = np.random.default_rng()
+
+
+@built_on_first_use
+def get_fleet_static_inputs():
+    """Static per-station inputs for the vectorized fleet update: (density base, is-anomaly flags)."""
+    sensors = get_dashboard_fleet().sensors
+    density_base = indices.density_base(np.array([s['lat'] for s in sensors]), np.array([s['lon'] for s in sensors]))
+    return density_base, np.array([s['status'] == 'ANOMALY' for s in sensors], dtype=bool)
+
+
+def advance_fleet(skip_station_ids=()):
+    """Global update of the fleet's sensor data for the comparative analytics and fleet-wide alerts."""
+    sensors = get_dashboard_fleet().sensors
+    density_base, is_anomaly = get_fleet_static_inputs()
+    n = len(sensors)
+
+    # Simulate a slight variation in all other stations for the comparative view
+    levels = np.fromiter((s['level'] for s in sensors), float, n)
+    levels = np.clip(levels + FLEET_RNG.uniform(-0.01, 0.01, n), 95.0, 105.0)
+
+    # Recalculate PConflict for all stations in one vectorized pass; the density factor is kept
+    # roughly constant for non-selected stations
+    mtdi_values = indices.mtdi(levels, FLEET_RNG.uniform(0.05, 0.2, n))
+    hcrs_values = indices.hcrs(levels)
+    p_conflict_values = indices.p_conflict(mtdi_values, hcrs_values, density_base - 0.01)
+    anomaly_scores = np.round(np.where(is_anomaly, FLEET_RNG.uniform(0.5, 0.9, n),
+                                       FLEET_RNG.uniform(0.01, 0.1, n)), 4)
+
+    levels, hcrs_values = levels.tolist(), hcrs_values.tolist()
+    p_conflict_values, anomaly_scores = p_conflict_values.tolist(), anomaly_scores.tolist()
+    for i, sensor in enumerate(sensors):
+        if sensor['id'] in skip_station_ids:
+            # Stations with a detailed reading this cycle were already updated
+            continue
+        sensor['level'] = levels[i]
+        sensor['PConflict_Initial'] = p_conflict_values[i]
+        sensor['HCRS'] = hcrs_values[i]
+        sensor['Anomaly_Score'] = anomaly_scores[i]
+
+
+def generate_live_data(last_level, selected_station_id, override_rainfall_str):
+    """MOCK data generation for the selected station, then a step of the rest of the fleet."""
+    selected_station = get_station_by_id(selected_station_id)
+
+    results = simulate_station_reading(selected_station, override_rainfall_str)
+    advance_fleet(skip_station_ids={selected_station['id']})
+    return results
+
+
 # --- Alert Generation Logic ---
-def check_for_alerts(station_id, station_name, results):
-    """Checks for conditions that warrant an alert and adds them to the log."""
-    global ALERT_ID_COUNTER
-
-    alerts_triggered = []
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-    # 1. Anomaly Alert
-    if results['Anomaly_Check']['Is_Anomaly'] == 'TRUE' and results['Anomaly_Check']['Score'] > 0.7:
-        ALERT_ID_COUNTER += 1
-        alerts_triggered.append({
-            'id': ALERT_ID_COUNTER,
-            'timestamp': current_time,
-            'station_id': station_id,
-            'station_name': station_name,
-            'priority': 'CRITICAL',
-            'type': 'SENSOR_ANOMALY',
-            'message': f"High Anomaly Score detected: {results['Anomaly_Check']['Score']:.4f}. Water Level: {results['Real_Time_Input']['water_level']:.2f}m.",
-            'status': 'NEW'
-        })
+def check_for_alerts():
+    """Evaluates the alert rules against every station in the fleet and adds new alerts to the log."""
+    fleet = get_dashboard_fleet()
+    sensors, station_ids = fleet.sensors, fleet.station_ids
+    station_names = [sensor['Station_Name_Full'] for sensor in sensors]
+    station_metrics = {
+        'anomaly_score': np.fromiter((s['Anomaly_Score'] for s in sensors), float, len(station_ids)),
+        'p_conflict': np.fromiter((s['PConflict_Initial'] for s in sensors), float, len(station_ids)),
+        'hcrs': np.fromiter((s['HCRS'] for s in sensors), float, len(station_ids)),
+        'water_level': np.fromiter((s['level'] for s in sensors), float, len(station_ids)),
+    }
+    alerts_triggered = get_alert_rule_engine().evaluate(station_ids, station_names, station_metrics)
 
-    # 2. P-Conflict Alert (High tension)
-    if results['PConflict'] > 0.8:
-        ALERT_ID_COUNTER += 1
-        alerts_triggered.append({
-            'id': ALERT_ID_COUNTER,
-            'timestamp': current_time,
-            'station_id': station_id,
-            'station_name': station_name,
-            'priority': 'HIGH',
-            'type': 'P_CONFLICT_SPIKE',
-            'message': f"Predicted Conflict Score is high at {results['PConflict']:.4f}.",
-            'status': 'NEW'
-        })
+    # Persist new alerts; ids are allocated atomically and duplicates from other workers dropped by the store
+    alert_engine = get_alert_engine()
+    alert_engine.raise_alerts(alerts_triggered)
+
+    # Return only the latest alert id; the log itself stays on the server
+    return alert_engine.latest_id()
+
+
+# --- Background Fleet Worker and Live Stream (Server-Sent Events) ---
+# One worker per process advances the fleet, runs predictions for watched stations, checks
+# alerts and publishes an immutable FleetSnapshot every cycle. Callbacks only read snapshots,
+# and each watched station's update is pushed to all of its viewers over SSE.
+FLEET_CYCLE_SECONDS = 1.0
+STREAM_BROADCASTER = Broadcaster()
+
+# Real model outputs from main_api when PREDICTION_API_URL is set (simulated values otherwise)
+PREDICTION_CLIENT = PredictionClient(PREDICTION_API_URL) if PREDICTION_API_URL else None
+PREDICTION_DEADLINE_SECONDS = 0.3
+
+
+def merge_api_prediction(station, results, api_result):
+    """
+    Replaces the simulated readings and model outputs with the API's /predict_batch result, recomputes
+    MTDI/HCRS/P-Conflict/STI from the API reading and updates the station record the alert rules read.
+    """
+    api_input = api_result["Real_Time_Input"]
+    # Isolation Forest decision function (lower is more anomalous) on the dashboard's 0-1 "higher is worse" scale
+    anomaly_score = float(indices.anomaly_severity(api_result["Anomaly_Check"]["Score"]))
+    water_level = api_input['water_level']
+    station_indices = {name: float(value) for name, value in indices.compute_indices(
+        water_level, station['lat'], station['lon'], anomaly_score, *indices.draw_noise(FLEET_RNG, ())).items()}
+
+    station['level'] = water_level
+    station['PConflict_Initial'] = station_indices['PConflict']
+    station['HCRS'] = station_indices['HCRS']
+    station['Anomaly_Score'] = anomaly_score
+
+    return {
+        **results,
+        "Real_Time_Input": {**results["Real_Time_Input"],
+                            **{k: api_input[k] for k in ('water_level', 'rainfall_mm', 'avg_temp_c', 'pet_mm',
+                                                         'elevation')}},
+        "Water_Level_Prediction": api_result["Water_Level_Prediction"],
+        "Drought_Risk_Index": api_result["Drought_Risk_Index"],
+        "Estimated_Recharge": api_result["Estimated_Recharge"],
+        "Simulated_Extraction": api_result["Simulated_Extraction"],
+        "Anomaly_Check": {"Is_Anomaly": "TRUE" if api_result["Anomaly_Check"]["Is_Anomaly"] == "Yes" else "FALSE",
+                          "Score": anomaly_score},
+        **station_indices,
+    }
+
+
+def record_station_reading(station_id, results):
+    """Persists a station's reading and model outputs to the time-series store."""
+    input_data = results["Real_Time_Input"]
+    TS_STORE.append(station_id, {
+        'water_level': input_data['water_level'], 'rainfall_mm': input_data['rainfall_mm'],
+        'avg_temp_c': input_data['avg_temp_c'], 'pet_mm': input_data['pet_mm'],
+        'next_day_level': results['Water_Level_Prediction']['Next_Day_Level'],
+        'risk_proba': results['Drought_Risk_Index']['Probability_Critical_Drop'],
+        'recharge_30d': results['Estimated_Recharge']['30_Day_Net_Change'],
+        'extraction_rate': results['Simulated_Extraction']['Rate'],
+        'anomaly_score': results['Anomaly_Check']['Score'],
+        'mtdi': results['MTDI'], 'hcrs': results['HCRS'], 'p_conflict': results['PConflict'], 'sti': results['STI'],
+    })
+
+
+def run_fleet_cycle(seq):
+    """One worker cycle: registry edits, watched-station predictions, a fleet step, alerts, snapshot, broadcast."""
+    fleet = get_dashboard_fleet()
+    apply_registry_changes(fleet.by_id)
+    watched_ids = [sid for sid in STREAM_BROADCASTER.topics() if sid in fleet.by_id]
+
+    # One batched, deadline-bounded API call for every watched station
+    api_results = PREDICTION_CLIENT.get_predictions(watched_ids, PREDICTION_DEADLINE_SECONDS) \
+        if PREDICTION_CLIENT and watched_ids else {}
+
+    results = {}
+    for station_id in watched_ids:
+        station = get_station_by_id(station_id)
+        results[station_id] = simulate_station_reading(station)
+        if station_id in api_results:
+            results[station_id] = merge_api_prediction(station, results[station_id], api_results[station_id])
+        record_station_reading(station_id, results[station_id])
+    advance_fleet(skip_station_ids=set(watched_ids))
+
+    latest_alert_id = check_for_alerts()
+    snapshot = FleetSnapshot(
+        seq=seq, created_at=time.time(), time_label=datetime.now().strftime('%H:%M:%S'),
+        stations=freeze_records(fleet.sensors), results=MappingProxyType(results),
+        latest_alert_id=latest_alert_id
+    )
 
-    # 3. Low Resilience Alert
-    if results['HCRS'] < 40:
-        ALERT_ID_COUNTER += 1
-        alerts_triggered.append({
-            'id': ALERT_ID_COUNTER,
-            'timestamp': current_time,
-            'station_id': station_id,
-            'station_name': station_name,
-            'priority': 'MEDIUM',
-            'type': 'LOW_RESILIENCE',
-            'message': f"HCRS score dropped to {results['HCRS']:.0f}. Near Critical Drop.",
-            'status': 'NEW'
+    for station_id, station_results in results.items():
+        STREAM_BROADCASTER.publish(station_id, 'reading', {
+            'seq': seq, 'station_id': station_id, 'time': snapshot.time_label,
+            'results': station_results, 'latest_alert_id': latest_alert_id
         })
+    return snapshot
 
-    # Add new alerts to the global deque
-    for alert in alerts_triggered:
-        ALERT_LOG.appendleft(alert)
 
-    # Return the log as a list for dcc.Store
-    return list(ALERT_LOG)
+FLEET_WORKER = FleetWorker(run_fleet_cycle, interval_seconds=FLEET_CYCLE_SECONDS)
+
+
+def get_fleet_snapshot():
+    """
+    Latest immutable fleet snapshot; starts the worker on first use (after any gunicorn fork).
+    For callbacks only: if the first cycle hasn't finished within 5 s, the update is skipped
+    (PreventUpdate) rather than running a second cycle alongside the worker's.
+    """
+    FLEET_WORKER.start()
+    snapshot = FLEET_WORKER.latest
+    if snapshot is None:
+        snapshot = FLEET_WORKER.wait_for_snapshot(timeout=5.0)
+    if snapshot is None:
+        raise PreventUpdate
+    return snapshot
+
+
+def apply_what_if_rainfall(results, override_rainfall_str):
+    """Applies a viewer's 'what if' rainfall to a shared result (the broadcast itself is never modified)."""
+    try:
+        override_rainfall = float(override_rainfall_str) if override_rainfall_str is not None else 0.0
+    except (ValueError, TypeError):
+        override_rainfall = 0.0
+    if not override_rainfall:
+        return results
+
+    # Not clamped to the simulation's 95-105 m band: API predictions are real levels
+    next_day_level = results['Water_Level_Prediction']['Next_Day_Level'] + override_rainfall * 0.05
+    return {
+        **results,
+        "Real_Time_Input": {**results["Real_Time_Input"],
+                            "rainfall_mm": round(results["Real_Time_Input"]["rainfall_mm"] + override_rainfall, 2)},
+        "Water_Level_Prediction": {"Next_Day_Level": round(next_day_level, 2)},
+    }
 
 
 # =================================================================================
@@ -481,113 +650,159 @@ def get_color_and_icon(delta_value, base_color_name, custom_metric=None):
     return color, icon
 
 
-def create_metric_card(title, value, unit="", delta_value=None, delta_color_name="primary", icon_emoji="📊",
-                       custom_metric=None, lang_code='en'):
-    delta_hex_color, icon = get_color_and_icon(delta_value, delta_color_name, custom_metric)
-    display_value = f"{value}"
-    delta_text = html.Div()
+# --- Metric Cards ---
+# Card shells (icon, title, unit) are static and built once; labels are translated once per
+# language, and each tick only sends the value, the delta line and a color patch per card.
+# The accent color is a CSS variable on the card, so one Patch recolors border, icon and delta.
+METRIC_CARDS = {
+    'water_level': {'title': "Water Level", 'unit': "m", 'icon': "💧"},
+    'rainfall': {'title': "Rainfall", 'unit': "mm", 'icon': "🌧️"},
+    'temperature': {'title': "Temperature", 'unit': "°C", 'icon': "🌡️"},
+    'pet': {'title': "Evapotranspiration", 'unit': "mm", 'icon': "💨"},
+    'forecast': {'title': "24hr Level Forecast", 'unit': "m", 'icon': "🔮", 'has_delta': True},
+    'risk': {'title': "Drought Risk Probability", 'unit': "", 'icon': "⚠️", 'has_delta': True},
+    'recharge': {'title': "30-Day Net Recharge", 'unit': "m", 'icon': "📈", 'has_delta': True},
+    'mtdi': {'title': "Trend Disparity Index (MTDI)", 'unit': "", 'icon': "📊", 'custom_metric': 'MTDI'},
+    'hcrs': {'title': "Resilience Score (HCRS)", 'unit': "/ 100", 'icon': "📊", 'custom_metric': 'HCRS'},
+    'pconflict': {'title': "Predicted Conflict Score", 'unit': "", 'icon': "📊", 'custom_metric': 'PConflict'},
+    'sti': {'title': "Sensor Trust Index (STI)", 'unit': "/ 100", 'icon': "📊", 'custom_metric': 'STI'},
+}
+METRIC_CARD_KEYS = tuple(METRIC_CARDS)
+DELTA_CARD_KEYS = tuple(k for k, spec in METRIC_CARDS.items() if spec.get('has_delta') or spec.get('custom_metric'))
+
+# Custom metric -> (compare '<' or '>', [(threshold, status label)], fallback label), same cut-offs as get_color_and_icon
+METRIC_STATUS_LEVELS = {
+    'STI': ('<', [(80, "Integrity Compromised"), (90, "Review Data Source")], "Data Trusted"),
+    'PConflict': ('>', [(0.6, "High Conflict Risk"), (0.3, "Moderate Tension")], "Low Tension"),
+    'MTDI': ('>', [(0.5, "Critical Disparity"), (0.3, "Watch Trend")], "Stable Trend"),
+    'HCRS': ('<', [(50, "High Risk"), (75, "Moderate Risk")], "Low Risk"),
+}
 
-    # Translate the title and unit
-    title_translated = get_text(title, lang_code)
-    unit_translated = get_text(unit, lang_code)
 
-    if delta_value is not None:
-        delta_sign = '+' if delta_value > 0 else ''
+def metric_card_id(part, card_key):
+    return {'type': f'metric-{part}', 'card': card_key}
 
-        if custom_metric == 'STI':
-            status_text = get_text("Integrity Compromised", lang_code) if delta_value < 80 else (
-                get_text("Review Data Source", lang_code) if delta_value < 90 else get_text("Data Trusted", lang_code))
-        elif custom_metric == 'PConflict':
-            status_text = get_text("High Conflict Risk", lang_code) if delta_value > 0.6 else (
-                get_text("Moderate Tension", lang_code) if delta_value > 0.3 else get_text("Low Tension", lang_code))
-        elif custom_metric == 'MTDI':
-            status_text = get_text("Critical Disparity", lang_code) if delta_value > 0.5 else (
-                get_text("Watch Trend", lang_code) if delta_value > 0.3 else get_text("Stable Trend", lang_code))
-        elif custom_metric == 'HCRS':
-            status_text = get_text("High Risk", lang_code) if delta_value < 50 else (
-                get_text("Moderate Risk", lang_code) if delta_value < 75 else get_text("Low Risk", lang_code))
-        else:
-            # Standard delta display
-            delta_unit = get_text("m (24hr)", lang_code) if unit == 'm' else unit_translated
-            delta_text = html.Span(
-                [
-                    html.Span(icon, className="me-1"),
-                    f"{delta_sign}{delta_value:.2f} {delta_unit}"
-                ],
-                style={'color': delta_hex_color, 'fontSize': '0.9rem', 'fontWeight': '600'}
-            )
-            status_text = None
 
-        if status_text:
-            delta_text = html.Span(
-                [
-                    html.Span(icon, className="me-1"),
-                    status_text
-                ],
-                style={'color': delta_hex_color, 'fontSize': '0.9rem', 'fontWeight': '600'}
-            )
+@lru_cache(maxsize=None)
+def metric_card_labels(lang_code):
+    """Translated (titles, units) for every card, in METRIC_CARD_KEYS order. Computed once per language."""
+    titles = tuple(get_text(METRIC_CARDS[k]['title'], lang_code) for k in METRIC_CARD_KEYS)
+    units = tuple(f" {get_text(METRIC_CARDS[k]['unit'], lang_code)}" for k in METRIC_CARD_KEYS)
+    return titles, units
+
+
+@lru_cache(maxsize=None)
+def translated_status(label, lang_code):
+    return get_text(label, lang_code)
+
+
+def metric_status_label(custom_metric, value):
+    compare, levels, fallback = METRIC_STATUS_LEVELS[custom_metric]
+    for threshold, label in levels:
+        if (value < threshold) if compare == '<' else (value > threshold):
+            return label
+    return fallback
+
+
+def build_metric_card_shell(card_key, lang_code='en'):
+    """Static card layout; value, delta and accent color are filled in by update_dashboard."""
+    import dash_bootstrap_components as dbc
 
+    spec = METRIC_CARDS[card_key]
+    titles, units = metric_card_labels(lang_code)
+    index = METRIC_CARD_KEYS.index(card_key)
+    initial_color = TEXT_MUTED if card_key in DELTA_CARD_KEYS else ACCENT_PRIMARY
     return dbc.Card(
         [
             dbc.CardBody(
                 [
                     html.Div([
-                        html.Span(icon_emoji, style={'fontSize': '1.5rem', 'color': delta_hex_color}),
-                        html.P(title_translated, className="mb-0 ms-2",
+                        html.Span(spec['icon'], style={'fontSize': '1.5rem', 'color': 'var(--metric-color)'}),
+                        html.P(titles[index], id=metric_card_id('title', card_key), className="mb-0 ms-2",
                                style={"fontSize": "1.0rem", "color": TEXT_MUTED, "fontWeight": 500}),
                     ], className="d-flex align-items-center mb-2"),
 
                     html.Div([
                         html.Span(
-                            display_value,
+                            "—", id=metric_card_id('value', card_key),
                             style={"color": TEXT_DARK, "fontWeight": "900", "fontSize": "2.5rem"}
                         ),
                         html.Span(
-                            f" {unit_translated}",
+                            units[index], id=metric_card_id('unit', card_key),
                             style={"color": TEXT_MUTED, "fontWeight": "500", "fontSize": "1.1rem", "marginLeft": "5px"}
                         )
                     ], className="d-flex align-items-baseline mb-2"),
 
-                    delta_text,
+                    html.Span(
+                        id=metric_card_id('delta', card_key),
+                        style={'color': 'var(--metric-color)', 'fontSize': '0.9rem', 'fontWeight': '600'}
+                    ),
                 ],
                 style={"padding": "20px"}
             )
         ],
+        id=metric_card_id('card', card_key),
         className="border-0 hover-lift",
         style={
+            "--metric-color": initial_color,
             "borderRadius": "18px",
             "backgroundColor": CARD_BG,
             "boxShadow": SOFT_SHADOW_MD,
             "transition": "all 0.3s ease",
-            "borderLeft": f"5px solid {delta_hex_color}"
+            "borderLeft": "5px solid var(--metric-color)"
         },
     )
 
 
+def metric_card_delta(card_key, delta_value, delta_color_name="primary", lang_code='en'):
+    """Returns (delta children, card style Patch) for one card's per-tick update."""
+    spec = METRIC_CARDS[card_key]
+    custom_metric = spec.get('custom_metric')
+    delta_hex_color, icon = get_color_and_icon(delta_value, delta_color_name, custom_metric)
+
+    if custom_metric:
+        text = translated_status(metric_status_label(custom_metric, delta_value), lang_code)
+    else:
+        # Standard delta display
+        delta_sign = '+' if delta_value > 0 else ''
+        delta_unit = translated_status("m (24hr)" if spec['unit'] == 'm' else spec['unit'], lang_code)
+        text = f"{delta_sign}{delta_value:.2f} {delta_unit}"
+
+    style_patch = Patch()
+    style_patch['--metric-color'] = delta_hex_color
+    return [html.Span(icon, className="me-1"), text], style_patch
+
+
 # --- Login Modal ---
-login_modal = dbc.Modal(
-    [
-        dbc.ModalHeader(dbc.ModalTitle("Login")),
-        dbc.ModalBody(
-            [
-                dbc.Input(id="login-username", placeholder="Username", type="text", className="mb-3"),
-                dbc.Input(id="login-password", placeholder="Password", type="password", className="mb-3"),
-                html.Div(id="login-status-message", style={"color": DANGER_COLOR, "fontWeight": 600}),
-            ]
-        ),
-        dbc.ModalFooter(
-            dbc.Button("Submit", id="login-submit", className="ms-auto", n_clicks=0, color="primary")
-        ),
-    ],
-    id="login-modal",
-    is_open=False,
-)
+def login_modal():
+    import dash_bootstrap_components as dbc
+
+    return dbc.Modal(
+        [
+            dbc.ModalHeader(dbc.ModalTitle("Login")),
+            dbc.ModalBody(
+                [
+                    dbc.Input(id="login-username", placeholder="Username", type="text", className="mb-3"),
+                    dbc.Input(id="login-password", placeholder="Password", type="password", className="mb-3"),
+                    html.Div(id="login-status-message", style={"color": DANGER_COLOR, "fontWeight": 600}),
+                ]
+            ),
+            dbc.ModalFooter(
+                dbc.Button("Submit", id="login-submit", className="ms-auto", n_clicks=0, color="primary")
+            ),
+        ],
+        id="login-modal",
+        is_open=False,
+    )
 
 # =================================================================================
 # --- APPLICATION LAYOUT (REDESIGNED) ---
 # =================================================================================
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP])
+# The layout is a function (serve_layout) and always the full page, so outside debug mode Dash
+# needn't build a separate validation layout when it is assigned, i.e. at import
+DASH_DEBUG = os.environ.get("DASH_DEBUG") == "1"
+app = dash.Dash(__name__, external_stylesheets=BOOTSTRAP_STYLESHEETS, suppress_callback_exceptions=not DASH_DEBUG)
 server = app.server
 
 custom_css = f"""
@@ -679,389 +894,431 @@ app.index_string = """
 """
 
 # Layout structure for the Comparative Analytics Tab
-comparative_analytics_layout = html.Div([
-    html.H4(get_text("State Median Water Level Comparison", 'en'), className="card-title-redesign",
-            id="title-state-comparison"),
-    dbc.Row([
-        dbc.Col(
-            dbc.Card(
-                dbc.CardBody([
-                    dcc.Loading(
-                        dcc.Graph(id='state-median-chart', config={'displayModeBar': False}, style={'height': '450px'}))
-                ]),
-                className="border-0 hover-lift mb-5",
-                style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
-            ),
-            width=12
-        )
-    ]),
-    html.H4(get_text("Peer Group Benchmarking (P-Conflict Score)", 'en'), className="card-title-redesign",
-            id="title-peer-benchmarking"),
-    dbc.Row([
-        dbc.Col(
-            dbc.Card(
-                dbc.CardBody([
-                    dcc.Loading(dcc.Graph(id='pconflict-benchmark-chart', config={'displayModeBar': False},
-                                          style={'height': '450px'}))
-                ]),
-                className="border-0 hover-lift mb-5",
-                style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
-            ),
-            width=12
-        )
+def comparative_analytics_layout():
+    import dash_bootstrap_components as dbc
+
+    return html.Div([
+        html.H4(get_text("State Median Water Level Comparison", 'en'), className="card-title-redesign",
+                id="title-state-comparison"),
+        dbc.Row([
+            dbc.Col(
+                dbc.Card(
+                    dbc.CardBody([
+                        dcc.Loading(
+                            dcc.Graph(id='state-median-chart', config={'displayModeBar': False},
+                                      style={'height': '450px'}))
+                    ]),
+                    className="border-0 hover-lift mb-5",
+                    style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
+                ),
+                width=12
+            )
+        ]),
+        html.H4(get_text("Peer Group Benchmarking (P-Conflict Score)", 'en'), className="card-title-redesign",
+                id="title-peer-benchmarking"),
+        dbc.Row([
+            dbc.Col(
+                dbc.Card(
+                    dbc.CardBody([
+                        dbc.RadioItems(id='peer-mode-selector', options=PEER_MODE_OPTIONS, value='state', inline=True,
+                                       className="mb-2"),
+                        dcc.Loading(dcc.Graph(id='pconflict-benchmark-chart', config={'displayModeBar': False},
+                                              style={'height': '450px'}))
+                    ]),
+                    className="border-0 hover-lift mb-5",
+                    style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
+                ),
+                width=12
+            )
+        ])
     ])
-])
 
 # Layout structure for the Alert Log Tab
-alert_log_layout = html.Div([
-    html.H4(get_text("Alert Log", 'en'), className="card-title-redesign", id="title-alert-log"),
-    dbc.Row([
-        dbc.Col(
-            dbc.Card(
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col(html.P("Filter Status:"), width=2),
-                        dbc.Col(dcc.Dropdown(
-                            id='alert-status-filter',
-                            options=[
-                                {'label': 'NEW', 'value': 'NEW'},
-                                {'label': 'ACKNOWLEDGED', 'value': 'ACKNOWLEDGED'},
-                                {'label': 'RESOLVED', 'value': 'RESOLVED'},
-                                {'label': 'ALL', 'value': 'ALL'},
+def alert_log_layout():
+    import dash_bootstrap_components as dbc
+
+    return html.Div([
+        html.H4(get_text("Alert Log", 'en'), className="card-title-redesign", id="title-alert-log"),
+        dbc.Row([
+            dbc.Col(
+                dbc.Card(
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col(html.P("Filter Status:"), width=2),
+                            dbc.Col(dcc.Dropdown(
+                                id='alert-status-filter',
+                                options=[
+                                    {'label': 'NEW', 'value': 'NEW'},
+                                    {'label': 'ACKNOWLEDGED', 'value': 'ACKNOWLEDGED'},
+                                    {'label': 'RESOLVED', 'value': 'RESOLVED'},
+                                    {'label': 'ALL', 'value': 'ALL'},
+                                ],
+                                value='NEW',
+                                clearable=False,
+                                className="dash-dropdown"
+                            ), width=4),
+                            dbc.Col(
+                                html.Div([
+                                    dbc.Button(get_text("Acknowledge", 'en'), id='acknowledge-button', color="warning",
+                                               className="me-2", disabled=True),
+                                    dbc.Button(get_text("Resolve", 'en'), id='resolve-button', color="success",
+                                               disabled=True),
+                                ], id='alert-action-buttons', className="d-flex justify-content-end"),
+                                width=6
+                            )
+                        ], className="mb-3 align-items-center"),
+                        dash_table.DataTable(
+                            id='alert-log-table',
+                            columns=[
+                                {"name": "ID", "id": "id", "type": "numeric"},
+                                {"name": "Timestamp", "id": "timestamp"},
+                                {"name": "Station", "id": "station_name"},
+                                {"name": "Priority", "id": "priority"},
+                                {"name": "Type", "id": "type"},
+                                {"name": "Message", "id": "message"},
+                                {"name": "Status", "id": "status", "presentation": "dropdown"},
                             ],
-                            value='NEW',
-                            clearable=False,
-                            className="dash-dropdown"
-                        ), width=4),
-                        dbc.Col(
-                            html.Div([
-                                dbc.Button(get_text("Acknowledge", 'en'), id='acknowledge-button', color="warning",
-                                           className="me-2", disabled=True),
-                                dbc.Button(get_text("Resolve", 'en'), id='resolve-button', color="success",
-                                           disabled=True),
-                            ], id='alert-action-buttons', className="d-flex justify-content-end"),
-                            width=6
+                            style_header={'backgroundColor': BG_LIGHT, 'fontWeight': 'bold'},
+                            style_data_conditional=[
+                                {'if': {'filter_query': '{priority} = "CRITICAL"', 'column_id': 'priority'},
+                                 'backgroundColor': DANGER_COLOR, 'color': CARD_BG},
+                                {'if': {'filter_query': '{priority} = "HIGH"', 'column_id': 'priority'},
+                                 'backgroundColor': WARNING_COLOR, 'color': TEXT_DARK},
+                                {'if': {'filter_query': '{status} = "RESOLVED"', 'column_id': 'status'},
+                                 'color': SUCCESS_COLOR, 'textDecoration': 'line-through'},
+                            ],
+                            page_action='custom',
+                            page_current=0,
+                            page_size=ALERT_PAGE_SIZE,
+                            page_count=1,
+                            sort_action='custom',
+                            sort_mode='multi',
+                            sort_by=[],
+                            filter_action='custom',
+                            filter_query='',
+                            row_selectable='multi',
                         )
-                    ], className="mb-3 align-items-center"),
-                    dash_table.DataTable(
-                        id='alert-log-table',
-                        columns=[
-                            {"name": "ID", "id": "id", "type": "numeric"},
-                            {"name": "Timestamp", "id": "timestamp"},
-                            {"name": "Station", "id": "station_name"},
-                            {"name": "Priority", "id": "priority"},
-                            {"name": "Type", "id": "type"},
-                            {"name": "Message", "id": "message"},
-                            {"name": "Status", "id": "status", "presentation": "dropdown"},
-                        ],
-                        style_header={'backgroundColor': BG_LIGHT, 'fontWeight': 'bold'},
-                        style_data_conditional=[
-                            {'if': {'filter_query': '{priority} = "CRITICAL"', 'column_id': 'priority'},
-                             'backgroundColor': DANGER_COLOR, 'color': CARD_BG},
-                            {'if': {'filter_query': '{priority} = "HIGH"', 'column_id': 'priority'},
-                             'backgroundColor': WARNING_COLOR, 'color': TEXT_DARK},
-                            {'if': {'filter_query': '{status} = "RESOLVED"', 'column_id': 'status'},
-                             'color': SUCCESS_COLOR, 'textDecoration': 'line-through'},
-                        ],
-                        page_action='native',
-                        page_current=0,
-                        page_size=10,
-                        sort_action='native',
-                        filter_action='native',
-                        row_selectable='multi',
-                    )
-                ]),
-                className="border-0 hover-lift mb-5",
-                style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
-            ),
-            width=12
-        )
+                    ]),
+                    className="border-0 hover-lift mb-5",
+                    style={"backgroundColor": CARD_BG, "borderRadius": "18px", "boxShadow": SOFT_SHADOW_MD}
+                ),
+                width=12
+            )
+        ])
     ])
-])
-
-app.layout = html.Div(style=GRID_STYLE, children=[
-    # --- Hidden Stores ---
-    dcc.Interval(id='interval-component', interval=1 * 1000, n_intervals=0),
-    dcc.Store(id='water-level-history', data={'time': [], 'current_level': [], 'predicted_level': []}),
-    dcc.Store(id='auth-status-store', data={'logged_in': False, 'username': None}),
-    dcc.Store(id='alert-log-store', data=list(ALERT_LOG)),
-    dcc.Store(id='selected-state-ut-store', data=None),  # For Map Drill-down
-    dcc.Store(id='language-store', data='en'),  # Default Language
-    login_modal,
-
-    dbc.Container([
-        # --- HEADER ROW (Title, Selector, Language, Auth) ---
-        dbc.Row(
-            dbc.Col(
-                dbc.Card(
-                    dbc.CardBody(
-                        dbc.Row(
-                            [
-                                # Col 1: Title and Subtitle
-                                dbc.Col(
-                                    html.Div([
-                                        html.H1(
-                                            get_text("Aqua-Sight | DWLR CONSOLE", 'en'),
-                                            className="mb-1",
-                                            id="main-title",
-                                            style={"color": ACCENT_PRIMARY, "fontWeight": "900", "letterSpacing": "1px",
-                                                   "fontSize": "2.8rem"}
-                                        ),
-                                        html.P(
-                                            get_text("Real-Time Subsurface Water Dynamics and Predictive Forecasting",
-                                                     'en'),
-                                            id="subtitle",
-                                            style={"fontSize": "1.2rem", "color": TEXT_MUTED}
-                                        )
-                                    ], className="header-titles"),
-                                    align="center",
-                                    width={"size": 12, "lg": 5}
-                                ),
 
-                                # Col 2: Controls (Station, Language, Auth, Alerts)
-                                dbc.Col(
-                                    dbc.Row([
-                                        # Station Selector
-                                        dbc.Col(
-                                            dcc.Dropdown(
-                                                id='station-selector',
-                                                options=DROPDOWN_OPTIONS,
-                                                value=MOCK_DWLR_SENSORS[0]['id'],
-                                                clearable=False,
-                                                className="dash-dropdown",
+@built_on_first_use
+def serve_layout():
+    """
+    The page layout, built on the first request rather than at import; it is also where
+    dash_bootstrap_components is first imported (Dash collects component scripts after this).
+    """
+    import dash_bootstrap_components as dbc
+
+    return html.Div(style=GRID_STYLE, children=[
+        # --- Hidden Stores ---
+        dcc.Store(id='live-stream-store'),  # Filled by the SSE stream (assets/event_stream.js)
+        dcc.Store(id='stream-subscription-store'),
+        dcc.Store(id='session-key', storage_type='session'),  # Per-tab key into SESSION_STORE
+        dcc.Store(id='water-level-history', data=None),  # Session key + version of the server-side history
+        dcc.Store(id='auth-status-store', data={'logged_in': False, 'username': None}),
+        dcc.Store(id='alert-log-store', data=0),  # Latest alert id (log is server-side)
+        dcc.Store(id='selected-state-ut-store', data=None),  # For Map Drill-down
+        dcc.Store(id='language-store', data='en'),  # Default Language
+        login_modal(),
+
+        dbc.Container([
+            # --- HEADER ROW (Title, Selector, Language, Auth) ---
+            dbc.Row(
+                dbc.Col(
+                    dbc.Card(
+                        dbc.CardBody(
+                            dbc.Row(
+                                [
+                                    # Col 1: Title and Subtitle
+                                    dbc.Col(
+                                        html.Div([
+                                            html.H1(
+                                                get_text("Aqua-Sight | DWLR CONSOLE", 'en'),
+                                                className="mb-1",
+                                                id="main-title",
+                                                style={"color": ACCENT_PRIMARY, "fontWeight": "900",
+                                                       "letterSpacing": "1px", "fontSize": "2.8rem"}
                                             ),
-                                            width={"size": 12, "md": 5},
-                                            className="mb-3 mb-md-0"
-                                        ),
-                                        # Language Selector
-                                        dbc.Col(
-                                            dcc.Dropdown(
-                                                id='language-selector',
-                                                options=[{'label': v, 'value': k} for k, v in LANGUAGES.items()],
-                                                value='en',
-                                                clearable=False,
-                                                className="dash-dropdown",
+                                            html.P(
+                                                get_text(
+                                                    "Real-Time Subsurface Water Dynamics and Predictive Forecasting",
+                                                    'en'),
+                                                id="subtitle",
+                                                style={"fontSize": "1.2rem", "color": TEXT_MUTED}
+                                            )
+                                        ], className="header-titles"),
+                                        align="center",
+                                        width={"size": 12, "lg": 5}
+                                    ),
+
+                                    # Col 2: Controls (Station, Language, Auth, Alerts)
+                                    dbc.Col(
+                                        dbc.Row([
+                                            # Station Selector
+                                            dbc.Col(
+                                                dcc.Dropdown(
+                                                    id='station-selector',
+                                                    options=default_station_options(),
+                                                    value=get_dashboard_fleet().station_ids[0],
+                                                    clearable=False,
+                                                    search_order='original',  # Keep server-side ranking
+                                                    className="dash-dropdown",
+                                                ),
+                                                width={"size": 12, "md": 5},
+                                                className="mb-3 mb-md-0"
                                             ),
-                                            width={"size": 4, "md": 2},
-                                            className="mb-3 mb-md-0"
-                                        ),
-                                        # Alert Icon and Auth Buttons
-                                        dbc.Col(
-                                            html.Div([
-                                                # Alert Bell Icon
-                                                dbc.Button(
-                                                    [
-                                                        html.I(className="bi bi-bell-fill me-1"),
-                                                        dbc.Badge(0, id='alert-badge', color="danger", pill=True,
-                                                                  className="p-1", style={"verticalAlign": "top"})
-                                                    ],
-                                                    id="alert-bell",
-                                                    color="light",
-                                                    className="me-3 position-relative",
-                                                    style={'border': 'none', 'fontSize': '1.3rem'}
+                                            # Language Selector
+                                            dbc.Col(
+                                                dcc.Dropdown(
+                                                    id='language-selector',
+                                                    options=[{'label': v, 'value': k} for k, v in LANGUAGES.items()],
+                                                    value='en',
+                                                    clearable=False,
+                                                    className="dash-dropdown",
                                                 ),
-                                                # Login/Logout Button
-                                                dbc.Button(
-                                                    get_text("Login", 'en'),
-                                                    id='auth-button',
-                                                    color='primary',
-                                                    n_clicks=0,
-                                                    style={"fontWeight": 600}
-                                                )
-                                            ], className="d-flex align-items-center justify-content-end"),
-                                            width={"size": 8, "md": 5}
-                                        ),
-                                    ], className="g-3 align-items-center"),
-                                    className="d-flex align-items-center justify-content-md-end mt-3 mt-lg-0",
-                                    align="center",
-                                    width={"size": 12, "lg": 7}
-                                )
-                            ],
-                            className="g-0 align-items-center"
-                        )
+                                                width={"size": 4, "md": 2},
+                                                className="mb-3 mb-md-0"
+                                            ),
+                                            # Alert Icon and Auth Buttons
+                                            dbc.Col(
+                                                html.Div([
+                                                    # Alert Bell Icon
+                                                    dbc.Button(
+                                                        [
+                                                            html.I(className="bi bi-bell-fill me-1"),
+                                                            dbc.Badge(0, id='alert-badge', color="danger", pill=True,
+                                                                      className="p-1", style={"verticalAlign": "top"})
+                                                        ],
+                                                        id="alert-bell",
+                                                        color="light",
+                                                        className="me-3 position-relative",
+                                                        style={'border': 'none', 'fontSize': '1.3rem'}
+                                                    ),
+                                                    # Login/Logout Button
+                                                    dbc.Button(
+                                                        get_text("Login", 'en'),
+                                                        id='auth-button',
+                                                        color='primary',
+                                                        n_clicks=0,
+                                                        style={"fontWeight": 600}
+                                                    )
+                                                ], className="d-flex align-items-center justify-content-end"),
+                                                width={"size": 8, "md": 5}
+                                            ),
+                                        ], className="g-3 align-items-center"),
+                                        className="d-flex align-items-center justify-content-md-end mt-3 mt-lg-0",
+                                        align="center",
+                                        width={"size": 12, "lg": 7}
+                                    )
+                                ],
+                                className="g-0 align-items-center"
+                            )
+                        ),
+                        className="border-0 hover-lift",
+                        style={"borderRadius": "20px", "boxShadow": SOFT_SHADOW_LG}
                     ),
-                    className="border-0 hover-lift",
-                    style={"borderRadius": "20px", "boxShadow": SOFT_SHADOW_LG}
+                    width=12
                 ),
-                width=12
+                className="mb-4"
             ),
-            className="mb-4"
-        ),
 
-        # --- Tabs Container ---
-        dbc.Tabs(
-            id="main-tabs",
-            active_tab="tab-core-dashboard",
-            className="mb-4",
-            children=[
-                dbc.Tab(
-                    label=get_text("Core Dashboard", 'en'),
-                    tab_id="tab-core-dashboard",
-                    id="tab-label-core-dashboard",
-                    className="custom-tab-style",
-                    active_tab_style=dict(borderBottom='none'),
-                    active_label_style=dict(color=ACCENT_PRIMARY),
-                    children=html.Div(id='core-dashboard-content', children=[
-                        # Status and Real-Time Metrics Row
-                        dbc.Row([
-                            dbc.Col(
-                                html.Div(id='status-message', className="p-3 mb-4",
-                                         style={"borderRadius": "10px", "fontWeight": "700"}),
-                                width=12
-                            ),
-                            dbc.Row(id='real-time-metrics-row', className="mb-5 g-4"),
-                        ]),
-
-                        # Primary Forecast and Simulation Section
-                        html.H4(get_text("Forecasting & Risk Assessment", 'en'), className="card-title-redesign",
-                                id="title-forecast-risk"),
-                        dbc.Row([
-                            # Left Column: Prediction Metrics
-                            dbc.Col(
-                                dbc.Card(
-                                    dbc.CardBody([
-                                        html.H5(get_text("Primary Forecast Vector", 'en'), id="title-forecast-vector",
-                                                style={'color': TEXT_DARK, 'fontWeight': 600}),
-                                        dbc.Row(id='prediction-metrics-row', className="mt-3 g-3"),
-                                    ]),
-                                    className="border-0 hover-lift",
-                                    style={"backgroundColor": CARD_BG, "borderRadius": "18px",
-                                           "boxShadow": SOFT_SHADOW_MD}
+            # --- Tabs Container ---
+            dbc.Tabs(
+                id="main-tabs",
+                active_tab="tab-core-dashboard",
+                className="mb-4",
+                children=[
+                    dbc.Tab(
+                        label=get_text("Core Dashboard", 'en'),
+                        tab_id="tab-core-dashboard",
+                        id="tab-label-core-dashboard",
+                        className="custom-tab-style",
+                        active_tab_style=dict(borderBottom='none'),
+                        active_label_style=dict(color=ACCENT_PRIMARY),
+                        children=html.Div(id='core-dashboard-content', children=[
+                            # Status and Real-Time Metrics Row
+                            dbc.Row([
+                                dbc.Col(
+                                    html.Div(id='status-message', className="p-3 mb-4",
+                                             style={"borderRadius": "10px", "fontWeight": "700"}),
+                                    width=12
                                 ),
-                                lg=8, className="mb-4 mb-lg-0"
-                            ),
-                            # Right Column: "What If" Simulation Control
-                            dbc.Col(
-                                dbc.Card(
-                                    dbc.CardBody([
-                                        html.H5(get_text("🧪 'What If' Simulation", 'en'), id="title-what-if",
-                                                className="card-title", style={'color': ACCENT_PRIMARY}),
-                                        html.P(get_text("Simulated 24hr Rainfall (mm):", 'en'),
-                                               id="label-rainfall-input", className="mb-2",
-                                               style={'color': TEXT_DARK, 'fontWeight': 500}),
-                                        dcc.Input(
-                                            id='what-if-rainfall-input',
-                                            type='number',
-                                            value=0.0,
-                                            placeholder="Enter rainfall in mm",
-                                            min=0.0,
-                                            className="input-redesign",
-                                            style={'width': '100%'}
-                                        ),
-                                        html.Small(
-                                            get_text("The 24hr forecast level instantly adapts to this input.", 'en'),
-                                            id="note-rainfall-input",
-                                            className="text-muted mt-2 d-block")
-                                    ]),
-                                    className="border-0 hover-lift",
-                                    style={
-                                        "backgroundColor": CARD_BG, "borderRadius": "18px",
-                                        "border": f"3px solid {WARNING_COLOR}", "boxShadow": SOFT_SHADOW_MD
-                                    }
+                                dbc.Row([dbc.Col(build_metric_card_shell(k), lg=3, md=6)
+                                         for k in ('water_level', 'rainfall', 'temperature', 'pet')],
+                                        id='real-time-metrics-row', className="mb-5 g-4"),
+                            ]),
+
+                            # Primary Forecast and Simulation Section
+                            html.H4(get_text("Forecasting & Risk Assessment", 'en'), className="card-title-redesign",
+                                    id="title-forecast-risk"),
+                            dbc.Row([
+                                # Left Column: Prediction Metrics
+                                dbc.Col(
+                                    dbc.Card(
+                                        dbc.CardBody([
+                                            html.H5(get_text("Primary Forecast Vector", 'en'),
+                                                    id="title-forecast-vector",
+                                                    style={'color': TEXT_DARK, 'fontWeight': 600}),
+                                            dbc.Row([dbc.Col(build_metric_card_shell(k), md=4)
+                                                     for k in ('forecast', 'risk', 'recharge')],
+                                                    id='prediction-metrics-row', className="mt-3 g-3"),
+                                        ]),
+                                        className="border-0 hover-lift",
+                                        style={"backgroundColor": CARD_BG, "borderRadius": "18px",
+                                               "boxShadow": SOFT_SHADOW_MD}
+                                    ),
+                                    lg=8, className="mb-4 mb-lg-0"
                                 ),
-                                lg=4
-                            )
-                        ], className="mb-5 g-4"),
+                                # Right Column: "What If" Simulation Control
+                                dbc.Col(
+                                    dbc.Card(
+                                        dbc.CardBody([
+                                            html.H5(get_text("🧪 'What If' Simulation", 'en'), id="title-what-if",
+                                                    className="card-title", style={'color': ACCENT_PRIMARY}),
+                                            html.P(get_text("Simulated 24hr Rainfall (mm):", 'en'),
+                                                   id="label-rainfall-input", className="mb-2",
+                                                   style={'color': TEXT_DARK, 'fontWeight': 500}),
+                                            dcc.Input(
+                                                id='what-if-rainfall-input',
+                                                type='number',
+                                                value=0.0,
+                                                placeholder="Enter rainfall in mm",
+                                                min=0.0,
+                                                className="input-redesign",
+                                                style={'width': '100%'}
+                                            ),
+                                            html.Small(
+                                                get_text("The 24hr forecast level instantly adapts to this input.",
+                                                         'en'),
+                                                id="note-rainfall-input",
+                                                className="text-muted mt-2 d-block")
+                                        ]),
+                                        className="border-0 hover-lift",
+                                        style={
+                                            "backgroundColor": CARD_BG, "borderRadius": "18px",
+                                            "border": f"3px solid {WARNING_COLOR}", "boxShadow": SOFT_SHADOW_MD
+                                        }
+                                    ),
+                                    lg=4
+                                )
+                            ], className="mb-5 g-4"),
 
-                        # Core Analytics: Chart and Complex Metrics
-                        html.H4(get_text("Core Analytical Dashboard", 'en'), className="card-title-redesign",
-                                id="title-core-analytics"),
-                        dbc.Row([
-                            # Live Chart
-                            dbc.Col(
-                                dbc.Card(
-                                    dbc.CardBody([
-                                        html.H5(get_text("Water Level Trajectory (Last 20 Readings)", 'en'),
-                                                id="title-level-trajectory",
-                                                style={'color': TEXT_DARK, 'fontWeight': 600}),
-                                        dcc.Graph(id='water-level-chart', config={'displayModeBar': False},
-                                                  style={'height': '350px'})
-                                    ]),
-                                    className="border-0 hover-lift",
-                                    style={"backgroundColor": CARD_BG, "borderRadius": "18px",
-                                           "boxShadow": SOFT_SHADOW_MD}
+                            # Core Analytics: Chart and Complex Metrics
+                            html.H4(get_text("Core Analytical Dashboard", 'en'), className="card-title-redesign",
+                                    id="title-core-analytics"),
+                            dbc.Row([
+                                # Live Chart
+                                dbc.Col(
+                                    dbc.Card(
+                                        dbc.CardBody([
+                                            dbc.Row([
+                                                dbc.Col(html.H5(
+                                                    get_text("Water Level Trajectory (Last 20 Readings)", 'en'),
+                                                    id="title-level-trajectory",
+                                                    style={'color': TEXT_DARK, 'fontWeight': 600}), width=9),
+                                                dbc.Col(dcc.Dropdown(id='history-range-selector',
+                                                                     options=HISTORY_RANGE_OPTIONS, value='live',
+                                                                     clearable=False, className="dash-dropdown"),
+                                                        width=3)
+                                            ], className="align-items-center"),
+                                            dcc.Graph(id='water-level-chart', config={'displayModeBar': False},
+                                                      style={'height': '350px'})
+                                        ]),
+                                        className="border-0 hover-lift",
+                                        style={"backgroundColor": CARD_BG, "borderRadius": "18px",
+                                               "boxShadow": SOFT_SHADOW_MD}
+                                    ),
+                                    lg=8, className="mb-4 mb-lg-0"
                                 ),
-                                lg=8, className="mb-4 mb-lg-0"
-                            ),
-                            # Unique Metrics (MTDI, HCRS, P-Conflict, STI)
-                            dbc.Col(
-                                dbc.Row([
-                                    dbc.Col(html.Div(id='hcrs-card'), md=6, className="mb-4"),
-                                    dbc.Col(html.Div(id='mtdi-card'), md=6, className="mb-4"),
-                                    dbc.Col(html.Div(id='pconflict-card'), md=6, className="mb-md-0"),
-                                    dbc.Col(html.Div(id='sti-card'), md=6, className="mb-md-0"),
-                                ], className="g-4"),
-                                lg=4
-                            )
-                        ], className="mb-5 g-4"),
+                                # Unique Metrics (MTDI, HCRS, P-Conflict, STI)
+                                dbc.Col(
+                                    dbc.Row([
+                                        dbc.Col(html.Div(build_metric_card_shell('hcrs'), id='hcrs-card'), md=6, className="mb-4"),
+                                        dbc.Col(html.Div(build_metric_card_shell('mtdi'), id='mtdi-card'), md=6, className="mb-4"),
+                                        dbc.Col(html.Div(build_metric_card_shell('pconflict'), id='pconflict-card'), md=6, className="mb-md-0"),
+                                        dbc.Col(html.Div(build_metric_card_shell('sti'), id='sti-card'), md=6, className="mb-md-0"),
+                                    ], className="g-4"),
+                                    lg=4
+                                )
+                            ], className="mb-5 g-4"),
 
-                        # Geospatial Monitoring Array (Map)
-                        html.H4(get_text("Geospatial Network Monitor (Mainland Distribution)", 'en'),
-                                className="card-title-redesign", id="title-map-monitor"),
-                        dbc.Row([
-                            dbc.Col(
-                                dbc.Card(
-                                    dbc.CardBody([
-                                        dbc.Row([
-                                            dbc.Col(html.P(id='map-filter-info', className="mb-0",
-                                                           style={'fontWeight': 600, 'color': ACCENT_PRIMARY}),
-                                                    width=9),
-                                            dbc.Col(dbc.Button(get_text("Clear Filter", 'en'), id='clear-map-filter',
-                                                               color="danger", size="sm", className="ms-auto",
-                                                               style={'display': 'none'}), width=3)
-                                        ], className="mb-2"),
-                                        dcc.Graph(id='dwlr-map', style={'height': '65vh'})
-                                    ]),
-                                    className="border-0 hover-lift",
-                                    style={"backgroundColor": CARD_BG, "borderRadius": "18px",
-                                           "boxShadow": SOFT_SHADOW_LG}
-                                ),
-                                width=12
-                            )
-                        ], className="mb-5"),
+                            # Geospatial Monitoring Array (Map)
+                            html.H4(get_text("Geospatial Network Monitor (Mainland Distribution)", 'en'),
+                                    className="card-title-redesign", id="title-map-monitor"),
+                            dbc.Row([
+                                dbc.Col(
+                                    dbc.Card(
+                                        dbc.CardBody([
+                                            dbc.Row([
+                                                dbc.Col(html.P(id='map-filter-info', className="mb-0",
+                                                               style={'fontWeight': 600, 'color': ACCENT_PRIMARY}),
+                                                        width=9),
+                                                dbc.Col(dbc.Button(get_text("Clear Filter", 'en'),
+                                                                   id='clear-map-filter', color="danger", size="sm",
+                                                                   className="ms-auto", style={'display': 'none'}),
+                                                        width=3)
+                                            ], className="mb-2"),
+                                            dcc.Graph(id='dwlr-map', style={'height': '65vh'})
+                                        ]),
+                                        className="border-0 hover-lift",
+                                        style={"backgroundColor": CARD_BG, "borderRadius": "18px",
+                                               "boxShadow": SOFT_SHADOW_LG}
+                                    ),
+                                    width=12
+                                )
+                            ], className="mb-5"),
 
-                        # Detailed Report Section
-                        html.H4(get_text("System Integrity Report", 'en'), className="card-title-redesign",
-                                id="title-integrity-report"),
-                        dbc.Row([
-                            dbc.Col(
-                                dbc.Card(
-                                    dbc.CardBody([
-                                        html.Div(id='detailed-report', style={'color': TEXT_DARK})
-                                    ]),
-                                    className="border-0 hover-lift",
-                                    style={"backgroundColor": CARD_BG, "borderRadius": "18px",
-                                           "boxShadow": SOFT_SHADOW_MD}
-                                ),
-                                width=12
-                            )
+                            # Detailed Report Section
+                            html.H4(get_text("System Integrity Report", 'en'), className="card-title-redesign",
+                                    id="title-integrity-report"),
+                            dbc.Row([
+                                dbc.Col(
+                                    dbc.Card(
+                                        dbc.CardBody([
+                                            html.Div(id='detailed-report', style={'color': TEXT_DARK})
+                                        ]),
+                                        className="border-0 hover-lift",
+                                        style={"backgroundColor": CARD_BG, "borderRadius": "18px",
+                                               "boxShadow": SOFT_SHADOW_MD}
+                                    ),
+                                    width=12
+                                )
+                            ])
                         ])
-                    ])
-                ),
-                # Comparative Analytics Tab
-                dbc.Tab(
-                    label=get_text("Comparative Analytics", 'en'),
-                    tab_id="tab-comparative-analytics",
-                    id="tab-label-comparative-analytics",
-                    className="custom-tab-style",
-                    active_tab_style=dict(borderBottom='none'),
-                    active_label_style=dict(color=ACCENT_PRIMARY),
-                    children=comparative_analytics_layout
-                ),
-                # Alert Log Tab
-                dbc.Tab(
-                    label=get_text("Alert Log", 'en'),
-                    tab_id="tab-alert-log",
-                    id="tab-label-alert-log",
-                    className="custom-tab-style",
-                    active_tab_style=dict(borderBottom='none'),
-                    active_label_style=dict(color=ACCENT_PRIMARY),
-                    children=alert_log_layout
-                )
-            ]
-        )
-    ], fluid=True)
-])
+                    ),
+                    # Comparative Analytics Tab
+                    dbc.Tab(
+                        label=get_text("Comparative Analytics", 'en'),
+                        tab_id="tab-comparative-analytics",
+                        id="tab-label-comparative-analytics",
+                        className="custom-tab-style",
+                        active_tab_style=dict(borderBottom='none'),
+                        active_label_style=dict(color=ACCENT_PRIMARY),
+                        children=comparative_analytics_layout()
+                    ),
+                    # Alert Log Tab
+                    dbc.Tab(
+                        label=get_text("Alert Log", 'en'),
+                        tab_id="tab-alert-log",
+                        id="tab-label-alert-log",
+                        className="custom-tab-style",
+                        active_tab_style=dict(borderBottom='none'),
+                        active_label_style=dict(color=ACCENT_PRIMARY),
+                        children=alert_log_layout()
+                    )
+                ]
+            )
+        ], fluid=True)
+    ])
+
+
+app.layout = serve_layout
 
 
 # =================================================================================
@@ -1069,6 +1326,37 @@ app.layout = html.Div(style=GRID_STYLE, children=[
 # =================================================================================
 
 # 0. Translation Callback
+# Text for the translation callback's outputs, in output order (the auth button is handled separately)
+LAYOUT_TEXT_KEYS = (
+    "Aqua-Sight | DWLR CONSOLE",
+    "Real-Time Subsurface Water Dynamics and Predictive Forecasting",
+    "Core Dashboard",
+    "Comparative Analytics",
+    "Alert Log",
+    "Forecasting & Risk Assessment",
+    "Primary Forecast Vector",
+    "🧪 'What If' Simulation",
+    "Simulated 24hr Rainfall (mm):",
+    "The 24hr forecast level instantly adapts to this input.",
+    "Core Analytical Dashboard",
+    "Water Level Trajectory (Last 20 Readings)",
+    "Geospatial Network Monitor (Mainland Distribution)",
+    "System Integrity Report",
+    "State Median Water Level Comparison",
+    "Peer Group Benchmarking (P-Conflict Score)",
+    "Alert Log",
+    "Clear Filter",
+    "Acknowledge",
+    "Resolve",
+)
+AUTH_BUTTON_POSITION = 14  # The auth button label sits between the integrity report and state comparison titles
+
+# Pre-rendered translated text per language: a language switch is a dictionary lookup
+LAYOUT_TEXT_SNAPSHOTS = {
+    lang: tuple(tr(msg_id(key), lang) for key in LAYOUT_TEXT_KEYS) for lang in LANGUAGES
+}
+
+
 @app.callback(
     [Output('main-title', 'children'),
      Output('subtitle', 'children'),
@@ -1094,42 +1382,21 @@ app.layout = html.Div(style=GRID_STYLE, children=[
      Output('resolve-button', 'children'),
      Output('language-store', 'data')],
     [Input('language-selector', 'value')],
+    [State('auth-status-store', 'data')],
     # FIX: Added prevent_initial_call=True to resolve the DuplicateCallback error
     prevent_initial_call=True
 )
-def update_translations(lang_code):
+def update_translations(lang_code, auth_data):
     """Updates all static text elements based on the selected language."""
-    if not lang_code:
+    if lang_code not in LAYOUT_TEXT_SNAPSHOTS:
         lang_code = 'en'
 
     # Update translation for data table columns - needs to be handled separately in the table's definition/update,
     # but the action buttons and titles can be translated here.
-
-    return [
-        get_text("Aqua-Sight | DWLR CONSOLE", lang_code),
-        get_text("Real-Time Subsurface Water Dynamics and Predictive Forecasting", lang_code),
-        get_text("Core Dashboard", lang_code),
-        get_text("Comparative Analytics", lang_code),
-        get_text("Alert Log", lang_code),
-        get_text("Forecasting & Risk Assessment", lang_code),
-        get_text("Primary Forecast Vector", lang_code),
-        get_text("🧪 'What If' Simulation", lang_code),
-        get_text("Simulated 24hr Rainfall (mm):", lang_code),
-        get_text("The 24hr forecast level instantly adapts to this input.", lang_code),
-        get_text("Core Analytical Dashboard", lang_code),
-        get_text("Water Level Trajectory (Last 20 Readings)", lang_code),
-        get_text("Geospatial Network Monitor (Mainland Distribution)", lang_code),
-        get_text("System Integrity Report", lang_code),
-        get_text("Logout", lang_code) if dash.callback_context.triggered_id != 'language-selector' else get_text(
-            "Login", lang_code),  # Default to login unless auth status updates it
-        get_text("State Median Water Level Comparison", lang_code),
-        get_text("Peer Group Benchmarking (P-Conflict Score)", lang_code),
-        get_text("Alert Log", lang_code),
-        get_text("Clear Filter", lang_code),
-        get_text("Acknowledge", lang_code),
-        get_text("Resolve", lang_code),
-        lang_code
-    ]
+    snapshot = list(LAYOUT_TEXT_SNAPSHOTS[lang_code])
+    logged_in = bool(auth_data and auth_data.get('logged_in'))
+    snapshot.insert(AUTH_BUTTON_POSITION, tr(MSG_LOGOUT if logged_in else MSG_LOGIN, lang_code))
+    return snapshot + [lang_code]
 
 
 # 1. Callback to Handle Login/Logout
@@ -1180,47 +1447,39 @@ def handle_auth(auth_n, login_n, auth_data, is_open, username, password, lang_co
 # 2. Callback to Fetch Data and Update Metrics/Store
 @app.callback(
     [Output('status-message', 'children'),
-     Output('real-time-metrics-row', 'children'),
-     Output('prediction-metrics-row', 'children'),
      Output('detailed-report', 'children'),
      Output('water-level-history', 'data'),
-     # --- THE CORE FIX IS HERE: TARGETING THE CHILDREN OF THE HTML.DIV DIRECTLY ---
-     # We return the card component (which is already a dbc.Card) directly.
-     Output('mtdi-card', 'children'),
-     Output('hcrs-card', 'children'),
-     Output('pconflict-card', 'children'),
-     Output('sti-card', 'children'),
-     # ----------------------------------------------------------------------------
-     Output('alert-log-store', 'data')],  # Update alert log
-    [Input('interval-component', 'n_intervals')],
+     Output('alert-log-store', 'data'),  # Update alert log
+     Output('session-key', 'data')]
+    # Metric cards: only the changing parts of the prebuilt shells are sent
+    + [Output(metric_card_id('value', k), 'children') for k in METRIC_CARD_KEYS]
+    + [Output(metric_card_id('delta', k), 'children') for k in DELTA_CARD_KEYS]
+    + [Output(metric_card_id('card', k), 'style') for k in DELTA_CARD_KEYS],
+    [Input('live-stream-store', 'data')],
     [State('station-selector', 'value'),
-     State('water-level-history', 'data'),
+     State('session-key', 'data'),
      State('what-if-rainfall-input', 'value'),
      State('language-store', 'data')],  # Get language for card rendering
-    # FIX: Added prevent_initial_call=True as this is an interval callback
+    # FIX: Added prevent_initial_call=True as this is a stream-driven callback
     prevent_initial_call=True
 )
-def update_dashboard(n, selected_station_id, current_history, what_if_rainfall_input, lang_code):
-    current_time = datetime.now().strftime('%H:%M:%S')
-
-    last_level = 100.0
-    if current_history and current_history.get('current_level') and current_history['current_level']:
-        last_level = current_history['current_level'][-1]
+def update_dashboard(stream_event, selected_station_id, session_key, what_if_rainfall_input, lang_code):
+    # Ignore events still in flight for a previously selected station
+    if not stream_event or stream_event['station_id'] != selected_station_id:
+        raise PreventUpdate
 
-    if not current_history:
-        current_history = {'time': [], 'current_level': [], 'predicted_level': []}
+    current_time = stream_event['time']
 
-    history_deques = {k: deque(current_history[k], maxlen=MAX_HISTORY_POINTS) for k in current_history}
+    # The history ring buffer lives server-side; only the session key travels with each tick
+    new_session_key_out = dash.no_update
+    if not session_key:
+        session_key = new_session_key()
+        new_session_key_out = session_key
 
-    results = generate_live_data(
-        last_level=last_level,
-        selected_station_id=selected_station_id,
-        override_rainfall_str=what_if_rainfall_input
-    )
+    # Readings, predictions and alerts were computed once by the stream producer
+    results = apply_what_if_rainfall(stream_event['results'], what_if_rainfall_input)
 
     current_station_details = get_station_by_id(selected_station_id)
-    if not current_station_details:
-        current_station_details = MOCK_DWLR_SENSORS[0]
 
     station_name_display = current_station_details['Station_Name_Full']
 
@@ -1229,97 +1488,79 @@ def update_dashboard(n, selected_station_id, current_history, what_if_rainfall_i
     water_level = input_data['water_level']
     next_day_level = results['Water_Level_Prediction']['Next_Day_Level']
 
-    history_deques['time'].append(current_time)
-    history_deques['current_level'].append(water_level)
-    history_deques['predicted_level'].append(next_day_level)
-    new_history = {k: list(v) for k, v in history_deques.items()}
-
-    # --- 2. Real-Time Inputs Row ---
-    real_time_children = [
-        dbc.Col(
-            create_metric_card(get_text("Water Level", lang_code), f"{water_level:.2f}", unit=get_text("m", lang_code),
-                               icon_emoji="💧", delta_value=None, lang_code=lang_code),
-            lg=3, md=6),
-        dbc.Col(create_metric_card(get_text("Rainfall", lang_code), f"{input_data['rainfall_mm']:.2f}",
-                                   unit=get_text("mm", lang_code), icon_emoji="🌧️", delta_value=None,
-                                   lang_code=lang_code),
-                lg=3, md=6),
-        dbc.Col(create_metric_card(get_text("Temperature", lang_code), f"{input_data['avg_temp_c']:.1f}",
-                                   unit=get_text("°C", lang_code), icon_emoji="🌡️", delta_value=None,
-                                   lang_code=lang_code),
-                lg=3, md=6),
-        dbc.Col(create_metric_card(get_text("Evapotranspiration", lang_code), f"{input_data['pet_mm']:.2f}",
-                                   unit=get_text("mm", lang_code), icon_emoji="💨", delta_value=None,
-                                   lang_code=lang_code),
-                lg=3, md=6),
-    ]
-
-    # --- 3. Unique Metrics Cards ---
+    SESSION_STORE.append(session_key, HISTORY_BUFFER, {
+        'time': current_time, 'current_level': water_level, 'predicted_level': next_day_level
+    }, maxlen=MAX_HISTORY_POINTS)
+    new_history = {'session_key': session_key, 'version': stream_event['seq']}
+
+    # --- 2. Metric Card Values ---
     mtdi = results["MTDI"]
-    mtdi_card = create_metric_card(get_text("Trend Disparity Index (MTDI)", lang_code), f"{mtdi:.4f}", unit="",
-                                   delta_value=mtdi, custom_metric='MTDI', lang_code=lang_code)
     hcrs = results["HCRS"]
-    hcrs_card = create_metric_card(get_text("Resilience Score (HCRS)", lang_code), f"{hcrs:.0f}", unit="/ 100",
-                                   delta_value=float(hcrs), custom_metric='HCRS', lang_code=lang_code)
     p_conflict = results["PConflict"]
-    p_conflict_card = create_metric_card(get_text("Predicted Conflict Score", lang_code), f"{p_conflict:.4f}", unit="",
-                                         delta_value=p_conflict, custom_metric='PConflict', lang_code=lang_code)
     sti_score = results["STI"]
-    sti_card = create_metric_card(get_text("Sensor Trust Index (STI)", lang_code), f"{sti_score:.0f}", unit="/ 100",
-                                  delta_value=float(sti_score), custom_metric='STI', lang_code=lang_code)
-
-    # --- 4. Prediction Metrics Row ---
     level_change = next_day_level - water_level
-    prediction_delta_color = 'success' if level_change >= 0 else 'danger'
     risk_proba = results['Drought_Risk_Index']['Probability_Critical_Drop']
+    recharge_net_change = results['Estimated_Recharge']['30_Day_Net_Change']
+
+    card_values = {
+        'water_level': f"{water_level:.2f}",
+        'rainfall': f"{input_data['rainfall_mm']:.2f}",
+        'temperature': f"{input_data['avg_temp_c']:.1f}",
+        'pet': f"{input_data['pet_mm']:.2f}",
+        'forecast': f"{next_day_level:.2f}",
+        'risk': f"{risk_proba * 100:.1f}%",
+        'recharge': f"{recharge_net_change:.2f}",
+        'mtdi': f"{mtdi:.4f}",
+        'hcrs': f"{hcrs:.0f}",
+        'pconflict': f"{p_conflict:.4f}",
+        'sti': f"{sti_score:.0f}",
+    }
+
+    # --- 3. Metric Card Deltas (value, base color) ---
     risk_color = 'success'
     if risk_proba > 0.7:
         risk_color = 'danger'
     elif risk_proba > 0.4:
         risk_color = 'warning'
-    recharge_net_change = results['Estimated_Recharge']['30_Day_Net_Change']
-    recharge_color = 'success' if recharge_net_change >= 0 else 'danger'
-
-    prediction_children = [
-        dbc.Col(create_metric_card(get_text("24hr Level Forecast", lang_code), f"{next_day_level:.2f}",
-                                   unit=get_text("m", lang_code), delta_value=level_change,
-                                   delta_color_name=prediction_delta_color, icon_emoji="🔮", lang_code=lang_code), md=4),
-        dbc.Col(create_metric_card(get_text("Drought Risk Probability", lang_code), f"{risk_proba * 100:.1f}%", unit="",
-                                   delta_value=risk_proba, delta_color_name=risk_color, icon_emoji="⚠️",
-                                   lang_code=lang_code), md=4),
-        dbc.Col(create_metric_card(get_text("30-Day Net Recharge", lang_code), f"{recharge_net_change:.2f}",
-                                   unit=get_text("m", lang_code), delta_value=recharge_net_change,
-                                   delta_color_name=recharge_color, icon_emoji="📈", lang_code=lang_code), md=4),
-    ]
-
-    # --- 5. Detailed Report ---
+    card_deltas = {
+        'forecast': (level_change, 'success' if level_change >= 0 else 'danger'),
+        'risk': (risk_proba, risk_color),
+        'recharge': (recharge_net_change, 'success' if recharge_net_change >= 0 else 'danger'),
+        'mtdi': (mtdi, 'primary'),
+        'hcrs': (float(hcrs), 'primary'),
+        'pconflict': (p_conflict, 'primary'),
+        'sti': (float(sti_score), 'primary'),
+    }
+    delta_updates = [metric_card_delta(k, *card_deltas[k], lang_code=lang_code) for k in DELTA_CARD_KEYS]
+
+    # --- 4. Detailed Report ---
     anomaly_status = results['Anomaly_Check']['Is_Anomaly']
     anomaly_score = results['Anomaly_Check']['Score']
     anomaly_color = DANGER_COLOR if anomaly_status == 'TRUE' else SUCCESS_COLOR
 
     report_content = html.Div([
-        html.Div([html.Span(get_text("Data Feed Time:", lang_code), className="fw-bold me-2"),
+        html.Div([html.Span(tr(MSG_DATA_FEED_TIME, lang_code), className="fw-bold me-2"),
                   html.Span(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))], className="mb-2"),
-        html.Div([html.Span(get_text("Station:", lang_code), className="fw-bold me-2"),
+        html.Div([html.Span(tr(MSG_STATION, lang_code), className="fw-bold me-2"),
                   html.Span(f"{station_name_display} ({current_station_details['State']})")], className="mb-2"),
-        html.Div([html.Span(get_text("Type/Elevation:", lang_code), className="fw-bold me-2"),
+        html.Div([html.Span(tr(MSG_TYPE_ELEVATION, lang_code), className="fw-bold me-2"),
                   html.Span(f"{current_station_details['type']} / {input_data['elevation']}m")], className="mb-2"),
-        html.Div([html.Span(get_text("Anomaly Check:", lang_code), className="fw-bold me-2"),
+        html.Div([html.Span(tr(MSG_ANOMALY_CHECK, lang_code), className="fw-bold me-2"),
                   html.Span(f"{anomaly_status} (Score: {anomaly_score:.4f})",
                             style={'fontWeight': 'bold', 'color': anomaly_color, 'padding': '4px 8px',
                                    'borderRadius': '6px', 'backgroundColor': anomaly_color + '15'})], className="mb-2"),
-        html.Div([html.Span(get_text("Simulated Extraction Rate:", lang_code), className="fw-bold me-2"),
-                  html.Span(f"{results['Simulated_Extraction']['Rate']:.2f} {get_text('m/day', lang_code)}")],
+        html.Div([html.Span(tr(MSG_EXTRACTION_RATE, lang_code), className="fw-bold me-2"),
+                  html.Span(f"{results['Simulated_Extraction']['Rate']:.2f} {tr(MSG_M_PER_DAY, lang_code)}")],
                  className="mb-2"),
     ], style={'lineHeight': '1.6', 'fontSize': '0.95rem'})
 
     # Status Message
     if anomaly_status == 'TRUE':
-        status_message_text = get_text("CRITICAL ALERT: Anomaly Detected. Immediate action required for ", lang_code)
+        status_message_text = tr(MSG_STATUS_CRITICAL, lang_code)
         status_message_bg = DANGER_COLOR + '20'
         status_message_color = DANGER_COLOR
     else:
-        status_message_text = get_text("✅ System Operational: Data feed active and stable for ", lang_code)
+        status_message_text = tr(MSG_STATUS_OK, lang_code)
         status_message_bg = SUCCESS_COLOR + '20'
         status_message_color = SUCCESS_COLOR
 
@@ -1327,7 +1568,7 @@ def update_dashboard(n, selected_station_id, current_history, what_if_rainfall_i
         [
             html.Span(status_message_text),
             html.Span(f"{station_name_display}.", style={'fontWeight': 'bold', 'textDecoration': 'underline'}),
-            html.Span(f" {get_text('Last updated: ', lang_code)}{current_time}"),
+            html.Span(f" {tr(MSG_LAST_UPDATED, lang_code)}{current_time}"),
         ],
         style={
             'color': status_message_color, 'backgroundColor': status_message_bg,
@@ -1335,32 +1576,77 @@ def update_dashboard(n, selected_station_id, current_history, what_if_rainfall_i
         }
     )
 
-    # --- 6. Alert Log Update ---
-    new_alert_log = check_for_alerts(selected_station_id, station_name_display, results)
+    # --- 5. Alert Log Update (alerts were checked once by the producer) ---
+    latest_alert_id = stream_event['latest_alert_id']
 
     return (
-        status_message,
-        real_time_children,
-        prediction_children,
-        report_content,
-        new_history,
-        # *** CORRECTED RETURN: Cards are returned directly. ***
-        mtdi_card,
-        hcrs_card,
-        p_conflict_card,
-        sti_card,
-        # ******************************************************
-        new_alert_log
+        [status_message, report_content, new_history, latest_alert_id, new_session_key_out]
+        + [card_values[k] for k in METRIC_CARD_KEYS]
+        + [children for children, _ in delta_updates]
+        + [style_patch for _, style_patch in delta_updates]
     )
 
 
+# 2b. Metric card labels: translated once per language, sent only when the language changes
+@app.callback(
+    [Output(metric_card_id('title', k), 'children') for k in METRIC_CARD_KEYS]
+    + [Output(metric_card_id('unit', k), 'children') for k in METRIC_CARD_KEYS],
+    Input('language-store', 'data'),
+    prevent_initial_call=True
+)
+def update_metric_card_labels(lang_code):
+    titles, units = metric_card_labels(lang_code or 'en')
+    return list(titles) + list(units)
+
+
+# 2c. Station selector typeahead: search the whole fleet server-side, send only the top matches
+@app.callback(
+    Output('station-selector', 'options'),
+    Input('station-selector', 'search_value'),
+    State('station-selector', 'value'),
+    prevent_initial_call=True
+)
+def update_station_options(search_value, selected_station_id):
+    if search_value is None:
+        raise PreventUpdate
+    matches = get_station_search_index().search(search_value, limit=STATION_SEARCH_LIMIT)
+    options = [station_option(s, search_value) for s in matches]
+    # Keep the current selection resolvable so its label still renders
+    sensors_by_id = get_dashboard_fleet().by_id
+    if selected_station_id in sensors_by_id and all(o['value'] != selected_station_id for o in options):
+        options.append(station_option(sensors_by_id[selected_station_id]))
+    return options
+
+
 # 3. Callback to Update the Time-Series Chart
 @app.callback(
     Output('water-level-chart', 'figure'),
-    [Input('water-level-history', 'data')]
+    [Input('water-level-history', 'data'),
+     Input('history-range-selector', 'value')],
+    [State('station-selector', 'value')]
 )
-def update_graph_live(history_data):
-    """Creates the Plotly figure from the dcc.Store data with refined styling."""
+def update_graph_live(history_ref, history_range, selected_station_id):
+    """Creates the Plotly figure from the session history (live) or the time-series store (ranges)."""
+    import plotly.graph_objects as go
+
+    if history_range and history_range != 'live':
+        # Range query: only the partitions overlapping the window are read, at the tier that fits it
+        start, end = lookback_window(history_range)
+        ts, columns = TS_STORE.query(selected_station_id, start, end, columns=('water_level', 'next_day_level'),
+                                     max_points=CHART_MAX_POINTS)
+        history_data = {
+            'time': [datetime.fromtimestamp(t) for t in ts],
+            'current_level': columns['water_level'].round(2).tolist(),
+            'predicted_level': columns['next_day_level'].round(2).tolist(),
+        }
+    else:
+        points = SESSION_STORE.read(history_ref['session_key'], HISTORY_BUFFER) if history_ref else []
+        history_data = {
+            'time': [p['time'] for p in points],
+            'current_level': [p['current_level'] for p in points],
+            'predicted_level': [p['predicted_level'] for p in points],
+        }
+
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
@@ -1374,7 +1660,7 @@ def update_graph_live(history_data):
         line=dict(color=ACCENT_SECONDARY, width=2, dash='dash'), mode='lines', opacity=0.7
     ))
 
-    all_levels = history_data['current_level'] + history_data['predicted_level']
+    all_levels = [v for v in history_data['current_level'] + history_data['predicted_level'] if v == v]  # Drop NaN
     if all_levels:
         y_min = min(all_levels) - 0.5
         y_max = max(all_levels) + 0.5
@@ -1439,7 +1725,11 @@ def handle_map_click_and_filter_clear(clickData, n_clicks, lang_code):
      Input('selected-state-ut-store', 'data')]
 )
 def update_dwlr_map(selected_station_id, selected_state_ut):
-    df = pd.DataFrame(MOCK_DWLR_SENSORS)
+    import pandas as pd
+    import plotly.express as px  # Deferred: only chart callbacks need pandas/plotly.express
+    import plotly.graph_objects as go
+
+    df = pd.DataFrame(get_fleet_snapshot().stations)
     color_map = {
         'NORMAL': SUCCESS_COLOR,
         'LOW_ALERT': WARNING_COLOR,
@@ -1542,12 +1832,19 @@ def update_dwlr_map(selected_station_id, selected_state_ut):
 # 6. Comparative Analytics Callbacks
 @app.callback(
     Output('state-median-chart', 'figure'),
-    [Input('interval-component', 'n_intervals'),
-     Input('selected-state-ut-store', 'data')]
+    [Input('live-stream-store', 'data'),
+     Input('selected-state-ut-store', 'data'),
+     Input('main-tabs', 'active_tab')]
 )
-def update_state_median_chart(n, selected_state_ut):
+def update_state_median_chart(stream_event, selected_state_ut, active_tab):
     """Generates the State Median Water Level Comparison chart."""
-    df_all = pd.DataFrame(MOCK_DWLR_SENSORS)
+    # Only re-render on stream updates while the comparative tab is visible
+    if dash.callback_context.triggered_id == 'live-stream-store' and active_tab != 'tab-comparative-analytics':
+        raise PreventUpdate
+    import pandas as pd
+    import plotly.express as px
+
+    df_all = pd.DataFrame(get_fleet_snapshot().stations)
 
     # Group by State and calculate the median level
     median_levels = df_all.groupby('State')['level'].median().reset_index()
@@ -1610,29 +1907,42 @@ def update_state_median_chart(n, selected_state_ut):
 
 @app.callback(
     Output('pconflict-benchmark-chart', 'figure'),
-    [Input('interval-component', 'n_intervals'),
-     Input('station-selector', 'value')]
+    [Input('live-stream-store', 'data'),
+     Input('station-selector', 'value'),
+     Input('peer-mode-selector', 'value'),
+     Input('main-tabs', 'active_tab')]
 )
-def update_pconflict_benchmark_chart(n, selected_station_id):
+def update_pconflict_benchmark_chart(stream_event, selected_station_id, peer_mode, active_tab):
     """Generates the Peer Group Benchmarking box plot."""
-    df_all = pd.DataFrame(MOCK_DWLR_SENSORS)
-    selected_station = get_station_by_id(selected_station_id)
-
-    if not selected_station:
+    # Only re-render on stream updates while the comparative tab is visible
+    if dash.callback_context.triggered_id == 'live-stream-store' and active_tab != 'tab-comparative-analytics':
+        raise PreventUpdate
+    import plotly.graph_objects as go
+
+    snapshot = get_fleet_snapshot()
+    station_positions = get_dashboard_fleet().positions
+    if selected_station_id not in station_positions:
         return go.Figure()
-
-    selected_state = selected_station['State']
+    selected_station = snapshot.stations[station_positions[selected_station_id]]
     selected_score = selected_station['PConflict_Initial']
 
-    # Filter the peer group (stations in the same State/UT)
-    peer_group = df_all[df_all['State'] == selected_state]
+    # Peer group positions: same State/UT, or spatial neighbours (cached per station by the peer index)
+    peer_index, positions_by_state = get_peer_groups()
+    if peer_mode in ('knn', 'radius'):
+        peer_positions = peer_index.peers(selected_station_id, peer_mode)
+        peer_label = (f"{len(peer_positions) - 1} nearest stations" if peer_mode == 'knn'
+                      else f"{len(peer_positions) - 1} stations within {DEFAULT_RADIUS_KM:.0f} km")
+    else:
+        peer_positions = positions_by_state.get(selected_station['State'], ())
+        peer_label = selected_station['State']
+    peer_scores = [snapshot.stations[i]['PConflict_Initial'] for i in peer_positions]
 
     # Create the box plot for the peer group distribution
     fig = go.Figure()
 
     # Box Plot for the Peer Group
     fig.add_trace(go.Box(
-        y=peer_group['PConflict_Initial'],
+        y=peer_scores,
         name=get_text("P-Conflict Distribution for Peer Group", 'en'),
         marker_color=ACCENT_PRIMARY,
         boxpoints=False,  # Don't show individual points for cleaner look
@@ -1657,7 +1967,7 @@ def update_pconflict_benchmark_chart(n, selected_station_id):
     fig.update_layout(
         plot_bgcolor=CARD_BG, paper_bgcolor=CARD_BG,
         font=dict(color=TEXT_DARK),
-        title=f"Peer Group: {selected_state}",
+        title=f"Peer Group: {peer_label}",
         yaxis_title="P-Conflict Score (0.0 - 1.0)",
         xaxis_title=None,
         showlegend=True,
@@ -1669,60 +1979,93 @@ def update_pconflict_benchmark_chart(n, selected_station_id):
 
 
 # 7. Alert Log and Notification Callbacks
+# DataTable filter operators (word or symbol form) -> the alert store's FILTER_OPERATORS keys
+TABLE_FILTER_OPERATORS = {
+    'ge': 'ge', '>=': 'ge', 'le': 'le', '<=': 'le', 'lt': 'lt', '<': 'lt', 'gt': 'gt', '>': 'gt',
+    'ne': 'ne', '!=': 'ne', 'eq': 'eq', '=': 'eq', 'contains': 'contains', 'datestartswith': 'datestartswith',
+}
+TABLE_FILTER_TERM = re.compile(r'^\s*\{(?P<column>[^}]*)\}\s+(?P<operator>\S+)\s+(?P<value>.*?)\s*$', re.DOTALL)
+
+
+def parse_table_filter_query(filter_query):
+    """
+    Splits a DataTable filter_query ('{col} op value && ...') into (column, operator, value) tuples.
+    The operator is the token right after {col}; terms that don't parse are dropped.
+    """
+    filters = []
+    for filter_part in (filter_query or '').split(' && '):
+        match = TABLE_FILTER_TERM.match(filter_part)
+        if match is None or match['operator'] not in TABLE_FILTER_OPERATORS:
+            continue
+        value_part = match['value']
+        if len(value_part) >= 2 and value_part[0] == value_part[-1] and value_part[0] in ("'", '"', '`'):
+            value = value_part[1:-1].replace('\\' + value_part[0], value_part[0])
+        else:
+            try:
+                value = float(value_part)
+            except ValueError:
+                value = value_part
+        filters.append((match['column'], TABLE_FILTER_OPERATORS[match['operator']], value))
+    return filters
+
+
 @app.callback(
     [Output('alert-log-table', 'data'),
+     Output('alert-log-table', 'page_count'),
+     Output('alert-log-table', 'page_current'),
      Output('alert-badge', 'children'),
      Output('alert-bell', 'className'),
      Output('alert-action-buttons', 'hidden')],
     [Input('alert-log-store', 'data'),
      Input('alert-status-filter', 'value'),
      Input('acknowledge-button', 'n_clicks'),
-     Input('resolve-button', 'n_clicks')],
-    [State('alert-log-table', 'selected_rows'),
+     Input('resolve-button', 'n_clicks'),
+     Input('alert-log-table', 'page_current'),
+     Input('alert-log-table', 'sort_by'),
+     Input('alert-log-table', 'filter_query')],
+    [State('alert-log-table', 'selected_row_ids'),
      State('auth-status-store', 'data')],
     # FIX: Added prevent_initial_call=True as this is mainly triggered by Store/Clicks
     prevent_initial_call=True
 )
-def update_alert_log_table(alert_log_data, status_filter, ack_n, res_n, selected_rows_indices, auth_data):
+def update_alert_log_table(latest_alert_id, status_filter, ack_n, res_n, page_current, sort_by, filter_query,
+                           selected_alert_ids, auth_data):
     ctx = dash.callback_context
     triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    alert_engine = get_alert_engine()
 
-    # Use global ALERT_LOG for state manipulation
-    global ALERT_LOG
-
-    # 1. Handle Acknowledge/Resolve Clicks
-    if triggered_id in ['acknowledge-button', 'resolve-button'] and selected_rows_indices is not None and len(
-            selected_rows_indices) > 0 and auth_data['logged_in']:
+    # 1. Handle Acknowledge/Resolve Clicks (rows carry their alert id, so no index mapping is needed)
+    if triggered_id in ['acknowledge-button', 'resolve-button'] and selected_alert_ids and auth_data['logged_in']:
         action = 'ACKNOWLEDGED' if triggered_id == 'acknowledge-button' else 'RESOLVED'
-
-        # Filter the current ALERT_LOG data based on the status filter for matching
-        current_data = []
-        if status_filter != 'ALL':
-            current_data = [a for a in alert_log_data if a['status'] == status_filter]
-        else:
-            current_data = alert_log_data
-
-        # Get the IDs from the currently displayed table rows
-        selected_alert_ids = [current_data[i]['id'] for i in selected_rows_indices if i < len(current_data)]
-
-        # Update the global ALERT_LOG (deque)
-        new_alert_log = list(ALERT_LOG)  # Convert deque to list for modification
-        for alert in new_alert_log:
-            if alert['id'] in selected_alert_ids:
-                alert['status'] = action
-
-        ALERT_LOG.clear()
-        ALERT_LOG.extend(new_alert_log)  # Re-populate the deque
-        alert_log_data = new_alert_log  # Use the updated log for display filter
-
-    # 2. Apply Status Filter for Display
-    if status_filter == 'ALL' or triggered_id in ['acknowledge-button', 'resolve-button']:
-        filtered_log = list(ALERT_LOG)
-    else:
-        filtered_log = [a for a in ALERT_LOG if a['status'] == status_filter]
-
-    # 3. Calculate New Alert Count
-    new_alerts_count = sum(1 for a in ALERT_LOG if a['status'] == 'NEW')
+        alert_engine.set_status(selected_alert_ids, action)
+
+    # 2. Apply Status Filter, Column Filters, Sorting and Paging in the alert store (one page per request)
+    if triggered_id in ['acknowledge-button', 'resolve-button']:
+        status_filter = 'ALL'
+    if ctx.triggered[0]['prop_id'] in ['alert-status-filter.value', 'alert-log-table.sort_by',
+                                       'alert-log-table.filter_query']:
+        page_current = 0  # A re-filtered or re-sorted log starts on its first page
+    column_filters = parse_table_filter_query(filter_query)
+    sort_terms = [(s['column_id'], s['direction']) for s in (sort_by or [])]
+    try:
+        page_rows, total_rows = alert_engine.query_page(status=status_filter, filters=column_filters,
+                                                        sort_by=sort_terms, page=page_current or 0,
+                                                        page_size=ALERT_PAGE_SIZE)
+    except ValueError as e:
+        # A filter or sort on a column the store can't query: show the log without them
+        print(f"Ignoring alert log filter/sort: {e}")
+        column_filters = sort_terms = []
+        page_rows, total_rows = alert_engine.query_page(status=status_filter, page=page_current or 0,
+                                                        page_size=ALERT_PAGE_SIZE)
+    page_count = max(1, -(-total_rows // ALERT_PAGE_SIZE))
+    if (page_current or 0) >= page_count:
+        # New alerts or status changes shrank the result set under the open page: show its last page
+        page_current = page_count - 1
+        page_rows, _ = alert_engine.query_page(status=status_filter, filters=column_filters, sort_by=sort_terms,
+                                               page=page_current, page_size=ALERT_PAGE_SIZE)
+
+    # 3. New Alert Count (maintained counter, not a scan)
+    new_alerts_count = alert_engine.count('NEW')
 
     # 4. Set Bell Icon Class
     bell_class = 'position-relative'
@@ -1733,12 +2076,39 @@ def update_alert_log_table(alert_log_data, status_filter, ack_n, res_n, selected
     action_buttons_hidden = not auth_data['logged_in']
 
     # Update table data
-    return filtered_log, new_alerts_count, bell_class, action_buttons_hidden
+    return page_rows, page_count, page_current or 0, new_alerts_count, bell_class, action_buttons_hidden
+
+
+# 8. Live Stream: subscribe the browser to its station's SSE topic
+app.clientside_callback(
+    ClientsideFunction(namespace='stream', function_name='subscribe'),
+    Output('stream-subscription-store', 'data'),
+    Input('station-selector', 'value')
+)
+
+
+@server.route('/stream/<station_id>')
+def stream_station(station_id):
+    """Server-Sent Events endpoint: pushes each new reading/prediction/alert id for one station."""
+    if station_id not in get_dashboard_fleet().by_id:
+        abort(404)
+    FLEET_WORKER.start()
+    subscription = STREAM_BROADCASTER.subscribe(station_id)
+    return Response(stream_with_context(sse_stream(subscription)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@server.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format: fleet tick time and prediction/peer cache hit rates for this process."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 if __name__ == '__main__':
-    # Initial run to generate data and populate the store
+    # Initial cycle to generate data and populate the store
     # This ensures the dashboard doesn't start with an empty log/data
-    check_for_alerts(MOCK_DWLR_SENSORS[0]['id'], MOCK_DWLR_SENSORS[0]['Station_Name_Full'],
-                     generate_live_data(100.0, MOCK_DWLR_SENSORS[0]['id'], 0.0))
-    app.run(debug=True)
\ No newline at end of file
+    FLEET_WORKER.run_once()
+    FLEET_WORKER.start()
+    # SSE connections each hold a thread (see event_stream.py for production servers). The
+    # debugger and reloader are opt-in: DASH_DEBUG=1.
+    app.run(debug=DASH_DEBUG, threaded=True)
@@ -0,0 +1,105 @@
+import json
+import os
+import queue
+import threading
+import time
+
+# =================================================================================
+# --- SERVER-SENT EVENTS BROADCASTER ---
+# One producer publishes each update once per topic (e.g. a station id); every
+# subscribed browser connection gets it from its own bounded queue.
+#
+# Each open stream occupies a server thread (or greenlet) for as long as the browser stays
+# connected, so the dashboard must run under a threaded or gevent server, never gunicorn's
+# default sync workers, which would be exhausted by the first few viewers:
+#
+#   gunicorn dash_app:server --worker-class gthread --threads 100
+#   gunicorn dash_app:server --worker-class gevent --worker-connections 1000
+#
+# Idle streams get a keep-alive comment every HEARTBEAT_SECONDS; writing it to a dead
+# connection fails, which ends the generator and removes its queue from the Broadcaster.
+# Streams also end after STREAM_MAX_SECONDS (the browser's EventSource reconnects), so a
+# connection a proxy keeps half-open can't hold its thread indefinitely.
+# =================================================================================
+
+SUBSCRIBER_QUEUE_SIZE = 8  # A slow client drops its oldest pending events instead of growing memory
+HEARTBEAT_SECONDS = 15  # Comment line sent on idle connections so proxies keep them open
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "300"))  # 0 keeps streams open indefinitely
+
+
+class Subscription:
+    def __init__(self, broadcaster, topic):
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._broadcaster = broadcaster
+
+    def put(self, message):
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    """Thread-safe topic -> subscribers fan-out."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def topics(self):
+        """Topics that currently have at least one subscriber."""
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, topic, event, data):
+        """Serializes the payload once and hands it to every subscriber of the topic."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        if not subscribers:
+            return 0
+        message = sse_format(event, data)
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+
+def sse_format(event, data):
+    """Encodes one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def sse_stream(subscription, heartbeat_seconds=HEARTBEAT_SECONDS, max_seconds=STREAM_MAX_SECONDS):
+    """Generator for a streaming HTTP response; unsubscribes when the client disconnects or max_seconds pass."""
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    try:
+        yield "retry: 2000\n\n"
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                yield subscription.queue.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+    finally:
+        subscription.close()
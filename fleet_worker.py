@@ -0,0 +1,87 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from metrics import STAGE_SECONDS
+
+# =================================================================================
+# --- BACKGROUND FLEET WORKER ---
+# Advances the fleet and runs predictions once per cycle on a fixed cadence, then
+# publishes an immutable snapshot. Readers (Dash callbacks, the SSE stream) only
+# ever look at the latest snapshot, so they stay cheap and consistent across tabs.
+# =================================================================================
+
+
+class FleetSnapshot(NamedTuple):
+    seq: int
+    created_at: float
+    time_label: str
+    stations: tuple  # Read-only per-station records (MappingProxyType)
+    results: MappingProxyType  # station_id -> prediction results for the watched stations
+    latest_alert_id: int
+
+
+def freeze_records(records):
+    """Copies mutable station dicts into a tuple of read-only mappings."""
+    return tuple(MappingProxyType(dict(record)) for record in records)
+
+
+class FleetWorker:
+    """Runs step(seq) -> FleetSnapshot every interval_seconds in a daemon thread."""
+
+    def __init__(self, step, interval_seconds=1.0, name="fleet-worker"):
+        self.step = step
+        self.interval_seconds = interval_seconds
+        self.name = name
+        self._latest: Optional[FleetSnapshot] = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._published = threading.Condition()
+
+    @property
+    def latest(self):
+        """The most recent snapshot (None until the first cycle completes)."""
+        return self._latest
+
+    def start(self):
+        """Starts the worker once per process (safe to call repeatedly, e.g. after a gunicorn fork)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait_for_snapshot(self, after_seq=0, timeout=None):
+        """Blocks until a snapshot newer than after_seq is published; returns it (or None on timeout)."""
+        with self._published:
+            self._published.wait_for(lambda: self._latest is not None and self._latest.seq > after_seq, timeout)
+            return self._latest
+
+    def run_once(self):
+        """Runs a single cycle synchronously (used for the initial snapshot and by scripts)."""
+        seq = (self._latest.seq if self._latest else 0) + 1
+        with STAGE_SECONDS.time(stage="fleet_tick"):
+            snapshot = self.step(seq)
+        with self._published:
+            self._latest = snapshot
+            self._published.notify_all()
+        return snapshot
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"{self.name} cycle failed: {e}")
+            # Fixed cadence: skip missed ticks instead of running back-to-back to catch up
+            next_tick += self.interval_seconds
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + self.interval_seconds - ((now - next_tick) % self.interval_seconds)
+            self._stop.wait(next_tick - now)
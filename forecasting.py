@@ -0,0 +1,95 @@
+import numpy as np
+
+from inference import LSTM_FEATURES, WARMUP_BATCH_SIZES, compiled_forward
+
+# =================================================================================
+# --- MULTI-STEP LEVEL FORECAST ---
+# Rolls the LSTM forward autoregressively for many stations at once. All windows
+# live in one preallocated, already-scaled buffer of shape (N, SEQ_LENGTH + H, F):
+# step t reads the slice [t, t + SEQ_LENGTH) for every station in a single batched
+# model call and writes the next feature row at t + SEQ_LENGTH, so a horizon of H
+# days costs H model calls in total rather than N x H.
+#
+# Weather inputs are held at their last observed values (persistence) over the
+# horizon unless per-step exogenous arrays are passed in.
+# =================================================================================
+
+SEQ_LENGTH = 30  # Window length the LSTM was trained on (02_model_lstm_water_level.py)
+MAX_HORIZON_DAYS = 90
+
+_LEVEL = LSTM_FEATURES.index('Water_Level')
+_PREV = LSTM_FEATURES.index('Prev_Level')
+_EXOGENOUS = [LSTM_FEATURES.index(name) for name in ('Rainfall_7day', 'PET_mm', 'Avg_Temp_C')]
+
+
+def feature_rows(water_level, rainfall_mm, pet_mm, avg_temp_c, prev_level=None):
+    """Unscaled LSTM feature rows (..., F) from reading arrays; Prev_Level defaults to the level itself."""
+    water_level = np.asarray(water_level, dtype=np.float64)
+    rows = np.empty(water_level.shape + (len(LSTM_FEATURES),))
+    rows[..., _LEVEL] = water_level
+    rows[..., LSTM_FEATURES.index('Rainfall_7day')] = np.asarray(rainfall_mm) * 7
+    rows[..., LSTM_FEATURES.index('PET_mm')] = pet_mm
+    rows[..., LSTM_FEATURES.index('Avg_Temp_C')] = avg_temp_c
+    rows[..., _PREV] = water_level if prev_level is None else prev_level
+    return rows
+
+
+def initial_windows(current_rows, history=None):
+    """
+    Builds (N, SEQ_LENGTH, F) unscaled windows. history[i] is an optional (T, F) array of past
+    daily rows for station i (oldest first); missing days are padded with the oldest known row.
+    """
+    current_rows = np.asarray(current_rows, dtype=np.float64)
+    n = len(current_rows)
+    windows = np.repeat(current_rows[:, None, :], SEQ_LENGTH, axis=1)
+    if history is not None:
+        for i, rows in enumerate(history):
+            if rows is None or len(rows) == 0:
+                continue
+            rows = np.asarray(rows, dtype=np.float64)[-(SEQ_LENGTH - 1):]
+            start = SEQ_LENGTH - 1 - len(rows)
+            windows[i, start:SEQ_LENGTH - 1] = rows
+            windows[i, :start] = rows[0]
+    return windows
+
+
+def rollout(lstm, scaler, windows, horizon, exogenous=None):
+    """
+    Forecasts `horizon` daily levels for every window. windows is (N, SEQ_LENGTH, F) unscaled;
+    exogenous is an optional (N, horizon, 3) array of (Rainfall_7day, PET_mm, Avg_Temp_C).
+    Returns an (N, horizon) array of levels.
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    n = len(windows)
+    if n == 0 or horizon <= 0:
+        return np.empty((n, max(horizon, 0)))
+
+    # MinMaxScaler is affine per feature: scaled = x * scale_ + min_
+    scale = np.asarray(scaler.scale_, dtype=np.float32)
+    offset = np.asarray(scaler.min_, dtype=np.float32)
+
+    buffer = np.empty((n, SEQ_LENGTH + horizon, len(LSTM_FEATURES)), dtype=np.float32)
+    buffer[:, :SEQ_LENGTH] = windows * scale + offset
+    if exogenous is None:
+        buffer[:, SEQ_LENGTH:, _EXOGENOUS] = buffer[:, SEQ_LENGTH - 1:SEQ_LENGTH, _EXOGENOUS]
+    else:
+        buffer[:, SEQ_LENGTH:, _EXOGENOUS] = np.asarray(exogenous) * scale[_EXOGENOUS] + offset[_EXOGENOUS]
+
+    step = compiled_forward(lstm)
+    levels = np.empty((n, horizon), dtype=np.float64)
+    prev_level = windows[:, -1, _LEVEL]
+    for t in range(horizon):
+        level = np.asarray(step(buffer[:, t:t + SEQ_LENGTH]))[:, 0].astype(np.float64)
+        levels[:, t] = level
+        row = buffer[:, SEQ_LENGTH + t]
+        row[:, _LEVEL] = level * scale[_LEVEL] + offset[_LEVEL]
+        row[:, _PREV] = prev_level * scale[_PREV] + offset[_PREV]
+        prev_level = level
+    return levels
+
+
+def warm_up(lstm, scaler, batch_sizes=WARMUP_BATCH_SIZES):
+    """Traces the rollout step for full-length windows at each batch size."""
+    for size in batch_sizes:
+        rows = feature_rows(np.full(size, 15.0), np.full(size, 5.0), np.full(size, 3.5), np.full(size, 25.0))
+        rollout(lstm, scaler, initial_windows(rows), 2)
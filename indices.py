@@ -0,0 +1,76 @@
+import numpy as np
+
+# =================================================================================
+# --- CUSTOM GROUNDWATER INDICES ---
+# MTDI, HCRS, P-Conflict and STI as NumPy functions. Every argument may be a scalar or
+# an array of any shape (stations, time steps, or stations x time steps) and the usual
+# broadcasting applies, so the dashboard, the API and batch backfills share one
+# implementation. Random components are passed in rather than drawn here, which keeps
+# the functions deterministic; see draw_noise() for the distributions the simulation uses.
+# STI takes the anomaly_severity() of the Isolation Forest score.
+# =================================================================================
+
+# P-Conflict weights
+WEIGHT_LEVEL_DISPARITY = 0.4
+WEIGHT_RESILIENCE = 0.4
+
+BASELINE_LEVEL = 100.0  # MTDI measures disparity from this level (m)
+HCRS_FULL_LEVEL = 105.0  # HCRS is 0 at and above this level...
+HCRS_STEP = 0.1  # ...and rises one point per 0.1 m below it, capped at 100
+
+# Stations in the south-east (lat < 20, lon > 78) sit in denser, more contested basins
+DENSITY_BASE_DEFAULT = 0.05
+DENSITY_BASE_DENSE = 0.3
+
+
+def mtdi(water_level, trend_noise=0.0):
+    """Trend Disparity Index: scaled distance from the baseline level plus a trend component."""
+    return np.round(np.abs(np.asarray(water_level, dtype=np.float64) - BASELINE_LEVEL) * 0.1 + trend_noise, 4)
+
+
+def hcrs(water_level):
+    """Resilience Score (0-100): higher when the level sits further below HCRS_FULL_LEVEL."""
+    return np.clip(np.round((HCRS_FULL_LEVEL - np.asarray(water_level, dtype=np.float64)) / HCRS_STEP, 0), 0, 100)
+
+
+def density_base(lat, lon):
+    """Population-pressure base term of P-Conflict for each station location."""
+    dense = (np.asarray(lat) < 20) & (np.asarray(lon) > 78)
+    return np.where(dense, DENSITY_BASE_DENSE, DENSITY_BASE_DEFAULT)
+
+
+def p_conflict(mtdi_values, hcrs_values, density):
+    """Predicted Conflict Score, capped at 1.0. `density` is density_base() plus any noise."""
+    score = (np.asarray(mtdi_values, dtype=np.float64) * WEIGHT_LEVEL_DISPARITY
+             + (100 - np.asarray(hcrs_values, dtype=np.float64)) / 100 * WEIGHT_RESILIENCE
+             + density)
+    return np.round(np.minimum(1.0, score), 4)
+
+
+def anomaly_severity(decision_score):
+    """Maps Isolation Forest decision_function scores onto the dashboard's 0-1 "higher is worse" scale."""
+    return np.round(np.clip(0.5 - np.asarray(decision_score, dtype=np.float64), 0.0, 1.0), 4)
+
+
+def sti(anomaly_score, data_gap_factor=0.0):
+    """Sensor Trust Index (0-100): penalizes anomaly scores and data gaps."""
+    score = 100.0 - np.asarray(anomaly_score, dtype=np.float64) * 500 - np.asarray(data_gap_factor) * 10
+    return np.clip(np.round(score, 0), 0, 100)
+
+
+def compute_indices(water_level, lat, lon, anomaly_score, trend_noise=0.0, density_noise=0.0,
+                    data_gap_factor=0.0):
+    """All four indices in one pass. Returns a dict of arrays broadcast to a common shape."""
+    mtdi_values = mtdi(water_level, trend_noise)
+    hcrs_values = hcrs(water_level)
+    return {
+        'MTDI': mtdi_values,
+        'HCRS': hcrs_values,
+        'PConflict': p_conflict(mtdi_values, hcrs_values, density_base(lat, lon) + density_noise),
+        'STI': sti(anomaly_score, data_gap_factor),
+    }
+
+
+def draw_noise(rng, shape):
+    """Random components used by the live simulation: (trend_noise, density_noise, data_gap_factor)."""
+    return rng.uniform(0.05, 0.2, shape), rng.uniform(0.0, 0.1, shape), rng.uniform(0.0, 0.1, shape)
@@ -0,0 +1,218 @@
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from metrics import STAGE_SECONDS
+from precision import INFERENCE_PRECISION, QuantizedLSTM, cast_frame, feature_dtype
+
+# =================================================================================
+# --- SHARED INFERENCE PIPELINE ---
+# Feature construction and the five-model run, vectorized over any number of rows
+# (stations or time steps). Used by the single-station and batch API endpoints
+# (through serving.run_models_async) and by the backfill.
+# =================================================================================
+
+# Request field names -> column names used when the models were trained
+INPUT_RENAMES = {
+    'water_level': 'Water_Level',
+    'rainfall_mm': 'Rainfall_mm',
+    'avg_temp_c': 'Avg_Temp_C',
+    'pet_mm': 'PET_mm',
+    'lat': 'Lat',
+    'lon': 'Lon',
+    'elevation': 'Elevation'
+}
+LSTM_FEATURES = ['Water_Level', 'Rainfall_7day', 'PET_mm', 'Avg_Temp_C', 'Prev_Level']
+RISK_FEATURES = ['Water_Level', 'Rainfall_30days', 'PET_30days']
+ANOMALY_THRESHOLD = -0.1  # Isolation Forest decision_function below this is an anomaly
+LSTM_BATCH_SIZE = 4096  # Largest batch sent through the LSTM in one call; bigger inputs are chunked
+WARMUP_BATCH_SIZES = (1, 8, 64, 512, LSTM_BATCH_SIZE)  # Representative request sizes run at startup
+# Decimal places each run_models() output is served with
+OUTPUT_DECIMALS = {'anomaly_score': 4, 'next_day_level': 2, 'recharge_30d': 2, 'extraction_rate': 2,
+                   'risk_proba': 2}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_FILES = {
+    "lstm": "lstm_water_level_predictor.keras",
+    "xgb": "xgb_recharge_estimator.pkl",
+    "logreg": "logistic_risk_index.pkl",
+    "rf": "rf_water_budget.pkl",
+    "iforest": "if_anomaly_detector.pkl",
+    "lstm_scaler": "lstm_scaler.pkl",
+    "risk_scaler": "risk_scaler.pkl",
+    "ohe": "ohe_encoder.pkl",
+}
+
+
+def load_models(model_dir=BASE_DIR, names=None):
+    """Loads the five models, both scalers and the encoder (or just `names`) into a dict keyed like MODEL_FILES."""
+    import joblib
+
+    models = {}
+    for name in names or MODEL_FILES:
+        path = os.path.join(model_dir, MODEL_FILES[name])
+        if path.endswith(".keras"):
+            from tensorflow.keras.models import load_model  # Only paid for when the LSTM is wanted
+            models[name] = load_model(path)
+        else:
+            models[name] = joblib.load(path)
+    return models
+
+
+_forward_functions = weakref.WeakKeyDictionary()  # Entries go away with their model (e.g. after a reload)
+
+
+def compiled_forward(model):
+    """
+    The model's forward pass as a cached tf.function. Keras' predict() rebuilds its input
+    pipeline on every call (~100 ms even for one row); this runs in a few ms once traced.
+    With reduce_retracing the trace turns shape-generic after a couple of batch sizes, so
+    the warm-up covers sizes it never saw. A QuantizedLSTM is plain numpy and is returned as is.
+    """
+    if isinstance(model, QuantizedLSTM):
+        return model
+    fn = _forward_functions.get(model)
+    if fn is None:
+        import tensorflow as tf
+
+        model_ref = weakref.ref(model)  # A strong reference here would keep the model alive forever
+        fn = tf.function(lambda x: model_ref()(x, training=False), reduce_retracing=True)
+        _forward_functions[model] = fn
+    return fn
+
+
+def lstm_forward(model, x):
+    """First output of the model for every row of x, in chunks of at most LSTM_BATCH_SIZE rows."""
+    forward = compiled_forward(model)
+    x = np.asarray(x, dtype=np.float32)
+    chunks = [np.asarray(forward(x[i:i + LSTM_BATCH_SIZE]))[:, 0] for i in range(0, len(x), LSTM_BATCH_SIZE)]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32)
+
+
+@STAGE_SECONDS.time(stage='features')
+def build_feature_frame(rows, ohe, dtype=feature_dtype(INFERENCE_PRECISION)):
+    """Builds the model input frame from combined static + real-time dicts (one per row), floats as dtype."""
+    input_df = pd.DataFrame(rows).rename(columns=INPUT_RENAMES)
+
+    # One-Hot Encoding for categorical features (Soil, LULC)
+    ohe_input_df = input_df[['soil_type', 'lulc']].rename(columns={'soil_type': 'Soil_Type', 'lulc': 'LULC'})
+    ohe_features = ohe.transform(ohe_input_df)
+    ohe_df = pd.DataFrame(ohe_features, columns=ohe.get_feature_names_out(['Soil_Type', 'LULC']))
+    input_df = pd.concat([input_df.reset_index(drop=True), ohe_df], axis=1)
+
+    # Add placeholder/historical and derived features
+    input_df['Prev_Level'] = input_df['Water_Level']
+    input_df['Rainfall_7day'] = input_df['Rainfall_mm'] * 7
+    input_df['Rainfall_30days'] = input_df['Rainfall_mm'] * 30
+    input_df['PET_30days'] = input_df['PET_mm'] * 30
+    return cast_frame(input_df, dtype)
+
+
+@STAGE_SECONDS.time(stage='xgb')
+def predict_recharge(models, input_df):
+    """XGBoost 30-day net recharge for every row."""
+    xgb_cols = [c for c in models["xgb"].feature_names_in_ if c in input_df.columns]
+    return models["xgb"].predict(input_df[xgb_cols])
+
+
+@STAGE_SECONDS.time(stage='rf')
+def predict_extraction(models, input_df):
+    """Random Forest simulated extraction rate for every row."""
+    rf_cols = [c for c in models["rf"].feature_names_in_ if c in input_df.columns]
+    return models["rf"].predict(input_df[rf_cols])
+
+
+@STAGE_SECONDS.time(stage='logreg')
+def predict_risk(models, input_df, estimated_recharge):
+    """Logistic Regression probability of a critical drop; takes the recharge estimate as a feature."""
+    risk_features = input_df[RISK_FEATURES].copy()
+    risk_features['Target_Recharge'] = estimated_recharge
+    risk_input = models["risk_scaler"].transform(risk_features.values)
+    return models["logreg"].predict_proba(risk_input)[:, 1]
+
+
+@STAGE_SECONDS.time(stage='iforest')
+def predict_anomaly(models, input_df):
+    """Isolation Forest decision_function score for every row (lower is more anomalous)."""
+    if_features = input_df[['Water_Level', 'Water_Level', 'Rainfall_mm']]
+    if_features.columns = ['Water_Level', 'Level_Change_Rate', 'Rainfall_mm']
+    return models["iforest"].decision_function(if_features)
+
+
+@STAGE_SECONDS.time(stage='lstm')
+def predict_next_level(models, input_df):
+    """LSTM next-day water level for every row."""
+    lstm_features = input_df[LSTM_FEATURES].values
+    lstm_scaled = models["lstm_scaler"].transform(lstm_features).reshape(len(input_df), 1, len(LSTM_FEATURES))
+    return lstm_forward(models["lstm"], lstm_scaled)
+
+
+def pack_outputs(anomaly_score, next_day_level, recharge_30d, extraction_rate, risk_proba):
+    """The five model outputs as the dict of float64 arrays returned by run_models()."""
+    return {
+        'anomaly_score': np.asarray(anomaly_score, dtype=np.float64),
+        'next_day_level': np.asarray(next_day_level, dtype=np.float64),
+        'recharge_30d': np.asarray(recharge_30d, dtype=np.float64),
+        'extraction_rate': np.asarray(extraction_rate, dtype=np.float64),
+        'risk_proba': np.asarray(risk_proba, dtype=np.float64),
+    }
+
+
+def run_models(models, input_df):
+    """Runs all five models on every row in one call each. Returns a dict of 1-D arrays."""
+    # 1. Anomaly Detection (Isolation Forest)
+    anomaly_score = predict_anomaly(models, input_df)
+
+    # 2. LSTM Water Fluctuation (Next Day Level)
+    next_day_level = predict_next_level(models, input_df)
+
+    # 3. XGBoost Recharge Estimation (30-day net change)
+    estimated_recharge = predict_recharge(models, input_df)
+
+    # 4. Random Forest Water Budget (Simulated Extraction)
+    simulated_extraction = predict_extraction(models, input_df)
+
+    # 5. Logistic Regression Risk Index
+    risk_proba = predict_risk(models, input_df, estimated_recharge)
+
+    return pack_outputs(anomaly_score, next_day_level, estimated_recharge, simulated_extraction, risk_proba)
+
+
+def warm_up(models, batch_sizes=WARMUP_BATCH_SIZES):
+    """
+    Runs every model on dummy batches of each size (twice, so the second pass is already
+    steady state) so the first real request doesn't pay for tracing or lazy initialization.
+    """
+    categories = models["ohe"].categories_
+    dummy = {'lat': 23.0, 'lon': 77.0, 'elevation': 300.0, 'soil_type': categories[0][0], 'lulc': categories[1][0],
+             'water_level': 15.0, 'rainfall_mm': 5.0, 'avg_temp_c': 25.0, 'pet_mm': 3.5}
+    for size in batch_sizes:
+        input_df = build_feature_frame([dummy] * size, models["ohe"])
+        for _ in range(2):
+            run_models(models, input_df)
+
+
+def round_outputs(outputs):
+    """run_models() output rounded as served (one vectorized pass per column), plus the anomaly flag."""
+    rounded = {name: np.round(outputs[name], decimals) for name, decimals in OUTPUT_DECIMALS.items()}
+    rounded['is_anomaly'] = outputs['anomaly_score'] < ANOMALY_THRESHOLD  # On the unrounded score
+    return rounded
+
+
+def format_results(outputs):
+    """Every row of run_models() output in the /predict_all response structure, as a list."""
+    rounded = {name: values.tolist() for name, values in round_outputs(outputs).items()}
+    return [
+        {
+            "Anomaly_Check": {"Is_Anomaly": "Yes" if is_anomaly else "No", "Score": score},
+            "Water_Level_Prediction": {"Next_Day_Level": level},
+            "Estimated_Recharge": {"30_Day_Net_Change": recharge},
+            "Simulated_Extraction": {"Rate": extraction},
+            "Drought_Risk_Index": {"Probability_Critical_Drop": risk},
+        }
+        for is_anomaly, score, level, recharge, extraction, risk in zip(
+            rounded['is_anomaly'], rounded['anomaly_score'], rounded['next_day_level'], rounded['recharge_30d'],
+            rounded['extraction_rate'], rounded['risk_proba'])
+    ]
@@ -1,40 +1,82 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-import joblib
+from typing import List, Literal, NamedTuple, Optional
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras.models import load_model
-import pandas as pd
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import os
+import threading
 import time
 import math
 
-# --- 1. Define Static Station Configuration (Simulating a Database) ---
-# This data would typically come from a persistent database lookup.
-STATION_CONFIG = {
-    "Station_001_AgriLoam": {
-        "lat": 23.0, "lon": 77.0, "elevation": 300.0,
-        "soil_type": "Loam", "lulc": "Agri"
-    },
-    "Station_002_ForestSand": {
-        "lat": 25.5, "lon": 78.5, "elevation": 450.0,
-        "soil_type": "Sand", "lulc": "Forest"
-    },
-    "Station_003_UrbanClay": {
-        "lat": 28.0, "lon": 77.2, "elevation": 250.0,
-        "soil_type": "Clay", "lulc": "Urban"
-    }
-}
+import forecasting
+import metrics
+from forecasting import MAX_HORIZON_DAYS, SEQ_LENGTH, feature_rows, initial_windows, rollout
+from inference import build_feature_frame, format_results, pack_outputs, round_outputs, warm_up
+from model_registry import BUILTIN_VERSION, ModelBundle, ModelRegistry
+from precision import INFERENCE_PRECISION, apply_precision
+import serialization
+from scenario_engine import DEFAULT_MEMBERS, DEFAULT_PET_CV, DEFAULT_RAINFALL_CV, Scenario, ScenarioEngine
+from serving import AdmissionControl, ModelExecutors, configure_tensorflow, run_models_async, tune_models
+from station_registry import StationRegistry, seed_registry
+from timeseries_store import BackgroundWriter, TimeSeriesStore
+
+# --- 1. Station Registry ---
+# Stations (ids, positions and site attributes) come from the SQLite registry shared with
+# the dashboard, so fleet stations can be predicted too. Lookups are cached in memory and
+# follow edits to the database within REGISTRY_CHECK_SECONDS (see station_registry.py).
+STATION_REGISTRY = StationRegistry()
+
+
+# Persistent history of every reading and prediction served by the API. Predictions are
+# written by a background thread, so large batches don't spend their request on file appends.
+TS_STORE = TimeSeriesStore()
+TS_WRITER = BackgroundWriter(TS_STORE)
 
 
 # --- 2. Define the Input Data Structure (Pydantic Model) ---
 class StationInput(BaseModel):
     station_id: str = Field(..., description="Unique identifier for the monitoring station.")
+    include_inputs: bool = Field(True, description="Echo the station's readings back as Real_Time_Input.")
+
+
+class StationBatchInput(BaseModel):
+    station_ids: List[str] = Field(..., max_length=5000, description="Station ids to predict in one batch.")
+    include_inputs: bool = Field(True, description="Echo each station's readings back with its results.")
+    layout: Literal["records", "columnar"] = Field(
+        "records", description="'records': one nested result per station; 'columnar': one array per output "
+                               "field, aligned with results.station_ids (much smaller for large batches).")
+
+
+class ForecastInput(BaseModel):
+    station_ids: List[str] = Field(..., max_length=5000, description="Station ids to forecast in one batch.")
+    horizon_days: int = Field(30, ge=1, le=MAX_HORIZON_DAYS, description="Days to forecast ahead.")
+
+
+class ScenarioSpec(BaseModel):
+    name: str = Field("baseline", description="Label for this scenario in the response.")
+    rainfall_delta_mm: float = Field(0.0, description="Added to today's daily rainfall (after scaling).")
+    rainfall_scale: float = Field(1.0, ge=0.0, description="Multiplier on today's daily rainfall.")
+    pet_delta_mm: float = Field(0.0, description="Added to today's daily PET.")
+    rainfall_cv: float = Field(DEFAULT_RAINFALL_CV, ge=0.0, le=5.0, description="Ensemble spread of rainfall.")
+    pet_cv: float = Field(DEFAULT_PET_CV, ge=0.0, le=1.0, description="Ensemble spread of PET.")
+    members: int = Field(DEFAULT_MEMBERS, ge=1, le=100000, description="Monte Carlo ensemble size.")
+
+
+class ScenarioInput(BaseModel):
+    station_id: str = Field(..., description="Unique identifier for the monitoring station.")
+    scenarios: List[ScenarioSpec] = Field(default_factory=lambda: [ScenarioSpec()], min_length=1, max_length=16)
+    seed: Optional[int] = Field(None, description="Fixes the ensemble draws for reproducible results.")
+
+
+class ModelReloadInput(BaseModel):
+    version: Optional[str] = Field(None, description="Version to load; defaults to the registry's active one.")
 
 
 # --- 3. Mock Function to Simulate Real-Time DWLR and Official Weather Data ---
-def get_real_time_data(station_id, lat, lon):
+def get_real_time_data(station):
     """
     Simulates real-time data fetch from DWLR Cloud and Official Weather API.
     Uses current time to ensure values change on every API call (for 'real-time' demo).
@@ -58,7 +100,7 @@ def get_real_time_data(station_id, lat, lon):
     pet_mm = 3.5 + 1.5 * math.sin(current_time_hr / 10)
 
     # Add minor station-specific bias
-    bias = STATION_CONFIG[station_id]['elevation'] / 1000.0
+    bias = station.elevation / 1000.0
     water_level -= bias * 0.5
 
     return {
@@ -69,34 +111,129 @@ def get_real_time_data(station_id, lat, lon):
     }
 
 
-# --- 4. Application Lifespan & Model Loading (Unchanged) ---
+# --- 4. Application Lifespan, Model Loading & Hot Reload ---
+# The API serves one Deployment at a time: a loaded model bundle and the scenario engine
+# bound to it. A reload loads and warms the new bundle in a background thread and then
+# replaces DEPLOYMENT in a single assignment. Each request reads DEPLOYMENT once, so
+# requests already running finish on the bundle they started with.
+#
+# The first bundle is loaded the same way, so the server accepts connections right away
+# and /ready reports 503 until every model has been warmed up at each batch size in
+# WARMUP_BATCH_SIZES; a load balancer only routes traffic to warm workers.
 
-models = {}
+MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", "30"))  # 0 disables; each worker polls ACTIVE
 
+MODEL_REGISTRY = ModelRegistry()
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-    def get_model_path(filename):
-        return os.path.join(BASE_DIR, filename)
+class Deployment(NamedTuple):
+    bundle: ModelBundle
+    scenario_engine: ScenarioEngine
+    loaded_at: str
+    warmup_seconds: float
 
-    try:
-        models["lstm"] = load_model(get_model_path("lstm_water_level_predictor.keras"))
-        models["xgb"] = joblib.load(get_model_path("xgb_recharge_estimator.pkl"))
-        models["logreg"] = joblib.load(get_model_path("logistic_risk_index.pkl"))
-        models["rf"] = joblib.load(get_model_path("rf_water_budget.pkl"))
-        models["iforest"] = joblib.load(get_model_path("if_anomaly_detector.pkl"))
-        models["lstm_scaler"] = joblib.load(get_model_path("lstm_scaler.pkl"))
-        models["risk_scaler"] = joblib.load(get_model_path("risk_scaler.pkl"))
-        models["ohe"] = joblib.load(get_model_path("ohe_encoder.pkl"))
+    @property
+    def models(self):
+        return self.bundle.models
 
-        print("All models and scalers loaded successfully.")
+
+DEPLOYMENT = None
+RELOAD_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-reload")
+RELOAD_LOCK = threading.Lock()
+RELOAD_STATUS = {"state": "idle", "version": None, "error": None}
+
+
+def current_deployment():
+    deployment = DEPLOYMENT
+    if deployment is None:
+        raise HTTPException(status_code=503, detail="Models are not loaded.")
+    return deployment
+
+
+def load_deployment(version=None):
+    """Loads, verifies and warms up a bundle (default: the registry's active version)."""
+    bundle = MODEL_REGISTRY.load(version)
+    apply_precision(bundle.models)  # INFERENCE_PRECISION; a no-op at the default float64
+    tune_models(bundle.models)
+    started = time.perf_counter()
+    with metrics.suppressed():
+        warm_up(bundle.models)
+        forecasting.warm_up(bundle.models["lstm"], bundle.models["lstm_scaler"])
+    warmup_seconds = round(time.perf_counter() - started, 2)
+    engine = ScenarioEngine(bundle.models, model_dir=bundle.path)
+    return Deployment(bundle, engine, datetime.now(timezone.utc).isoformat(timespec='seconds'), warmup_seconds)
+
+
+def activate_deployment(deployment):
+    global DEPLOYMENT
+    previous, DEPLOYMENT = DEPLOYMENT, deployment
+    if previous is not None:
+        previous.scenario_engine.close(cancel_futures=False)  # Lets ensembles already running finish
+    metrics.MODEL_INFO.clear()
+    metrics.MODEL_INFO.set(1, version=deployment.bundle.version)
+    metrics.MODEL_WARMUP_SECONDS.set(deployment.warmup_seconds)
+    print(f"Serving model version {deployment.bundle.version} (warm-up {deployment.warmup_seconds}s).")
+
+
+def reload_models(version):
+    try:
+        activate_deployment(load_deployment(version))
+        RELOAD_STATUS.update(state="idle", error=None)
+        metrics.MODEL_RELOADS.inc(result="success")
     except Exception as e:
-        print(f"Error loading models: {e}")
-        raise HTTPException(status_code=500, detail="Model loading failed.")
+        print(f"Model reload to {version} failed: {e}")
+        metrics.MODEL_RELOADS.inc(result="failure")
+        RELOAD_STATUS.update(state="failed", error=str(e))
+
+
+def initial_load(version):
+    """Startup load; falls back to the builtin artifacts if the active bundle cannot be loaded."""
+    reload_models(version)
+    if DEPLOYMENT is None and version != BUILTIN_VERSION:
+        print(f"Falling back to model version {BUILTIN_VERSION}.")
+        RELOAD_STATUS.update(state="loading", version=BUILTIN_VERSION)
+        reload_models(BUILTIN_VERSION)
+    if DEPLOYMENT is not None:
+        print("All models and scalers loaded successfully.")
+
+
+def start_reload(version, target=reload_models):
+    """Starts a background reload unless one is running. Returns False if one already is."""
+    with RELOAD_LOCK:
+        if RELOAD_STATUS["state"] == "loading":
+            return False
+        RELOAD_STATUS.update(state="loading", version=version, error=None)
+    RELOAD_EXECUTOR.submit(target, version)
+    return True
+
+
+def poll_active_version(stop):
+    """Reloads when ACTIVE changes, so every worker process follows a publish or rollback."""
+    while not stop.wait(MODEL_POLL_SECONDS):
+        try:
+            version = MODEL_REGISTRY.active_version()
+        except OSError as e:
+            print(f"Could not read the active model version: {e}")
+            continue
+        failed = RELOAD_STATUS["state"] == "failed" and RELOAD_STATUS["version"] == version
+        if DEPLOYMENT is not None and version != DEPLOYMENT.bundle.version and not failed:
+            start_reload(version)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    seed_registry(STATION_REGISTRY)  # Existing rows are kept; only stations not yet registered are added
+    configure_tensorflow()  # Before the first model load initializes TF
+    start_reload(MODEL_REGISTRY.active_version(), target=initial_load)
+
+    stop_polling = threading.Event()
+    if MODEL_POLL_SECONDS > 0:
+        threading.Thread(target=poll_active_version, args=(stop_polling,), name="model-poll", daemon=True).start()
     yield
-    models.clear()
+    stop_polling.set()
+    if DEPLOYMENT is not None:
+        DEPLOYMENT.scenario_engine.close()
+    TS_WRITER.close()  # Writes the predictions still queued
 
 
 app = FastAPI(
@@ -107,89 +244,304 @@ app = FastAPI(
 )
 
 
-# --- 5. Prediction Endpoint (Updated for Station ID) ---
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency and status counts per route template (e.g. /predict_batch), not per raw URL."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+        metrics.REQUESTS.inc(method=request.method, endpoint=endpoint, status=status)
+
+
+# --- 5. Prediction Endpoints (Single Station and Batch) ---
+# The endpoints are async: every model call and any other CPU-bound step runs on the
+# executor for its model family (see serving.py), and each request holds an admission
+# slot while it does, so overload turns into quick 503s rather than a growing queue.
+# Responses are encoded by serialization.py (orjson, or MessagePack on request).
+
+EXECUTORS = ModelExecutors()
+ADMISSION = AdmissionControl()
+
+READING_FIELDS = ('water_level', 'rainfall_mm', 'avg_temp_c', 'pet_mm')
+INPUT_FIELDS = ('lat', 'lon', 'elevation', 'soil_type', 'lulc', *READING_FIELDS)  # Keys of a combined row
+
+
+def record_predictions(station_ids, combined_rows, outputs):
+    """Queues each station's reading and model outputs for the time-series store (written off the request)."""
+    readings = {field: [row[field] for row in combined_rows] for field in READING_FIELDS}
+    TS_WRITER.submit(station_ids, {
+        **readings,
+        'next_day_level': outputs['next_day_level'],
+        'risk_proba': outputs['risk_proba'],
+        'recharge_30d': outputs['recharge_30d'],
+        'extraction_rate': outputs['extraction_rate'],
+        'anomaly_score': outputs['anomaly_score'],
+    })
+
+
+def resolve_stations(station_ids):
+    """(known Stations, unknown ids) for a de-duplicated list of ids, both in request order."""
+    found = STATION_REGISTRY.get_many(station_ids)
+    return [found[sid] for sid in station_ids if sid in found], [sid for sid in station_ids if sid not in found]
+
+
+def station_inputs(stations, ohe):
+    """The combined static + real-time row of each station, and the model input frame built from them."""
+    combined_rows = [{**station.model_inputs(), **get_real_time_data(station)} for station in stations]
+    return combined_rows, build_feature_frame(combined_rows, ohe)
+
+
+@metrics.STAGE_SECONDS.time(stage="response")  # Formatting plus queueing the time-series store writes
+def station_results(station_ids, combined_rows, outputs, layout="records", include_inputs=True):
+    """Per-station result dicts ("records"), or one array per output across stations ("columnar")."""
+    record_predictions(station_ids, combined_rows, outputs)
+
+    if layout == "columnar":
+        results = {"station_ids": station_ids, **round_outputs(outputs)}
+        if include_inputs:
+            results["inputs"] = {field: [row[field] for row in combined_rows] for field in INPUT_FIELDS}
+        return results
+
+    results = dict(zip(station_ids, format_results(outputs)))
+    if include_inputs:
+        # Add real-time input data to the response for display in the dashboard
+        for station_id, row in zip(station_ids, combined_rows):
+            results[station_id]["Real_Time_Input"] = row
+    return results
+
+
+async def predict_stations(stations, models, layout="records", include_inputs=True):
+    """Fetches readings for and predicts a list of registry stations in one vectorized pass."""
+    metrics.BATCH_ROWS.observe(len(stations), endpoint="predict")
+    combined_rows, input_df = await EXECUTORS.run("general", station_inputs, stations, models["ohe"])
+    outputs = await run_models_async(EXECUTORS, models, input_df)
+    station_ids = [station.station_id for station in stations]
+    return await EXECUTORS.run("general", station_results, station_ids, combined_rows, outputs, layout,
+                               include_inputs)
+
 
 @app.post("/predict_all")
-def predict_all(data: StationInput):
-    # 1. Lookup Static Configuration
+async def predict_all(data: StationInput, request: Request):
     station_id = data.station_id
-    if station_id not in STATION_CONFIG:
+    station = STATION_REGISTRY.get(station_id)
+    if station is None:
         raise HTTPException(status_code=404, detail=f"Station ID '{station_id}' not found.")
+    response_cls = serialization.response_class(request)
 
-    static_data = STATION_CONFIG[station_id]
+    async with ADMISSION.slot("/predict_all"):
+        results = await predict_stations([station], current_deployment().models,
+                                         include_inputs=data.include_inputs)
+    return serialization.render(response_cls, results[station_id])
 
-    # 2. Fetch Dynamic Real-Time Data (Simulating DWLR/Weather API calls)
-    real_time_data = get_real_time_data(station_id, static_data['lat'], static_data['lon'])
 
-    # 3. Combine Static and Dynamic Data into a single dictionary
-    combined_data = {**static_data, **real_time_data}
+@app.post("/predict_batch")
+async def predict_batch(data: StationBatchInput, request: Request):
+    """
+    Runs all five models for many stations in one request (one model call per model).
+    Send Accept: application/msgpack for a MessagePack body (needs msgpack on the server).
+    """
+    station_ids = list(dict.fromkeys(data.station_ids))  # De-duplicate, keep order
+    response_cls = serialization.response_class(request)
+    stations, missing_ids = await EXECUTORS.run("general", resolve_stations, station_ids)
 
-    # 4. Create DataFrame and Proceed with Preprocessing (Identical to previous successful logic)
-    input_df = pd.DataFrame([combined_data])
+    if stations:
+        async with ADMISSION.slot("/predict_batch"):
+            results = await predict_stations(stations, current_deployment().models, data.layout,
+                                             data.include_inputs)
+    else:
+        # Same shape as a non-empty batch (every output array present, just empty)
+        empty = np.empty(0)
+        results = station_results([], [], pack_outputs(empty, empty, empty, empty, empty), data.layout,
+                                  data.include_inputs)
+    content = {"layout": data.layout, "results": results, "missing": missing_ids}
+    return await EXECUTORS.run("general", serialization.render, response_cls, content)
 
-    # CRITICAL RENAME: Rename inputs to match the CAPITALIZATION expected by models
-    input_df.rename(columns={
-        'water_level': 'Water_Level',
-        'rainfall_mm': 'Rainfall_mm',
-        'avg_temp_c': 'Avg_Temp_C',
-        'pet_mm': 'PET_mm',
-        'lat': 'Lat',
-        'lon': 'Lon',
-        'elevation': 'Elevation'
-    }, inplace=True)
 
-    # One-Hot Encoding for categorical features (Soil, LULC)
-    ohe_input_df = input_df[['soil_type', 'lulc']].rename(columns={
-        'soil_type': 'Soil_Type',
-        'lulc': 'LULC'
-    })
+# --- 6. Multi-Step Forecast ---
+
+HISTORY_COLUMNS = ['water_level', 'rainfall_mm', 'pet_mm', 'avg_temp_c']
+
+
+def station_history_rows(station_id, now=None):
+    """
+    LSTM feature rows for the SEQ_LENGTH - 1 days before today from the station's daily means (oldest
+    first). The rows are on the daily grid, as in training: a day without readings repeats the last
+    day that has them, and Prev_Level is always the previous day's level. Days before the first
+    reading are left to initial_windows() to pad.
+    """
+    now = time.time() if now is None else now
+    today = int(now // 86400)
+    first_day = today - (SEQ_LENGTH - 1)
+    ts, cols = TS_STORE.query(station_id, first_day * 86400, today * 86400 - 1, columns=HISTORY_COLUMNS,
+                              resolution='1d')  # Today is the current reading, not history
+    valid = ~np.isnan(cols['water_level'])
+    if not valid.any():
+        return None
+    slots = (ts[valid] // 86400).astype(np.int64) - first_day
+    grid = {name: np.full(SEQ_LENGTH - 1, np.nan) for name in HISTORY_COLUMNS}
+    for name in HISTORY_COLUMNS:
+        grid[name][slots] = cols[name][valid]
+
+    # Forward-fill: each day takes the values of the latest day at or before it that has a reading
+    has_reading = ~np.isnan(grid['water_level'])
+    source = np.maximum.accumulate(np.where(has_reading, np.arange(SEQ_LENGTH - 1), 0))
+    days = slice(int(np.argmax(has_reading)), None)
+    level, rainfall, pet, temp = (grid[name][source][days] for name in HISTORY_COLUMNS)
+    prev_level = np.concatenate([level[:1], level[:-1]])
+    return feature_rows(level, rainfall, pet, temp, prev_level)
+
+
+def forecast_windows(stations):
+    """Initial LSTM windows: today's reading after each station's recorded history."""
+    current_rows = []
+    for station in stations:
+        reading = get_real_time_data(station)
+        current_rows.append(feature_rows(reading['water_level'], reading['rainfall_mm'], reading['pet_mm'],
+                                         reading['avg_temp_c']))
+    with metrics.STAGE_SECONDS.time(stage="history"):
+        return initial_windows(np.array(current_rows),
+                               [station_history_rows(station.station_id) for station in stations])
+
+
+@metrics.STAGE_SECONDS.time(stage="rollout")
+def forecast_levels(models, windows, horizon_days):
+    return np.round(rollout(models["lstm"], models["lstm_scaler"], windows, horizon_days), 2)
+
+
+@app.post("/forecast")
+async def forecast(data: ForecastInput):
+    """Daily level trajectories for many stations: one batched LSTM call per forecast day."""
+    station_ids = list(dict.fromkeys(data.station_ids))
+    stations, missing_ids = await EXECUTORS.run("general", resolve_stations, station_ids)
+    if not stations:
+        return {"horizon_days": data.horizon_days, "forecasts": {}, "missing": missing_ids}
+
+    async with ADMISSION.slot("/forecast"):
+        models = current_deployment().models
+        metrics.BATCH_ROWS.observe(len(stations), endpoint="forecast")
+        windows = await EXECUTORS.run("general", forecast_windows, stations)
+        levels = await EXECUTORS.run("tensorflow", forecast_levels, models, windows, data.horizon_days)
+    content = {
+        "horizon_days": data.horizon_days,
+        # Rows of a C-contiguous array, written natively by orjson
+        "forecasts": dict(zip((station.station_id for station in stations), levels)),
+        "missing": missing_ids,
+    }
+    return await EXECUTORS.run("general", serialization.render, serialization.FastJSONResponse, content)
+
 
-    ohe_features = models["ohe"].transform(ohe_input_df)
-    ohe_df = pd.DataFrame(ohe_features, columns=models["ohe"].get_feature_names_out(['Soil_Type', 'LULC']))
-    input_df = pd.concat([input_df.reset_index(drop=True), ohe_df], axis=1)
-
-    # Add placeholder/historical and derived features
-    input_df['Prev_Level'] = input_df['Water_Level']
-    input_df['Rainfall_7day'] = input_df['Rainfall_mm'] * 7
-    input_df['Rainfall_30days'] = input_df['Rainfall_mm'] * 30
-    input_df['PET_30days'] = input_df['PET_mm'] * 30
-
-    # --- 3.2. Run Predictions ---
-    results = {}
-
-    # 1. Anomaly Detection (Isolation Forest)
-    if_features = input_df[['Water_Level', 'Water_Level', 'Rainfall_mm']]
-    if_features.columns = ['Water_Level', 'Level_Change_Rate', 'Rainfall_mm']
-    anomaly_score = models["iforest"].decision_function(if_features)[0]
-    is_anomaly = "Yes" if anomaly_score < -0.1 else "No"
-    results["Anomaly_Check"] = {"Is_Anomaly": is_anomaly, "Score": float(f"{anomaly_score:.4f}")}
-
-    # 2. LSTM Water Fluctuation (Next Day Level)
-    lstm_features = input_df[['Water_Level', 'Rainfall_7day', 'PET_mm', 'Avg_Temp_C', 'Prev_Level']].values
-    lstm_scaled = models["lstm_scaler"].transform(lstm_features).reshape(1, 1, len(lstm_features[0]))
-    next_day_level = models["lstm"].predict(lstm_scaled, verbose=0)[0][0]
-    results["Water_Level_Prediction"] = {"Next_Day_Level": float(f"{next_day_level:.2f}")}
-
-    # 3. XGBoost Recharge Estimation (30-day net change)
-    xgb_cols = [c for c in models["xgb"].feature_names_in_ if c in input_df.columns]
-    xgb_input = input_df[xgb_cols]
-    estimated_recharge = models["xgb"].predict(xgb_input)[0]
-    results["Estimated_Recharge"] = {"30_Day_Net_Change": float(f"{estimated_recharge:.2f}")}
-
-    # 4. Random Forest Water Budget (Simulated Extraction)
-    rf_cols = [c for c in models["rf"].feature_names_in_ if c in input_df.columns]
-    rf_input = input_df[rf_cols]
-    simulated_extraction = models["rf"].predict(rf_input)[0]
-    results["Simulated_Extraction"] = {"Rate": float(f"{simulated_extraction:.2f}")}
-
-    # 5. Logistic Regression Risk Index
-    risk_features = input_df[['Water_Level', 'Rainfall_30days', 'PET_30days']].copy()
-    risk_features['Target_Recharge'] = estimated_recharge
-    risk_input = models["risk_scaler"].transform(risk_features.values)
-    risk_proba = models["logreg"].predict_proba(risk_input)[0][1]
-    results["Drought_Risk_Index"] = {"Probability_Critical_Drop": float(f"{risk_proba:.2f}")}
-
-    # 6. Add real-time input data to the response for display in the dashboard
-    results["Real_Time_Input"] = combined_data
-
-    return results
\ No newline at end of file
+# --- 7. What-If Scenario Ensembles ---
+
+def run_scenarios(deployment, station, scenarios, seed):
+    real_time_data = get_real_time_data(station)
+    input_df = build_feature_frame([{**station.model_inputs(), **real_time_data}], deployment.models["ohe"])
+    return {
+        "station_id": station.station_id,
+        "Real_Time_Input": real_time_data,
+        "scenarios": deployment.scenario_engine.run(input_df, scenarios, seed=seed),
+    }
+
+
+@app.post("/scenario")
+async def scenario(data: ScenarioInput):
+    """Percentile bands of recharge, extraction and risk under perturbed rainfall/PET for one station."""
+    station_id = data.station_id
+    station = STATION_REGISTRY.get(station_id)
+    if station is None:
+        raise HTTPException(status_code=404, detail=f"Station ID '{station_id}' not found.")
+    names = [spec.name for spec in data.scenarios]
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=422, detail="Scenario names must be unique.")
+
+    scenarios = [Scenario(**spec.model_dump()) for spec in data.scenarios]
+    async with ADMISSION.slot("/scenario"):
+        deployment = current_deployment()
+        metrics.BATCH_ROWS.observe(sum(s.members for s in scenarios), endpoint="scenario")
+        return await EXECUTORS.run("ensemble", run_scenarios, deployment, station, scenarios, data.seed)
+
+
+# --- 8. Readiness & Model Versions ---
+
+@app.get("/ready")
+def ready(response: Response):
+    """200 once a warmed-up model bundle is being served, 503 before that (use as the readiness probe)."""
+    deployment = DEPLOYMENT
+    if deployment is None:
+        response.status_code = 503
+        return {"ready": False, "reload": dict(RELOAD_STATUS)}
+    return {"ready": True, "version": deployment.bundle.version, "warmup_seconds": deployment.warmup_seconds}
+
+
+@app.get("/models/active")
+def active_model():
+    """The model version this worker is serving, plus the registry's view and any reload in progress."""
+    deployment = current_deployment()
+    return {
+        "version": deployment.bundle.version,
+        "loaded_at": deployment.loaded_at,
+        "precision": INFERENCE_PRECISION,
+        "manifest": deployment.bundle.manifest,
+        "registry_active": MODEL_REGISTRY.active_version(),
+        "available": MODEL_REGISTRY.versions(),
+        "reload": dict(RELOAD_STATUS),
+    }
+
+
+@app.post("/models/reload", status_code=202)
+def reload_model(data: ModelReloadInput):
+    """
+    Loads a version in the background and swaps it in once warm. Naming a version also makes
+    it the registry's active one, which the other workers pick up on their next poll.
+    """
+    version = data.version or MODEL_REGISTRY.active_version()
+    if data.version:
+        if version != BUILTIN_VERSION and version not in MODEL_REGISTRY.versions():
+            raise HTTPException(status_code=404, detail=f"Model version '{version}' not found.")
+        try:
+            MODEL_REGISTRY.verify(version)  # Never point the other workers at a damaged bundle
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        MODEL_REGISTRY.set_active(version)
+    if not start_reload(version):
+        raise HTTPException(status_code=409, detail="A model reload is already in progress.")
+    return {"state": "loading", "version": version}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text format: per-stage and per-route latency, batch sizes, model version and reloads."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# --- 9. Station Registry Lookups ---
+
+@app.get("/stations")
+def list_stations(state: Optional[str] = None, district: Optional[str] = None,
+                  bbox: Optional[str] = Query(None, description="lat_min,lat_max,lon_min,lon_max"),
+                  limit: int = Query(100, ge=1, le=10000), offset: int = Query(0, ge=0)):
+    """Registered stations, optionally filtered by state, district and bounding box, ordered by id."""
+    bounds = None
+    if bbox is not None:
+        try:
+            bounds = tuple(float(value) for value in bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4:
+            raise HTTPException(status_code=422, detail="bbox must be lat_min,lat_max,lon_min,lon_max.")
+    stations = STATION_REGISTRY.find(state, district, bounds, limit, offset)
+    return {"stations": [station._asdict() for station in stations], "limit": limit, "offset": offset}
+
+
+@app.get("/stations/{station_id}")
+def get_station(station_id: str):
+    station = STATION_REGISTRY.get(station_id)
+    if station is None:
+        raise HTTPException(status_code=404, detail=f"Station ID '{station_id}' not found.")
+    return station._asdict()
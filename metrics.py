@@ -0,0 +1,207 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# =================================================================================
+# --- IN-PROCESS METRICS (PROMETHEUS TEXT FORMAT) ---
+# Minimal counters, gauges and histograms with labels, rendered in the Prometheus
+# text exposition format for a /metrics endpoint (no client library needed). An
+# observation is a lock, a bisect and two additions (a few microseconds), so the
+# instrumentation stays on in production.
+#
+# Metrics live in the process that records them: under gunicorn each worker exposes
+# its own numbers, so scrape the workers individually or sum across them.
+# =================================================================================
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 100000)
+
+REGISTRY = []
+_local = threading.local()  # Per-thread switch for suppressed()
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+@contextmanager
+def suppressed():
+    """Drops observations made by this thread inside the block (e.g. warm-up batches)."""
+    _local.suppressed = True
+    try:
+        yield
+    finally:
+        _local.suppressed = False
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}  # Tuple of label values -> sample state
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """(suffix, label pairs, value) for every sample, in exposition order."""
+        raise NotImplementedError
+
+    def render(self):
+        """The metric's exposition block, or None before its first sample."""
+        samples = self.samples()
+        if not samples:
+            return None
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, pairs, value in samples:
+            lines.append(f"{self.name}{suffix}{_label_text(pairs)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if getattr(_local, 'suppressed', False):
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("_total", list(zip(self.label_names, key)), value) for key, value in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", list(zip(self.label_names, key)), value) for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if getattr(_local, 'suppressed', False):
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall time of the block (or, used as a decorator, of each call)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            pairs = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", pairs + [("le", _format_value(bound))], cumulative))
+            samples.append(("_sum", pairs, total))
+            samples.append(("_count", pairs, cumulative))
+        return samples
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def counter(name, documentation, labels=()):
+    return _register(Counter(name, documentation, labels))
+
+
+def gauge(name, documentation, labels=()):
+    return _register(Gauge(name, documentation, labels))
+
+
+def histogram(name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, documentation, labels, buckets))
+
+
+def render(registry=None):
+    """All metrics with at least one sample, in Prometheus text format."""
+    blocks = [metric.render() for metric in (REGISTRY if registry is None else registry)]
+    return "\n".join(block for block in blocks if block is not None) + "\n"
+
+
+# --- Application metrics ---
+
+STAGE_SECONDS = histogram(
+    "groundwater_stage_seconds", "Time spent in each inference stage.", ["stage"])
+BATCH_ROWS = histogram(
+    "groundwater_batch_rows", "Rows (stations or ensemble members) per model batch.", ["endpoint"],
+    buckets=SIZE_BUCKETS)
+REQUEST_SECONDS = histogram(
+    "groundwater_request_seconds", "HTTP request latency by route.", ["method", "endpoint"])
+REQUESTS = counter(
+    "groundwater_requests", "HTTP requests by route and status code.", ["method", "endpoint", "status"])
+CACHE_LOOKUPS = counter(
+    "groundwater_cache_lookups", "Cache lookups by cache and result (hit, stale, miss).", ["cache", "result"])
+MODEL_INFO = gauge(
+    "groundwater_model_info", "The model bundle version being served (always 1).", ["version"])
+MODEL_WARMUP_SECONDS = gauge(
+    "groundwater_model_warmup_seconds", "Warm-up time of the model bundle being served.")
+MODEL_RELOADS = counter(
+    "groundwater_model_reloads", "Model bundle loads by result.", ["result"])
+IN_FLIGHT_REQUESTS = gauge(
+    "groundwater_in_flight_requests", "Model requests admitted and not yet finished.")
+ADMISSION_REJECTIONS = counter(
+    "groundwater_admission_rejections", "Requests turned away with 503 because the worker was at capacity.",
+    ["endpoint"])
+EXECUTOR_WAIT_SECONDS = histogram(
+    "groundwater_executor_wait_seconds", "Time a model call queued for its executor thread.", ["family"])
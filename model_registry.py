@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from inference import BASE_DIR, MODEL_FILES, load_models
+
+# =================================================================================
+# --- VERSIONED MODEL REGISTRY ---
+# Each bundle is a directory holding all eight artifacts (five models, two scalers,
+# the encoder) plus a manifest.json with their checksums. A one-line ACTIVE file names
+# the version the API should serve:
+#
+#   model_registry/
+#     ACTIVE                      <- "20261019-093000"
+#     20261019-093000/manifest.json, lstm_water_level_predictor.keras, ...
+#
+#   python model_registry.py publish                 # Bundle the artifacts in this directory
+#   python model_registry.py publish --source out/ --version v7 --notes "retrained on 2026 data"
+#   python model_registry.py list
+#   python model_registry.py activate v6             # Roll back
+#
+# Bundles are written to a temporary directory and renamed into place, and ACTIVE is
+# replaced atomically, so a reader never sees a half-published bundle.
+# =================================================================================
+
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(BASE_DIR, "model_registry"))
+MANIFEST_FILE = "manifest.json"
+ACTIVE_FILE = "ACTIVE"
+BUILTIN_VERSION = "builtin"  # Artifacts next to the code, used when the registry has no active bundle
+
+
+class ModelBundle(NamedTuple):
+    version: str
+    path: str
+    manifest: dict
+    models: dict
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(bundle_dir, version, source=None, notes=None):
+    files = {}
+    for name, filename in MODEL_FILES.items():
+        path = os.path.join(bundle_dir, filename)
+        files[name] = {'file': filename, 'sha256': file_sha256(path), 'bytes': os.path.getsize(path)}
+    return {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'source': source,
+        'notes': notes,
+        'files': files,
+    }
+
+
+class ModelRegistry:
+    """Publishes, lists and loads model bundles in a registry directory."""
+
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+
+    def bundle_path(self, version):
+        if version == BUILTIN_VERSION:
+            return BASE_DIR
+        if not version or os.sep in version or version.startswith('.'):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Published versions, oldest first."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        found = [n for n in names if os.path.isfile(os.path.join(self.root, n, MANIFEST_FILE))]
+        return sorted(found, key=lambda n: self.manifest(n)['created_at'])
+
+    def manifest(self, version):
+        if version == BUILTIN_VERSION:
+            return {'version': BUILTIN_VERSION, 'source': BASE_DIR}
+        with open(os.path.join(self.bundle_path(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def active_version(self):
+        """The version named by ACTIVE, or BUILTIN_VERSION if nothing has been published."""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                return f.read().strip() or BUILTIN_VERSION
+        except FileNotFoundError:
+            return BUILTIN_VERSION
+
+    def set_active(self, version):
+        if version != BUILTIN_VERSION and version not in self.versions():
+            raise KeyError(f"Model version '{version}' is not in the registry.")
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{ACTIVE_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, os.path.join(self.root, ACTIVE_FILE))
+
+    def publish(self, source_dir=BASE_DIR, version=None, notes=None, activate=True):
+        """Copies the artifacts in source_dir into a new bundle. Returns its manifest."""
+        version = version or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        final_dir = self.bundle_path(version)
+        if os.path.exists(final_dir):
+            raise FileExistsError(f"Model version '{version}' already exists.")
+
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for filename in MODEL_FILES.values():
+                shutil.copy2(os.path.join(source_dir, filename), os.path.join(tmp_dir, filename))
+            manifest = build_manifest(tmp_dir, version, os.path.abspath(source_dir), notes)
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(tmp_dir, final_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.set_active(version)
+        return manifest
+
+    def verify(self, version):
+        """Raises ValueError if any artifact no longer matches its manifest checksum."""
+        if version == BUILTIN_VERSION:
+            return
+        bundle_dir = self.bundle_path(version)
+        for name, entry in self.manifest(version)['files'].items():
+            if file_sha256(os.path.join(bundle_dir, entry['file'])) != entry['sha256']:
+                raise ValueError(f"Model version '{version}': checksum mismatch for {name}.")
+
+    def load(self, version=None):
+        """Verifies and loads a bundle (default: the active one)."""
+        version = version or self.active_version()
+        self.verify(version)
+        path = self.bundle_path(version)
+        return ModelBundle(version, path, self.manifest(version), load_models(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned model bundles.")
+    parser.add_argument("--registry", default=MODEL_REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish = commands.add_parser("publish", help="Bundle a directory of trained artifacts")
+    publish.add_argument("--source", default=BASE_DIR, help="Directory holding the trained artifacts")
+    publish.add_argument("--version", default=None, help="Version name (default: UTC timestamp)")
+    publish.add_argument("--notes", default=None)
+    publish.add_argument("--no-activate", action="store_true", help="Publish without making it active")
+
+    commands.add_parser("list", help="List published versions")
+
+    activate = commands.add_parser("activate", help="Point ACTIVE at a published version")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == "publish":
+        manifest = registry.publish(args.source, args.version, args.notes, activate=not args.no_activate)
+        print(f"Published model version {manifest['version']} to {registry.root}"
+              + ("" if args.no_activate else " (active)"))
+    elif args.command == "list":
+        active = registry.active_version()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            marker = "*" if version == active else " "
+            print(f"{marker} {version:<24} {manifest['created_at']}  {manifest.get('notes') or ''}")
+        if active == BUILTIN_VERSION:
+            print(f"* {BUILTIN_VERSION} (artifacts in {BASE_DIR})")
+    else:
+        registry.set_active(args.version)
+        print(f"Active model version: {args.version}")
+
+
+if __name__ == "__main__":
+    main()
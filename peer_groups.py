@@ -0,0 +1,127 @@
+import threading
+
+import numpy as np
+
+from metrics import CACHE_LOOKUPS
+
+# =================================================================================
+# --- SPATIAL PEER GROUPS ---
+# Nearest-neighbour peer groups for benchmarking a station against the stations
+# around it rather than everything in its state. A haversine BallTree is built once
+# over station lat/lon; stations added later go into a small buffer that is searched
+# by brute force and folded into the tree once it grows. Results are cached per
+# (station, mode, parameter) until the index changes.
+# =================================================================================
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_K = 10
+DEFAULT_RADIUS_KM = 100.0
+MIN_REBUILD_BUFFER = 64  # Rebuild the tree once the buffer reaches this size or 10% of the tree
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points (degrees in)."""
+    lat, lon, lats, lons = map(np.radians, (lat, lon, np.asarray(lats, float), np.asarray(lons, float)))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialPeerIndex:
+    """k-nearest and radius peer lookups over station coordinates."""
+
+    def __init__(self, station_ids, lats, lons):
+        self._ids = list(station_ids)
+        self._positions = {station_id: i for i, station_id in enumerate(self._ids)}
+        self._coords = np.column_stack([np.asarray(lats, float), np.asarray(lons, float)])
+        self._tree = None
+        self._tree_size = 0  # Stations [0, _tree_size) are in the tree, the rest are buffered
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _build(self):
+        # Caller must hold the lock. sklearn is imported here so importing this module stays cheap.
+        from sklearn.neighbors import BallTree
+
+        self._tree = BallTree(np.radians(self._coords), metric='haversine')
+        self._tree_size = len(self._ids)
+        self._cache.clear()
+
+    def add(self, station_id, lat, lon):
+        """Adds (or moves) a station. Cached peer groups are invalidated."""
+        with self._lock:
+            if station_id in self._positions:
+                self._coords[self._positions[station_id]] = (lat, lon)
+                self._tree = None  # A moved station needs a rebuild
+            else:
+                self._positions[station_id] = len(self._ids)
+                self._ids.append(station_id)
+                self._coords = np.vstack([self._coords, [lat, lon]])
+                buffered = len(self._ids) - self._tree_size
+                if buffered >= max(MIN_REBUILD_BUFFER, self._tree_size // 10):
+                    self._tree = None
+            self._cache.clear()
+
+    def _query(self, position, mode, value):
+        # Caller must hold the lock
+        if self._tree is None:
+            self._build()
+        lat, lon = self._coords[position]
+        point = np.radians([[lat, lon]])
+
+        if mode == 'knn':
+            k = min(value + 1, self._tree_size)  # +1: the station itself is its own nearest neighbour
+            dist, ind = self._tree.query(point, k=k)
+            dist_km, ind = dist[0] * EARTH_RADIUS_KM, ind[0]
+        else:
+            ind, dist = self._tree.query_radius(point, r=value / EARTH_RADIUS_KM, return_distance=True)
+            dist_km, ind = dist[0] * EARTH_RADIUS_KM, ind[0]
+
+        # Stations added since the last build are checked directly
+        if len(self._ids) > self._tree_size:
+            extra = np.arange(self._tree_size, len(self._ids))
+            extra_km = haversine_km(lat, lon, self._coords[extra, 0], self._coords[extra, 1])
+            ind = np.concatenate([ind, extra])
+            dist_km = np.concatenate([dist_km, extra_km])
+
+        order = np.argsort(dist_km, kind='stable')
+        if mode == 'knn':
+            order = order[:value + 1]
+        else:
+            order = order[dist_km[order] <= value]
+        return tuple(int(i) for i in ind[order])
+
+    def peers(self, station_id, mode='knn', value=None):
+        """
+        Positions of the station's peers (itself included), nearest first.
+        mode='knn' takes the `value` nearest stations (default DEFAULT_K); mode='radius' takes
+        every station within `value` km (default DEFAULT_RADIUS_KM).
+        """
+        if mode not in ('knn', 'radius'):
+            raise ValueError(f"Unknown peer mode: {mode}")
+        if value is None:
+            value = DEFAULT_K if mode == 'knn' else DEFAULT_RADIUS_KM
+        key = (station_id, mode, value)
+        with self._lock:
+            cached = self._cache.get(key)
+            CACHE_LOOKUPS.inc(cache="peer_groups", result="miss" if cached is None else "hit")
+            if cached is None:
+                position = self._positions.get(station_id)
+                if position is None:
+                    return ()
+                cached = self._cache[key] = self._query(position, mode, value)
+            return cached
+
+    def peer_ids(self, station_id, mode='knn', value=None):
+        return [self._ids[i] for i in self.peers(station_id, mode, value)]
+
+
+def from_records(records, id_key='id', lat_key='lat', lon_key='lon'):
+    """Builds an index from station dicts (e.g. the dashboard's sensor list)."""
+    return SpatialPeerIndex(
+        [r[id_key] for r in records],
+        np.array([r[lat_key] for r in records], dtype=float),
+        np.array([r[lon_key] for r in records], dtype=float),
+    )
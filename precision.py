@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+
+# =================================================================================
+# --- REDUCED-PRECISION INFERENCE ---
+# Opt-in precision modes for the five-model pipeline (INFERENCE_PRECISION, default
+# float64):
+#
+#   float64  the trained behaviour: float64 feature frames, Keras LSTM
+#   float32  float32 feature frames end to end. The tree models split on float32
+#            features anyway (sklearn and XGBoost convert their input), so they get
+#            it without a per-call conversion copy, and the scalers keep float32
+#   float16  float32, plus LSTM weights stored as float16
+#   int8     float32, plus LSTM weights as int8 with one float32 scale per output
+#            column (symmetric post-training quantization)
+#
+# Quantized LSTM weights are evaluated by QuantizedLSTM, a numpy forward pass over the
+# trained LSTM -> Dropout -> Dense stack that replaces the Keras model once loaded. The
+# weights are dequantized to float32 per call; the model is small enough that this is
+# cheaper than TensorFlow's per-call overhead. benchmarks/precision_report.py measures
+# the accuracy cost of each mode against float64 on prepared_data.csv.
+# =================================================================================
+
+PRECISION_MODES = ('float64', 'float32', 'float16', 'int8')
+INFERENCE_PRECISION = os.environ.get("INFERENCE_PRECISION", "float64")
+if INFERENCE_PRECISION not in PRECISION_MODES:
+    raise ValueError(f"INFERENCE_PRECISION must be one of {PRECISION_MODES}, not {INFERENCE_PRECISION!r}")
+
+
+def feature_dtype(mode=INFERENCE_PRECISION):
+    return np.float64 if mode == 'float64' else np.float32
+
+
+def cast_frame(frame, dtype):
+    """The frame with every float column as dtype (returned as is when nothing needs casting)."""
+    columns = {name: dtype for name, column_dtype in frame.dtypes.items()
+               if column_dtype.kind == 'f' and column_dtype != dtype}
+    return frame.astype(columns) if columns else frame
+
+
+def quantize(weights, mode):
+    """(stored weights, per-column float32 scale or None) for float16 or int8 storage."""
+    weights = np.asarray(weights, dtype=np.float32)
+    if mode == 'float16':
+        return weights.astype(np.float16), None
+    if mode == 'int8':
+        scale = np.abs(weights).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(weights / scale).astype(np.int8), scale.astype(np.float32)
+    raise ValueError(f"Cannot quantize to {mode!r}")
+
+
+def dequantize(stored, scale):
+    values = stored.astype(np.float32)
+    return values if scale is None else values * scale
+
+
+class QuantizedLSTM:
+    """
+    The trained Keras LSTM -> Dropout -> Dense model, evaluated in numpy from float16 or int8
+    weights. Called with an (N, T, F) float32 batch it returns (N, 1), like the Keras model.
+    """
+
+    def __init__(self, model, mode):
+        lstm = next(layer for layer in model.layers if layer.__class__.__name__ == 'LSTM')
+        dense = model.layers[-1]
+        config = lstm.get_config()
+        if (config.get('return_sequences') or config.get('go_backwards') or config.get('stateful')
+                or config.get('activation') != 'tanh' or config.get('recurrent_activation') != 'sigmoid'
+                or dense.get_config().get('activation') != 'linear'):
+            raise ValueError("QuantizedLSTM supports a single tanh/sigmoid LSTM followed by a linear Dense layer.")
+
+        kernel, recurrent_kernel, bias = lstm.get_weights()
+        dense_kernel, dense_bias = dense.get_weights()
+        self.mode = mode
+        self.units = u = recurrent_kernel.shape[0]
+        # Keras orders the gates i, f, c, o; i, f, o, c puts the three sigmoid gates side by side
+        order = np.r_[0:2 * u, 3 * u:4 * u, 2 * u:3 * u]
+        self._kernel = quantize(kernel[:, order], mode)
+        self._recurrent_kernel = quantize(recurrent_kernel[:, order], mode)
+        self._dense_kernel = quantize(dense_kernel, mode)
+        self._bias = np.asarray(bias[order], dtype=np.float32)  # Biases are tiny; kept in float32
+        self._dense_bias = np.asarray(dense_bias, dtype=np.float32)
+
+    @property
+    def weight_bytes(self):
+        arrays = [self._bias, self._dense_bias]
+        for stored, scale in (self._kernel, self._recurrent_kernel, self._dense_kernel):
+            arrays.extend(a for a in (stored, scale) if a is not None)
+        return sum(a.nbytes for a in arrays)
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        steps = x.shape[1]
+        u = self.units
+        kernel, recurrent_kernel = dequantize(*self._kernel), dequantize(*self._recurrent_kernel)
+        h = c = None
+        for t in range(steps):
+            z = x[:, t] @ kernel
+            z += self._bias
+            if h is not None:  # The initial state is zero, so step 0 skips the recurrent matmul
+                z += h @ recurrent_kernel
+            gates = z[:, :3 * u]
+            gates *= 0.5  # sigmoid(x) = 0.5 * tanh(x / 2) + 0.5, in place and without overflow warnings
+            np.tanh(gates, out=gates)
+            gates *= 0.5
+            gates += 0.5
+            candidate = np.tanh(z[:, 3 * u:], out=z[:, 3 * u:])
+            candidate *= gates[:, :u]
+            c = candidate if c is None else c * gates[:, u:2 * u] + candidate
+            h = np.tanh(c) * gates[:, 2 * u:]
+        return h @ dequantize(*self._dense_kernel) + self._dense_bias
+
+
+def apply_precision(models, mode=INFERENCE_PRECISION):
+    """Swaps the Keras LSTM for a QuantizedLSTM in float16/int8 mode (in place); returns models."""
+    if mode in ('float16', 'int8') and "lstm" in models and not isinstance(models["lstm"], QuantizedLSTM):
+        models["lstm"] = QuantizedLSTM(models["lstm"], mode)
+    return models
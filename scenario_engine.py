@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from inference import BASE_DIR, RISK_FEATURES, load_models, predict_extraction, predict_recharge, predict_risk
+from precision import cast_frame, feature_dtype
+
+# =================================================================================
+# --- WHAT-IF SCENARIO ENGINE ---
+# Monte Carlo weather ensembles pushed through the XGB recharge, RF extraction and
+# logistic risk models. A scenario shifts/scales a station's rainfall and PET; each
+# ensemble member then draws its own weather around that (log-normal rainfall, normal
+# PET). Every member of every scenario in a request is scored in one batch per model,
+# and the result is reported as percentile bands per scenario.
+#
+# Ensembles above POOL_MIN_MEMBERS are split across a process pool whose workers each
+# load the models once; smaller ones run in-process, where pool overhead would dominate.
+# =================================================================================
+
+DEFAULT_MEMBERS = 1000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_RAINFALL_CV = 0.5  # Daily rainfall is highly skewed...
+DEFAULT_PET_CV = 0.1  # ...PET much less so
+POOL_MIN_MEMBERS = 50000
+POOL_CHUNK_MEMBERS = 25000
+SCENARIO_WORKERS = int(os.environ.get("SCENARIO_WORKERS", "0")) or None  # Default: one per CPU
+
+OUTPUT_COLUMNS = ('recharge_30d', 'extraction_rate', 'risk_proba')
+WORKER_MODELS = ('xgb', 'rf', 'logreg', 'risk_scaler')  # Pool workers never need the LSTM
+
+_worker_models = None
+
+
+class Scenario(NamedTuple):
+    name: str = 'baseline'
+    rainfall_delta_mm: float = 0.0  # Added to daily rainfall after scaling
+    rainfall_scale: float = 1.0
+    pet_delta_mm: float = 0.0
+    rainfall_cv: float = DEFAULT_RAINFALL_CV  # Member-to-member spread; 0 gives a deterministic scenario
+    pet_cv: float = DEFAULT_PET_CV
+    members: int = DEFAULT_MEMBERS
+
+
+def draw_weather(rng, rainfall_mm, pet_mm, scenario):
+    """Daily rainfall and PET for every member of one scenario."""
+    n = scenario.members
+    rain_mean = max(0.0, rainfall_mm * scenario.rainfall_scale + scenario.rainfall_delta_mm)
+    if scenario.rainfall_cv > 0:
+        # Log-normal with mean 1 and the requested coefficient of variation
+        sigma = np.sqrt(np.log1p(scenario.rainfall_cv ** 2))
+        rain = rain_mean * rng.lognormal(-sigma ** 2 / 2, sigma, n)
+    else:
+        rain = np.full(n, rain_mean)
+
+    pet_mean = max(0.0, pet_mm + scenario.pet_delta_mm)
+    if scenario.pet_cv > 0:
+        pet = np.maximum(0.0, pet_mean * rng.normal(1.0, scenario.pet_cv, n))
+    else:
+        pet = np.full(n, pet_mean)
+    return rain, pet
+
+
+def base_columns(models, input_df):
+    """The first row of a feature frame, restricted to the columns the three models read."""
+    names = dict.fromkeys([*models["xgb"].feature_names_in_, *models["rf"].feature_names_in_, *RISK_FEATURES])
+    row = input_df.iloc[0]
+    return {name: row[name] for name in names if name in input_df.columns}
+
+
+def member_frame(columns, rainfall_mm, pet_mm):
+    """Feature frame with one row per member: static features repeated, weather features replaced."""
+    n = len(rainfall_mm)
+    frame = pd.DataFrame({name: np.full(n, value) for name, value in columns.items()})
+    # Same derivations as inference.build_feature_frame
+    frame['Rainfall_mm'] = rainfall_mm
+    frame['PET_mm'] = pet_mm
+    frame['Rainfall_30days'] = rainfall_mm * 30
+    frame['PET_30days'] = pet_mm * 30
+    return cast_frame(frame, feature_dtype())  # Float columns as build_feature_frame makes them
+
+
+def score_members(models, columns, rainfall_mm, pet_mm):
+    """Recharge, extraction and risk for every member in one call per model."""
+    frame = member_frame(columns, rainfall_mm, pet_mm)
+    recharge = predict_recharge(models, frame)
+    return {
+        'recharge_30d': np.asarray(recharge, dtype=np.float64),
+        'extraction_rate': np.asarray(predict_extraction(models, frame), dtype=np.float64),
+        'risk_proba': np.asarray(predict_risk(models, frame, recharge), dtype=np.float64),
+    }
+
+
+def percentile_bands(values, percentiles=DEFAULT_PERCENTILES):
+    bands = np.percentile(values, percentiles)
+    result = {f"p{p:g}": round(float(v), 4) for p, v in zip(percentiles, bands)}
+    result['mean'] = round(float(np.mean(values)), 4)
+    return result
+
+
+# --- Process pool workers ---
+
+def init_worker(model_dir, threads):
+    """Loads the models once per worker process."""
+    global _worker_models
+    _worker_models = load_models(model_dir, WORKER_MODELS)
+    _worker_models["rf"].n_jobs = threads
+    _worker_models["xgb"].set_params(n_jobs=threads)
+
+
+def score_chunk(columns, rainfall_mm, pet_mm):
+    return score_members(_worker_models, columns, rainfall_mm, pet_mm)
+
+
+class ScenarioEngine:
+    """Runs scenario ensembles for one station at a time; large ensembles go to a process pool."""
+
+    def __init__(self, models, model_dir=BASE_DIR, workers=SCENARIO_WORKERS, pool_min_members=POOL_MIN_MEMBERS):
+        self.models = models
+        self.model_dir = model_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.pool_min_members = pool_min_members
+        self._pool = None
+        self._closed = False
+
+    def _get_pool(self):
+        if self._pool is None:
+            # 'spawn' keeps TensorFlow out of forked children
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=init_worker, initargs=(self.model_dir, threads))
+        return self._pool
+
+    def _score(self, columns, rainfall_mm, pet_mm):
+        if len(rainfall_mm) < self.pool_min_members or self.workers == 1 or self._closed:
+            return score_members(self.models, columns, rainfall_mm, pet_mm)
+        pool = self._get_pool()
+        bounds = range(0, len(rainfall_mm), POOL_CHUNK_MEMBERS)
+        futures = [pool.submit(score_chunk, columns, rainfall_mm[i:i + POOL_CHUNK_MEMBERS],
+                               pet_mm[i:i + POOL_CHUNK_MEMBERS]) for i in bounds]
+        parts = [future.result() for future in futures]
+        return {name: np.concatenate([part[name] for part in parts]) for name in OUTPUT_COLUMNS}
+
+    def run(self, input_df, scenarios=(Scenario(),), seed=None, percentiles=DEFAULT_PERCENTILES):
+        """
+        Runs every scenario for the station in the one-row feature frame `input_df`
+        (see inference.build_feature_frame). Returns {scenario name: {members, inputs, outputs}}
+        where inputs and outputs map each column to its percentile bands.
+        """
+        rng = np.random.default_rng(seed)
+        columns = base_columns(self.models, input_df)
+        row = input_df.iloc[0]
+
+        draws = [draw_weather(rng, float(row['Rainfall_mm']), float(row['PET_mm']), s) for s in scenarios]
+        rainfall_mm = np.concatenate([rain for rain, _ in draws])
+        pet_mm = np.concatenate([pet for _, pet in draws])
+        outputs = self._score(columns, rainfall_mm, pet_mm)
+
+        results = {}
+        start = 0
+        for scenario in scenarios:
+            members = slice(start, start + scenario.members)
+            start += scenario.members
+            results[scenario.name] = {
+                'members': scenario.members,
+                'inputs': {'rainfall_mm': percentile_bands(rainfall_mm[members], percentiles),
+                           'pet_mm': percentile_bands(pet_mm[members], percentiles)},
+                'outputs': {name: percentile_bands(outputs[name][members], percentiles) for name in OUTPUT_COLUMNS},
+            }
+        return results
+
+    def close(self, cancel_futures=True):
+        """Stops the pool. Ensembles started afterwards run in-process."""
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=cancel_futures)
+            self._pool = None
@@ -0,0 +1,80 @@
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from metrics import STAGE_SECONDS
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for Accept: application/msgpack
+    msgpack = None
+
+# =================================================================================
+# --- RESPONSE SERIALIZATION ---
+# Endpoints that return large payloads build them from numpy arrays and return one of
+# these responses directly, which skips FastAPI's jsonable_encoder walk over every
+# value. orjson writes numpy arrays and scalars natively. Clients that send
+# Accept: application/msgpack get MessagePack instead, if msgpack is installed.
+# =================================================================================
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class FastJSONResponse(Response):
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content):
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def preferred_media_type(accept):
+    """JSON or MessagePack, whichever the Accept header ranks higher (JSON when it names neither)."""
+    best, best_q = JSON_MEDIA_TYPE, -1.0
+    for position, entry in enumerate(accept.split(",")):
+        media_type, _, params = entry.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type != JSON_MEDIA_TYPE and media_type not in MSGPACK_MEDIA_TYPES:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:  # Ties keep the earlier entry
+            best, best_q = media_type, q
+    return MSGPACK_MEDIA_TYPES[0] if best in MSGPACK_MEDIA_TYPES and best_q > 0 else JSON_MEDIA_TYPE
+
+
+def response_class(request):
+    """FastJSONResponse, or MsgpackResponse if the Accept header prefers it (406 if msgpack is missing)."""
+    if preferred_media_type(request.headers.get("accept", "")) == JSON_MEDIA_TYPE:
+        return FastJSONResponse
+    if msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack responses need the msgpack package on the server.")
+    return MsgpackResponse
+
+
+@STAGE_SECONDS.time(stage='serialize')
+def render(response_cls, content):
+    """The response with its body already encoded (so the encoding can run off the event loop)."""
+    return response_cls(content)
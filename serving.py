@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+import metrics
+from inference import (pack_outputs, predict_anomaly, predict_extraction, predict_next_level, predict_recharge,
+                       predict_risk)
+
+# =================================================================================
+# --- MODEL EXECUTORS & ADMISSION CONTROL ---
+# The API's endpoints are async and never run model code on the event loop. Each model
+# family gets its own small thread pool, sized for how that library parallelises:
+#
+#   tensorflow  the LSTM (predictions and forecast rollouts); TF splits each call over
+#               TF_INTRA_OP_THREADS itself, so few concurrent callers are needed
+#   xgboost     the recharge model, XGB_THREADS per call
+#   sklearn     iforest, rf and logreg; joblib fan-out costs more than it saves on
+#               request-sized batches, so SKLEARN_JOBS=1 and parallel calls instead
+#   ensemble    scenario ensembles (which hand large ones to their own process pool)
+#   general     feature frames, response formatting and time-series store I/O
+#
+# The independent models of one request run at the same time on different pools, and a
+# burst queues per family instead of piling onto the default 40-thread pool where every
+# library fights every other for the GIL and the cores.
+#
+# Admission control caps the model requests in flight per worker process. A request that
+# can't get a slot within ADMISSION_WAIT_SECONDS gets a 503 with Retry-After right away,
+# so latency for admitted requests stays bounded instead of growing with the backlog.
+# =================================================================================
+
+CPU_COUNT = os.cpu_count() or 1
+
+TF_INTRA_OP_THREADS = int(os.environ.get("TF_INTRA_OP_THREADS", str(min(4, CPU_COUNT))))
+XGB_THREADS = int(os.environ.get("XGB_THREADS", str(min(4, CPU_COUNT))))
+SKLEARN_JOBS = int(os.environ.get("SKLEARN_JOBS", "1"))
+
+EXECUTOR_WORKERS = {
+    "tensorflow": int(os.environ.get("TF_EXECUTOR_WORKERS", "2")),
+    "xgboost": int(os.environ.get("XGB_EXECUTOR_WORKERS", "1")),
+    "sklearn": int(os.environ.get("SKLEARN_EXECUTOR_WORKERS", "2")),
+    "ensemble": int(os.environ.get("ENSEMBLE_EXECUTOR_WORKERS", "1")),
+    "general": int(os.environ.get("GENERAL_EXECUTOR_WORKERS", "2")),
+}
+
+MAX_IN_FLIGHT_REQUESTS = int(os.environ.get("MAX_IN_FLIGHT_REQUESTS", "8"))  # Per worker process
+ADMISSION_WAIT_SECONDS = float(os.environ.get("ADMISSION_WAIT_SECONDS", "0.05"))
+RETRY_AFTER_SECONDS = 1
+
+
+def configure_tensorflow(intra_op_threads=TF_INTRA_OP_THREADS):
+    """Sets TF's intra-op thread count. Only takes effect before TF runs its first op."""
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    except RuntimeError as e:
+        print(f"TensorFlow is already initialized, keeping its thread settings: {e}")
+
+
+def tune_models(models, xgb_threads=XGB_THREADS, sklearn_jobs=SKLEARN_JOBS):
+    """Applies the per-family thread settings to a loaded model dict (in place)."""
+    models["xgb"].set_params(n_jobs=xgb_threads)
+    for name in ("rf", "iforest"):
+        models[name].n_jobs = sklearn_jobs
+
+
+class ModelExecutors:
+    """One thread pool per model family; run() awaits a call on the family's pool."""
+
+    def __init__(self, workers=EXECUTOR_WORKERS):
+        self.pools = {family: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"{family}-exec")
+                      for family, n in workers.items()}
+
+    async def run(self, family, fn, *args, **kwargs):
+        submitted = time.perf_counter()
+
+        def call():
+            metrics.EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - submitted, family=family)
+            return fn(*args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(self.pools[family], call)
+
+
+async def run_models_async(executors, models, input_df):
+    """run_models() with the independent models in parallel on their families' pools."""
+    anomaly = asyncio.ensure_future(executors.run("sklearn", predict_anomaly, models, input_df))
+    level = asyncio.ensure_future(executors.run("tensorflow", predict_next_level, models, input_df))
+    extraction = asyncio.ensure_future(executors.run("sklearn", predict_extraction, models, input_df))
+    try:
+        recharge = await executors.run("xgboost", predict_recharge, models, input_df)
+        risk = await executors.run("sklearn", predict_risk, models, input_df, recharge)
+        anomaly_score, next_day_level, extraction_rate = await asyncio.gather(anomaly, level, extraction)
+    except BaseException:
+        for future in (anomaly, level, extraction):
+            future.cancel()
+        raise
+    return pack_outputs(anomaly_score, next_day_level, recharge, extraction_rate, risk)
+
+
+class AdmissionControl:
+    """Caps concurrent model requests; past the cap, callers wait briefly and then get a 503."""
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT_REQUESTS, wait_seconds=ADMISSION_WAIT_SECONDS):
+        self.max_in_flight = max_in_flight
+        self.wait_seconds = wait_seconds
+        self.in_flight = 0
+        self._loop = None
+        self._slots = None
+
+    def _semaphore(self):
+        # One semaphore per event loop: each TestClient (and each server restart) runs its own
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._slots, self.in_flight = loop, asyncio.Semaphore(self.max_in_flight), 0
+        return self._slots
+
+    @asynccontextmanager
+    async def slot(self, endpoint):
+        slots = self._semaphore()
+        if not slots.locked():
+            await slots.acquire()  # A free slot is taken without yielding to the loop
+        else:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self.wait_seconds)
+            except asyncio.TimeoutError:  # Not the builtin TimeoutError before Python 3.11
+                metrics.ADMISSION_REJECTIONS.inc(endpoint=endpoint)
+                raise HTTPException(status_code=503, detail="Server is at capacity, retry shortly.",
+                                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+        self.in_flight += 1
+        metrics.IN_FLIGHT_REQUESTS.set(self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            metrics.IN_FLIGHT_REQUESTS.set(self.in_flight)
+            slots.release()
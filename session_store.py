@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# =================================================================================
+# --- SERVER-SIDE SESSION STORE ---
+# Holds per-browser-session ring buffers (e.g. water level history) on the server,
+# so the browser only keeps a short session key instead of the full history.
+# =================================================================================
+
+# Sessions not touched for this long are evicted from the in-process backend.
+SESSION_TTL_SECONDS = 60 * 60
+
+# Set SESSION_REDIS_URL (e.g. redis://localhost:6379/0) to share sessions between workers.
+SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL")
+
+
+def new_session_key():
+    """Generates a fresh, unguessable session key for a browser tab."""
+    return uuid.uuid4().hex
+
+
+class InMemorySessionStore:
+    """In-process session cache. Each session holds named, fixed-size ring buffers."""
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = {}
+        self._last_seen = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def append(self, session_key, buffer_name, item, maxlen):
+        """Appends an item to a session ring buffer, dropping the oldest when full."""
+        with self._lock:
+            buffers = self._sessions.setdefault(session_key, {})
+            buffer = buffers.get(buffer_name)
+            if buffer is None or buffer.maxlen != maxlen:
+                buffer = deque(buffer or (), maxlen=maxlen)
+                buffers[buffer_name] = buffer
+            buffer.append(item)
+            self._touch(session_key)
+
+    def read(self, session_key, buffer_name):
+        """Returns a snapshot (list) of a session ring buffer, oldest first."""
+        with self._lock:
+            buffer = self._sessions.get(session_key, {}).get(buffer_name)
+            if buffer is None:
+                return []
+            self._touch(session_key)
+            return list(buffer)
+
+    def last(self, session_key, buffer_name, default=None):
+        """Returns the newest item of a session ring buffer without copying it."""
+        with self._lock:
+            buffer = self._sessions.get(session_key, {}).get(buffer_name)
+            if not buffer:
+                return default
+            self._touch(session_key)  # A viewer that only reads is still active
+            return buffer[-1]
+
+    def clear(self, session_key):
+        with self._lock:
+            self._sessions.pop(session_key, None)
+            self._last_seen.pop(session_key, None)
+
+    def _touch(self, session_key):
+        # Caller must hold the lock.
+        now = time.monotonic()
+        self._last_seen[session_key] = now
+        if now - self._last_sweep > 60:
+            self._last_sweep = now
+            expired = [k for k, seen in self._last_seen.items() if now - seen > self.ttl_seconds]
+            for k in expired:
+                self._sessions.pop(k, None)
+                self._last_seen.pop(k, None)
+
+
+class RedisSessionStore:
+    """Redis-backed session store (same interface), for sharing sessions across workers."""
+
+    def __init__(self, url, ttl_seconds=SESSION_TTL_SECONDS):
+        import redis  # Optional dependency, only needed when SESSION_REDIS_URL is set
+
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(session_key, buffer_name):
+        return f"session:{session_key}:{buffer_name}"
+
+    def append(self, session_key, buffer_name, item, maxlen):
+        key = self._key(session_key, buffer_name)
+        pipe = self._redis.pipeline()
+        pipe.rpush(key, json.dumps(item))
+        pipe.ltrim(key, -maxlen, -1)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def _read_and_touch(self, key, command, *args):
+        # Reads refresh the TTL too (buffers are lists, so GETEX doesn't apply; EXPIRE in the same round trip)
+        pipe = self._redis.pipeline()
+        getattr(pipe, command)(key, *args)
+        pipe.expire(key, self.ttl_seconds)
+        return pipe.execute()[0]
+
+    def read(self, session_key, buffer_name):
+        raw_items = self._read_and_touch(self._key(session_key, buffer_name), 'lrange', 0, -1)
+        return [json.loads(raw) for raw in raw_items]
+
+    def last(self, session_key, buffer_name, default=None):
+        raw = self._read_and_touch(self._key(session_key, buffer_name), 'lindex', -1)
+        return json.loads(raw) if raw is not None else default
+
+    def clear(self, session_key):
+        keys = list(self._redis.scan_iter(match=f"session:{session_key}:*"))
+        if keys:
+            self._redis.delete(*keys)
+
+
+def create_session_store():
+    """Returns the Redis store when SESSION_REDIS_URL is configured, else the in-process cache."""
+    if SESSION_REDIS_URL:
+        try:
+            return RedisSessionStore(SESSION_REDIS_URL)
+        except ImportError:
+            print("SESSION_REDIS_URL is set but the 'redis' package is not installed; using in-process sessions.")
+    return InMemorySessionStore()
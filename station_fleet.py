@@ -0,0 +1,201 @@
+import os
+import pickle
+import random
+from functools import lru_cache
+from typing import NamedTuple
+
+# =================================================================================
+# --- DWLR SENSOR FLEET ---
+# The simulated station fleet used by the dashboard. Building it runs per-station loops,
+# random placement and station-name munging, so it is built once into a binary snapshot
+# (python station_fleet.py) and every process - each gunicorn worker included - just
+# unpickles the same fleet on first use.
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FLEET_SNAPSHOT_PATH = os.environ.get("FLEET_SNAPSHOT_PATH", os.path.join(BASE_DIR, "fleet_snapshot.pkl"))
+FLEET_SNAPSHOT_VERSION = 1
+
+# Status simulation options (weighted towards NORMAL)
+STATUS_OPTIONS = ['NORMAL', 'NORMAL', 'NORMAL', 'NORMAL', 'LOW_ALERT', 'ANOMALY']
+
+# --- Geospatial Data: Bounding Boxes for Indian States/UTs (Excluding Islands) ---
+INDIAN_REGIONS = {
+    "Haryana": (27.5, 30.7, 74.5, 77.7), "Madhya Pradesh": (21.0, 26.9, 74.0, 82.8),
+    "Chhattisgarh": (17.5, 23.5, 80.0, 84.0), "Jharkhand": (22.0, 25.5, 83.5, 88.0),
+    "Telangana": (15.7, 19.5, 77.0, 81.8), "Jammu and Kashmir (UT)": (32.5, 36.0, 73.5, 76.5),
+    "Ladakh (UT)": (32.0, 36.5, 75.0, 80.0), "Himachal Pradesh": (30.0, 33.5, 75.5, 79.0),
+    "Punjab": (29.5, 32.5, 73.5, 77.5), "Uttarakhand": (29.0, 31.5, 77.5, 81.0),
+    "Delhi (NCT)": (28.3, 28.8, 76.8, 77.3), "Uttar Pradesh": (23.5, 31.0, 77.0, 84.8),
+    "Chandigarh (UT)": (30.7, 30.8, 76.7, 76.8), "Rajasthan": (23.0, 30.0, 69.5, 78.5),
+    "Gujarat": (20.0, 24.5, 68.0, 74.5), "Maharashtra": (15.5, 22.0, 72.5, 80.8),
+    "Goa": (14.9, 15.9, 73.7, 74.5), "Daman, Diu, Dadra & Nagar Haveli (UT)": (20.0, 20.7, 72.8, 73.5),
+    "Bihar": (24.0, 27.5, 83.5, 88.5), "West Bengal": (21.5, 27.5, 86.0, 89.5),
+    "Odisha": (17.5, 22.5, 81.5, 87.5), "Andhra Pradesh": (12.5, 19.5, 77.0, 84.5),
+    "Karnataka": (11.5, 18.5, 74.0, 78.5), "Kerala": (8.0, 12.8, 74.8, 77.5),
+    "Tamil Nadu": (8.0, 13.5, 76.5, 80.5), "Puducherry (UT)": (11.8, 12.0, 79.8, 80.0),
+    "Sikkim": (27.0, 28.0, 88.0, 88.8), "Arunachal Pradesh": (26.5, 29.5, 91.5, 97.0),
+    "Assam": (24.5, 27.8, 89.8, 96.0), "Meghalaya": (25.0, 26.0, 90.0, 92.5),
+    "Nagaland": (25.0, 27.0, 93.5, 95.5), "Manipur": (23.8, 25.7, 93.0, 95.0),
+    "Mizoram": (21.5, 24.5, 92.2, 93.5), "Tripura": (22.5, 24.5, 91.0, 92.5),
+}
+MOCK_STATES = list(INDIAN_REGIONS.keys())
+LANDLOCKED_STATES = ["Haryana", "Madhya Pradesh", "Chhattisgarh", "Jharkhand", "Telangana"]
+COASTAL_BORDER_REGIONS = [state for state in MOCK_STATES if state not in LANDLOCKED_STATES]
+
+RAW_STATION_DATA = [
+    {"Agency_Name": "Andhra Pradesh GW", "State_Name": "Andhra Pradesh", "District_Name": "KURNOOL",
+     "Tahsil_Name": "KURNOOL", "Station_Name": "KURNOOL -AWS", "Latitude": 15.75064, "Longitude": 78.0668,
+     "Station_Type": "SURFACE", "Station_Status": "INSTALLED"},
+    {"Agency_Name": "Tamil Nadu GW", "State_Name": "Tamil Nadu", "District_Name": "CHENNAI",
+     "Tahsil_Name": "CHENNAI", "Station_Name": "CHENNAI -CITY", "Latitude": 13.0827, "Longitude": 80.2707,
+     "Station_Type": "GROUND", "Station_Status": "INSTALLED"},
+    {"Agency_Name": "Maharashtra GW", "State_Name": "Maharashtra", "District_Name": "PUNE",
+     "Tahsil_Name": "PUNE", "Station_Name": "PUNE -WEST", "Latitude": 18.5204, "Longitude": 73.8567,
+     "Station_Type": "GROUND", "Station_Status": "INSTALLED"},
+]
+NUM_REAL_STATIONS = len(RAW_STATION_DATA)
+TOTAL_TARGET_DOTS = 1000
+TARGET_LANDLOCKED = 100
+TARGET_COASTAL_BORDER = 20
+TOTAL_MOCK_DOTS = TARGET_LANDLOCKED + TARGET_COASTAL_BORDER
+TOTAL_DOTS = NUM_REAL_STATIONS + TOTAL_MOCK_DOTS
+NUM_RANDOM_STATIONS = TOTAL_DOTS - NUM_REAL_STATIONS
+
+
+def allocate_mock_stations():
+    """Number of mock stations per state: most go to landlocked states, the rest spread over the others."""
+    allocation = {}
+    points_per_landlocked = TARGET_LANDLOCKED // len(LANDLOCKED_STATES)
+    for state in LANDLOCKED_STATES:
+        allocation[state] = points_per_landlocked
+    points_per_coastal_border_base = TARGET_COASTAL_BORDER // len(COASTAL_BORDER_REGIONS)
+    coastal_border_remainder = TARGET_COASTAL_BORDER % len(COASTAL_BORDER_REGIONS)
+    for idx, state in enumerate(COASTAL_BORDER_REGIONS):
+        allocation[state] = points_per_coastal_border_base + (1 if idx < coastal_border_remainder else 0)
+    return allocation
+
+
+def generate_random_station(i, state_name):
+    region_key = state_name if state_name in INDIAN_REGIONS else random.choice(MOCK_STATES)
+    lat_min, lat_max, lon_min, lon_max = INDIAN_REGIONS[region_key]
+    lat = round(random.uniform(lat_min, lat_max), 5)
+    lon = round(random.uniform(lon_min, lon_max), 5)
+    station_name = f"MOCK-{state_name.split()[0].upper()}-{i}"
+    return {
+        "Agency_Name": "Mock Network", "State_Name": region_key,
+        "District_Name": f"Mock District {i % 10}",
+        "Tahsil_Name": "Mock Tahsil", "Station_Name": station_name,
+        "Latitude": lat, "Longitude": lon,
+        "Station_Type": random.choice(["GROUND", "SURFACE"]),
+        "Station_Status": "INSTALLED"
+    }
+
+
+def allocate_synthetic_stations(total_stations):
+    """Spreads enough mock stations over every state to bring the fleet to total_stations (benchmarks)."""
+    mock_count = max(0, total_stations - NUM_REAL_STATIONS)
+    base, remainder = divmod(mock_count, len(MOCK_STATES))
+    return {state: base + (1 if idx < remainder else 0) for idx, state in enumerate(MOCK_STATES)}
+
+
+def build_sensors(allocation=None):
+    """Generates the full sensor list (real stations first, then mock stations per allocation)."""
+    random_stations = []
+    station_counter = 0
+    for state, num_points in (allocation or allocate_mock_stations()).items():
+        for i in range(num_points):
+            random_stations.append(generate_random_station(station_counter, state))
+            station_counter += 1
+
+    sensors = []
+    for i, item in enumerate(RAW_STATION_DATA + random_stations):
+        station_id = f"{item['Station_Name'].replace(' ', '_').replace('-', '_').replace('(', '').replace(')', '').upper()}_{i}"
+        simulated_status = random.choice(STATUS_OPTIONS) if 'MOCK-' in item['Station_Name'] else STATUS_OPTIONS[
+            i % len(STATUS_OPTIONS)]
+        simulated_level = round(100.0 + random.uniform(-5.0, 5.0), 2)
+
+        sensors.append({
+            'id': station_id, 'lat': item['Latitude'], 'lon': item['Longitude'],
+            'status': simulated_status, 'level': simulated_level, 'type': item['Station_Type'],
+            'Station_Name_Full': item['Station_Name'], 'District': item['District_Name'],
+            'Tahsil': item['Tahsil_Name'], 'State': item['State_Name'],
+            'PConflict_Initial': 0.0,  # Placeholder for initial calculation
+            'HCRS': 100.0, 'Anomaly_Score': 0.0
+        })
+    return sensors
+
+
+# --- Binary Snapshot ---
+
+def write_fleet_snapshot(sensors, path=FLEET_SNAPSHOT_PATH, replace=True):
+    """Pickles the sensor list. With replace=False an existing snapshot wins (first writer wins)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': FLEET_SNAPSHOT_VERSION, 'sensors': sensors}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        if replace:
+            os.replace(tmp_path, path)
+        else:
+            os.link(tmp_path, path)  # Atomic create; fails if another worker got there first
+    except FileExistsError:
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_fleet_snapshot(path=FLEET_SNAPSHOT_PATH):
+    """Returns the pickled sensor list, or None if the snapshot is missing or from another version."""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    if snapshot.get('version') != FLEET_SNAPSHOT_VERSION:
+        return None
+    return snapshot['sensors']
+
+
+class Fleet(NamedTuple):
+    sensors: list  # Mutable sensor dicts, advanced in place by the fleet worker
+    station_ids: list
+    by_id: dict
+    positions: dict  # station_id -> index into sensors (and FleetSnapshot.stations)
+
+
+@lru_cache(maxsize=1)
+def get_fleet(path=FLEET_SNAPSHOT_PATH):
+    """Loads the fleet on first use, building and saving the snapshot if there is none yet."""
+    sensors = read_fleet_snapshot(path)
+    if sensors is None:
+        try:
+            write_fleet_snapshot(build_sensors(), path, replace=False)
+            sensors = read_fleet_snapshot(path)
+        except OSError as e:
+            print(f"Could not write fleet snapshot ({e}); using an in-memory fleet.")
+        if sensors is None:
+            sensors = build_sensors()
+
+    station_ids = [sensor['id'] for sensor in sensors]
+    return Fleet(
+        sensors=sensors,
+        station_ids=station_ids,
+        by_id={sensor['id']: sensor for sensor in sensors},
+        positions={station_id: i for i, station_id in enumerate(station_ids)},
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the dashboard's fleet snapshot.")
+    parser.add_argument("--stations", type=int, default=None,
+                        help="Synthetic fleet size (default: the standard fleet)")
+    parser.add_argument("--output", default=FLEET_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    allocation = allocate_synthetic_stations(args.stations) if args.stations else None
+    fleet_sensors = build_sensors(allocation)
+    write_fleet_snapshot(fleet_sensors, args.output)
+    print(f"Wrote {len(fleet_sensors)} stations to {args.output}")
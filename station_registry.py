@@ -0,0 +1,312 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+# =================================================================================
+# --- STATION REGISTRY (SQLite, WAL mode) ---
+# One table of DWLR stations shared by the prediction API and the dashboard: ids,
+# names, administrative area, position and the site attributes the models need
+# (elevation, soil type, land use). Indexed on id, state/district and lat/lon so it
+# scales to tens of thousands of stations.
+#
+# Lookups are read-through cached in memory. Triggers bump a registry-wide version on
+# every insert, update or delete (including edits made with the sqlite3 shell), and the
+# cache is dropped when that version moves; it is checked at most every
+# REGISTRY_CHECK_SECONDS, so an edit reaches every process within that time without a
+# redeploy.
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATION_DB_PATH = os.environ.get("STATION_DB_PATH", os.path.join(BASE_DIR, "stations.db"))
+REGISTRY_CHECK_SECONDS = float(os.environ.get("REGISTRY_CHECK_SECONDS", "5"))
+QUERY_CHUNK = 500  # Ids per IN (...) query, well under SQLite's bound-parameter limit
+
+SOIL_TYPES = ('Clay', 'Loam', 'Sand')
+LULC_TYPES = ('Agri', 'Forest', 'Urban')
+
+STATION_COLUMNS = ('station_id', 'name', 'state', 'district', 'tahsil', 'lat', 'lon', 'elevation', 'soil_type',
+                   'lulc', 'station_type', 'agency')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    station_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    state TEXT,
+    district TEXT,
+    tahsil TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    elevation REAL NOT NULL,
+    soil_type TEXT NOT NULL,
+    lulc TEXT NOT NULL,
+    station_type TEXT,
+    agency TEXT,
+    row_version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stations_state_district ON stations (state, district);
+CREATE INDEX IF NOT EXISTS idx_stations_lat_lon ON stations (lat, lon);
+CREATE INDEX IF NOT EXISTS idx_stations_row_version ON stations (row_version);
+
+-- Registry-wide change counter; row_version records the change that last touched a row
+CREATE TABLE IF NOT EXISTS registry_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO registry_version (id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS trg_stations_insert AFTER INSERT ON stations
+BEGIN
+    UPDATE registry_version SET version = version + 1;
+    UPDATE stations SET row_version = (SELECT version FROM registry_version) WHERE station_id = NEW.station_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stations_update AFTER UPDATE ON stations
+WHEN NEW.row_version IS OLD.row_version
+BEGIN
+    UPDATE registry_version SET version = version + 1;
+    UPDATE stations SET row_version = (SELECT version FROM registry_version) WHERE station_id = NEW.station_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stations_delete AFTER DELETE ON stations
+BEGIN
+    UPDATE registry_version SET version = version + 1;
+END;
+"""
+
+# The API's original demo stations (formerly main_api.STATION_CONFIG)
+SEED_STATIONS = [
+    {'station_id': "Station_001_AgriLoam", 'name': "Station 001 (Agri, Loam)", 'state': "Madhya Pradesh",
+     'district': "BHOPAL", 'lat': 23.0, 'lon': 77.0, 'elevation': 300.0, 'soil_type': "Loam", 'lulc': "Agri"},
+    {'station_id': "Station_002_ForestSand", 'name': "Station 002 (Forest, Sand)", 'state': "Uttar Pradesh",
+     'district': "JHANSI", 'lat': 25.5, 'lon': 78.5, 'elevation': 450.0, 'soil_type': "Sand", 'lulc': "Forest"},
+    {'station_id': "Station_003_UrbanClay", 'name': "Station 003 (Urban, Clay)", 'state': "Haryana",
+     'district': "PALWAL", 'lat': 28.0, 'lon': 77.2, 'elevation': 250.0, 'soil_type': "Clay", 'lulc': "Urban"},
+]
+
+
+class Station(NamedTuple):
+    station_id: str
+    name: str
+    state: Optional[str]
+    district: Optional[str]
+    tahsil: Optional[str]
+    lat: float
+    lon: float
+    elevation: float
+    soil_type: str
+    lulc: str
+    station_type: Optional[str]
+    agency: Optional[str]
+
+    def model_inputs(self):
+        """The static fields the models take, keyed like the API's request rows."""
+        return {'lat': self.lat, 'lon': self.lon, 'elevation': self.elevation, 'soil_type': self.soil_type,
+                'lulc': self.lulc}
+
+
+def fleet_station(sensor):
+    """
+    Registry record for a dashboard fleet sensor. The fleet has no surveyed site attributes,
+    so elevation, soil type and land use are derived from the station id (stable across runs)
+    until real values are loaded over them.
+    """
+    h = zlib.crc32(sensor['id'].encode())
+    return {
+        'station_id': sensor['id'], 'name': sensor['Station_Name_Full'], 'state': sensor['State'],
+        'district': sensor['District'], 'tahsil': sensor['Tahsil'], 'lat': sensor['lat'], 'lon': sensor['lon'],
+        'elevation': float(50 + h % 550), 'soil_type': SOIL_TYPES[(h >> 12) % len(SOIL_TYPES)],
+        'lulc': LULC_TYPES[(h >> 20) % len(LULC_TYPES)], 'station_type': sensor['type'],
+        'agency': "Mock Network" if sensor['Station_Name_Full'].startswith("MOCK-") else None,
+    }
+
+
+class StationRegistry:
+    """Thread- and process-safe station table with a version-checked in-memory read-through cache."""
+
+    def __init__(self, db_path=STATION_DB_PATH, check_seconds=REGISTRY_CHECK_SECONDS):
+        self.db_path = db_path
+        self.check_seconds = check_seconds
+        self._local = threading.local()
+        self._cache = {}  # station_id -> Station (misses are not cached)
+        self._cache_lock = threading.Lock()
+        self._cached_version = None
+        self._checked_at = float('-inf')
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        """One connection per thread; sqlite3 connections must not be shared across threads."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _select(self, where="", params=()):
+        sql = f"SELECT {', '.join(STATION_COLUMNS)} FROM stations {where}"
+        return [Station(*row) for row in self._conn().execute(sql, params)]
+
+    # --- Writes ---
+
+    def upsert(self, stations, replace=True):
+        """
+        Inserts station dicts (keys from STATION_COLUMNS; missing optional ones are NULL) in one
+        transaction. replace=False keeps existing rows as they are (used for seeding).
+        """
+        rows = [{column: station.get(column) for column in STATION_COLUMNS} for station in stations]
+        if not rows:
+            return 0
+        columns = ', '.join(STATION_COLUMNS)
+        placeholders = ', '.join(f':{column}' for column in STATION_COLUMNS)
+        if replace:
+            updates = ', '.join(f'{column} = excluded.{column}' for column in STATION_COLUMNS[1:])
+            sql = (f"INSERT INTO stations ({columns}) VALUES ({placeholders}) "
+                   f"ON CONFLICT(station_id) DO UPDATE SET {updates}")
+        else:
+            sql = f"INSERT OR IGNORE INTO stations ({columns}) VALUES ({placeholders})"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            changed = conn.executemany(sql, rows).rowcount  # Excludes the triggers' own writes
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._checked_at = float('-inf')  # This process sees its own writes immediately
+        return changed
+
+    def delete(self, station_ids):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = 0
+            for i in range(0, len(station_ids), QUERY_CHUNK):
+                chunk = list(station_ids[i:i + QUERY_CHUNK])
+                cursor = conn.execute(f"DELETE FROM stations WHERE station_id IN ({','.join('?' * len(chunk))})",
+                                      chunk)
+                deleted += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._checked_at = float('-inf')
+        return deleted
+
+    # --- Cached lookups ---
+
+    def version(self):
+        return self._conn().execute("SELECT version FROM registry_version WHERE id = 1").fetchone()[0]
+
+    def _sync(self):
+        """Drops the cache if the registry changed; reads the version at most every check_seconds."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return self._cached_version
+        version = self.version()
+        with self._cache_lock:
+            if version != self._cached_version:
+                self._cache.clear()
+                self._cached_version = version
+            self._checked_at = now
+        return version
+
+    def get_many(self, station_ids):
+        """{station_id: Station} for the ids that exist; unknown ids are left out."""
+        version = self._sync()
+        found = {}
+        misses = []
+        for station_id in station_ids:
+            station = self._cache.get(station_id)
+            if station is None:
+                misses.append(station_id)
+            else:
+                found[station_id] = station
+        for i in range(0, len(misses), QUERY_CHUNK):
+            chunk = misses[i:i + QUERY_CHUNK]
+            loaded = self._select(f"WHERE station_id IN ({','.join('?' * len(chunk))})", chunk)
+            with self._cache_lock:
+                if self._cached_version == version:  # Don't cache rows read across an invalidation
+                    self._cache.update((station.station_id, station) for station in loaded)
+            found.update((station.station_id, station) for station in loaded)
+        return found
+
+    def get(self, station_id):
+        """The Station, or None if the id is unknown."""
+        return self.get_many([station_id]).get(station_id)
+
+    # --- Queries (straight to SQLite, served by the indexes) ---
+
+    def station_ids(self):
+        return [row[0] for row in self._conn().execute("SELECT station_id FROM stations ORDER BY station_id")]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+
+    def find(self, state=None, district=None, bbox=None, limit=1000, offset=0):
+        """Stations filtered by state, district and/or bbox (lat_min, lat_max, lon_min, lon_max), by id."""
+        clauses, params = [], []
+        if state is not None:
+            clauses.append("state = ?")
+            params.append(state)
+        if district is not None:
+            clauses.append("district = ?")
+            params.append(district)
+        if bbox is not None:
+            clauses.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            params.extend(bbox)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY station_id LIMIT ? OFFSET ?", (*params, limit, offset))
+
+    def changed_since(self, version):
+        """(current version, stations inserted or updated after `version`). Deletions are not listed."""
+        current = self.version()
+        if current == version:
+            return current, []
+        return current, self._select("WHERE row_version > ? ORDER BY row_version", (version,))
+
+
+def seed_registry(registry, fleet_sensors=None):
+    """
+    Adds the API's seed stations and the dashboard fleet to the registry without touching
+    stations already in it, so edits made in the database survive restarts.
+    """
+    if fleet_sensors is None:
+        from station_fleet import get_fleet
+
+        fleet_sensors = get_fleet().sensors
+    return registry.upsert(SEED_STATIONS + [fleet_station(sensor) for sensor in fleet_sensors], replace=False)
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(description="Manage the station registry.")
+    parser.add_argument("--db", default=STATION_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("seed", help="Add the seed stations and the dashboard fleet (existing rows are kept)")
+    import_parser = commands.add_parser("import", help="Insert or update stations from a CSV file")
+    import_parser.add_argument("path", help=f"CSV with a header row; columns from {', '.join(STATION_COLUMNS)}")
+    show_parser = commands.add_parser("show", help="Print stations")
+    show_parser.add_argument("station_ids", nargs="*")
+    show_parser.add_argument("--state", default=None)
+    show_parser.add_argument("--district", default=None)
+    show_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    station_registry = StationRegistry(args.db)
+    if args.command == "seed":
+        print(f"Added {seed_registry(station_registry)} stations; the registry has {station_registry.count()}.")
+    elif args.command == "import":
+        with open(args.path, newline='') as f:
+            records = [{key: (float(value) if key in ('lat', 'lon', 'elevation') else value or None)
+                        for key, value in row.items() if key in STATION_COLUMNS} for row in csv.DictReader(f)]
+        print(f"Imported {station_registry.upsert(records)} stations; the registry has {station_registry.count()}.")
+    else:
+        if args.station_ids:
+            matches = list(station_registry.get_many(args.station_ids).values())
+        else:
+            matches = station_registry.find(args.state, args.district, limit=args.limit)
+        for match in matches:
+            print(match)
@@ -0,0 +1,103 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+# =================================================================================
+# --- STATION SEARCH INDEX ---
+# Typeahead search over the whole fleet so the station dropdown only ever ships the
+# top matches. Two in-memory indexes are built once:
+#   * a sorted token list (prefix lookups by bisection), e.g. "pun" -> PUNE, PUNJAB
+#   * trigram postings for substring and typo-tolerant matches, e.g. "rnool" -> KURNOOL
+# =================================================================================
+
+SEARCH_FIELDS = ('Station_Name_Full', 'District', 'Tahsil', 'State')
+FIELD_WEIGHTS = {'Station_Name_Full': 4.0, 'District': 2.0, 'Tahsil': 1.5, 'State': 1.0}
+DEFAULT_LIMIT = 25
+MIN_TRIGRAM_OVERLAP = 0.6  # Share of the query's trigrams a fuzzy match must contain
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    return _NON_ALNUM.sub(' ', str(text).lower()).strip()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def trigrams(token):
+    padded = f"  {token} "  # Pad so short tokens and word starts get their own grams
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationSearchIndex:
+    """Prefix + trigram index over station name, district, tahsil and state."""
+
+    def __init__(self, stations, fields=SEARCH_FIELDS):
+        self.stations = list(stations)
+        self.fields = tuple(fields)
+        postings = defaultdict(list)  # token -> [(station index, field weight)]
+        gram_postings = defaultdict(set)  # trigram -> {token}
+        for i, station in enumerate(self.stations):
+            for field in self.fields:
+                for token in tokenize(station.get(field, '')):
+                    postings[token].append((i, FIELD_WEIGHTS.get(field, 1.0)))
+        for token in postings:
+            for gram in trigrams(token):
+                gram_postings[gram].add(token)
+        self._postings = dict(postings)
+        self._tokens = sorted(postings)
+        self._gram_postings = dict(gram_postings)
+
+    def _prefix_tokens(self, prefix):
+        start = bisect_left(self._tokens, prefix)
+        end = bisect_left(self._tokens, prefix + '\uffff')
+        return self._tokens[start:end]
+
+    def _fuzzy_tokens(self, term):
+        grams = trigrams(term)
+        counts = defaultdict(int)
+        for gram in grams:
+            for token in self._gram_postings.get(gram, ()):
+                counts[token] += 1
+        needed = max(1, math.ceil(len(grams) * MIN_TRIGRAM_OVERLAP))
+        return {token: count / len(grams) for token, count in counts.items() if count >= needed}
+
+    def _term_scores(self, term):
+        """Best score per station for one query term: exact > prefix > trigram match."""
+        scores = {}
+
+        def add(token, factor):
+            for i, weight in self._postings[token]:
+                score = weight * factor
+                if score > scores.get(i, 0.0):
+                    scores[i] = score
+
+        for token in self._prefix_tokens(term):
+            add(token, 3.0 if token == term else 2.0)
+        if len(term) >= 3:
+            for token, overlap in self._fuzzy_tokens(term).items():
+                add(token, overlap)
+        return scores
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Returns up to `limit` stations matching every query term, best matches first."""
+        terms = tokenize(query)
+        if not terms:
+            return self.stations[:limit]
+
+        total = None
+        for term in terms:
+            scores = self._term_scores(term)
+            if total is None:
+                total = scores
+            else:
+                total = {i: total[i] + s for i, s in scores.items() if i in total}
+            if not total:
+                return []
+
+        ranked = heapq.nsmallest(limit, total, key=lambda i: (-total[i], i))
+        return [self.stations[i] for i in ranked]
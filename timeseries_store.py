@@ -0,0 +1,382 @@
+import fcntl
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# =================================================================================
+# --- EMBEDDED TIME-SERIES STORE ---
+# Append-only, columnar, time-partitioned storage for station readings and model outputs.
+#
+#   <root>/raw/<station>/<YYYY-MM-DD>/<column>.f64    one file per column, float64, append-only
+#   <root>/1h/<station>/<YYYY-MM>/<column>.f64        hourly means, written when a day is closed
+#   <root>/1d/<station>/<YYYY>/<column>.f64           daily means, written when a day is closed
+#
+# The station directory is the per-station index and the partition directory names sort by
+# time, so a range query only opens the partitions that overlap the requested window.
+#
+# Several processes write the same store (the API's gunicorn workers and the dashboard), so
+# appends hold an flock on the partition's lock file while they write all of its columns,
+# and maintenance runs in one process at a time under the store-wide maintenance lock (and
+# takes each partition's flock while it rolls it up or deletes it).
+#
+# A late append to a day that was already rolled up clears the day's .rolled marker, so the
+# next maintenance rolls it up again. Rollup tiers are append-only, so the re-rolled buckets
+# are appended after the old ones and reads keep the last row per bucket.
+# =================================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TIMESERIES_DIR = os.environ.get("TIMESERIES_DIR", os.path.join(BASE_DIR, "timeseries_data"))
+
+# Readings, the five model outputs and the custom indices (see indices.py)
+COLUMNS = (
+    'water_level', 'rainfall_mm', 'avg_temp_c', 'pet_mm',
+    'next_day_level', 'risk_proba', 'recharge_30d', 'extraction_rate', 'anomaly_score',
+    'mtdi', 'hcrs', 'p_conflict', 'sti'
+)
+TIME_COLUMN = 'ts'  # Epoch seconds (UTC)
+
+# Tier name -> (bucket seconds, partition key format)
+TIERS = {
+    'raw': (None, '%Y-%m-%d'),
+    '1h': (3600, '%Y-%m'),
+    '1d': (86400, '%Y'),
+}
+
+# Retention per tier in days (None keeps data forever)
+RETENTION_DAYS = {
+    'raw': int(os.environ.get("TIMESERIES_RAW_RETENTION_DAYS", 30)),
+    '1h': int(os.environ.get("TIMESERIES_HOURLY_RETENTION_DAYS", 400)),
+    '1d': None,
+}
+
+MAINTENANCE_INTERVAL_SECONDS = 3600
+WRITE_QUEUE_BATCHES = int(os.environ.get("TIMESERIES_WRITE_QUEUE_BATCHES", "64"))
+_ROLLED_MARKER = '.rolled'
+_PARTITION_LOCK = '.lock'
+_MAINTENANCE_LOCK = '.maintenance.lock'
+
+
+def _safe_name(station_id):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(station_id))
+
+
+def _partition_key(ts, tier):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime(TIERS[tier][1])
+
+
+@contextmanager
+def _file_lock(path, blocking=True):
+    """Exclusive flock on path (created if missing). Yields False instead of waiting when blocking=False."""
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def downsample(ts, columns, bucket_seconds):
+    """Averages columns into fixed time buckets (NaNs are ignored). Returns (bucket_ts, columns)."""
+    if len(ts) == 0:
+        return ts, {name: values[:0] for name, values in columns.items()}
+    buckets = np.floor(ts / bucket_seconds).astype(np.int64)
+    unique_buckets, inverse = np.unique(buckets, return_inverse=True)
+    out = {}
+    for name, values in columns.items():
+        valid = ~np.isnan(values)
+        sums = np.bincount(inverse, weights=np.where(valid, values, 0.0), minlength=len(unique_buckets))
+        counts = np.bincount(inverse, weights=valid.astype(np.float64), minlength=len(unique_buckets))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[name] = sums / counts
+    return unique_buckets.astype(np.float64) * bucket_seconds, out
+
+
+class TimeSeriesStore:
+    """Per-station columnar time-series store with hourly/daily rollups and retention."""
+
+    def __init__(self, root=TIMESERIES_DIR, columns=COLUMNS):
+        self.root = root
+        self.columns = tuple(columns)
+        self._lock = threading.Lock()
+        self._last_maintenance = time.time()  # The first append doesn't pay for a full scan
+        self._maintenance_thread = None
+
+    # --- Writing ---
+
+    def append(self, station_id, values, ts=None):
+        """Appends one row (dict of column -> value; missing columns are stored as NaN)."""
+        ts = time.time() if ts is None else ts
+        self.append_many(station_id, np.array([ts]), {k: np.array([v], dtype=np.float64) for k, v in values.items()})
+
+    def append_many(self, station_id, ts, values):
+        """Appends a batch of rows for one station. ts must be ascending epoch seconds."""
+        ts = np.asarray(ts, dtype=np.float64)
+        if len(ts) == 0:
+            return
+        keys = np.array([_partition_key(t, 'raw') for t in ts[[0, -1]]])
+        with self._lock:
+            if keys[0] == keys[1]:
+                self._write_rows('raw', station_id, keys[0], ts, values, np.ones(len(ts), dtype=bool))
+            else:
+                # Batch spans several days: split it by partition
+                all_keys = np.array([_partition_key(t, 'raw') for t in ts])
+                for key in np.unique(all_keys):
+                    self._write_rows('raw', station_id, key, ts, values, all_keys == key)
+
+        if time.time() - self._last_maintenance > MAINTENANCE_INTERVAL_SECONDS:
+            self._maintain_in_background()
+
+    def _maintain_in_background(self):
+        # Rollups scan every station, so they never run inside the append that noticed they're due
+        with self._lock:
+            if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+                return
+            self._last_maintenance = time.time()
+            self._maintenance_thread = threading.Thread(target=self.maintain, name="timeseries-maintenance",
+                                                        daemon=True)
+            self._maintenance_thread.start()
+
+    def _write_rows(self, tier, station_id, key, ts, values, mask):
+        # Columns are appended in a fixed order under the partition's flock, so rows from different
+        # processes never interleave across column files; readers trim to the shortest column.
+        part_dir = os.path.join(self.root, tier, _safe_name(station_id), key)
+        lock_path = os.path.join(part_dir, _PARTITION_LOCK)
+        n = int(mask.sum())
+        while True:
+            os.makedirs(part_dir, exist_ok=True)
+            with _file_lock(lock_path):
+                if not os.path.exists(lock_path):
+                    continue  # Retention dropped the partition while we waited for its lock
+                self._write_locked(part_dir, ts, values, mask, n)
+                if tier == 'raw':
+                    # A day that was already rolled up gets rolled up again with these rows
+                    try:
+                        os.remove(os.path.join(part_dir, _ROLLED_MARKER))
+                    except FileNotFoundError:
+                        pass
+                return
+
+    def _write_locked(self, part_dir, ts, values, mask, n):
+        for name in (TIME_COLUMN,) + self.columns:
+            if name == TIME_COLUMN:
+                column = ts[mask]
+            elif name in values:
+                column = np.asarray(values[name], dtype=np.float64)[mask]
+            else:
+                column = np.full(n, np.nan)
+            with open(os.path.join(part_dir, f"{name}.f64"), 'ab') as f:
+                column.astype('<f8').tofile(f)
+
+    # --- Reading ---
+
+    def _partitions(self, tier, station_id):
+        station_dir = os.path.join(self.root, tier, _safe_name(station_id))
+        try:
+            return sorted(os.listdir(station_dir)), station_dir
+        except FileNotFoundError:
+            return [], station_dir
+
+    def _read_partition(self, part_dir, columns):
+        ts_path = os.path.join(part_dir, f"{TIME_COLUMN}.f64")
+        data = {TIME_COLUMN: np.fromfile(ts_path, dtype='<f8') if os.path.exists(ts_path) else np.empty(0)}
+        for name in columns:
+            path = os.path.join(part_dir, f"{name}.f64")
+            # Columns added after the partition was started read as NaN
+            data[name] = np.fromfile(path, dtype='<f8') if os.path.exists(path) else np.full(len(data[TIME_COLUMN]), np.nan)
+        n = min(len(v) for v in data.values())  # Ignore a row that is only partially written
+        return {name: v[:n] for name, v in data.items()}
+
+    def _read_tier(self, tier, station_id, start, end, columns, skip_rolled=False):
+        keys, station_dir = self._partitions(tier, station_id)
+        first_key, last_key = _partition_key(start, tier), _partition_key(end, tier)
+        chunks = []
+        for key in keys:
+            if key < first_key or key > last_key:
+                continue
+            part_dir = os.path.join(station_dir, key)
+            if skip_rolled and os.path.exists(os.path.join(part_dir, _ROLLED_MARKER)):
+                continue
+            chunks.append(self._read_partition(part_dir, columns))
+        if not chunks:
+            return np.empty(0), {name: np.empty(0) for name in columns}
+        ts = np.concatenate([c[TIME_COLUMN] for c in chunks])
+        mask = (ts >= start) & (ts <= end)
+        return ts[mask], {name: np.concatenate([c[name] for c in chunks])[mask] for name in columns}
+
+    @staticmethod
+    def pick_resolution(start, end):
+        """Chooses the coarsest tier that still gives a readable chart for the window."""
+        span_days = (end - start) / 86400
+        if span_days <= 2:
+            return 'raw'
+        if span_days <= 90:
+            return '1h'
+        return '1d'
+
+    def query(self, station_id, start, end=None, columns=None, resolution='auto', max_points=None):
+        """
+        Returns (ts, {column: values}) for one station between start and end (epoch seconds).
+        Rollup tiers are topped up with on-the-fly downsampling of days not rolled up yet. With
+        max_points, a longer result is averaged into evenly sized buckets (e.g. for a chart).
+        """
+        end = time.time() if end is None else end
+        columns = self.columns if columns is None else tuple(columns)
+        if resolution == 'auto':
+            resolution = self.pick_resolution(start, end)
+        if resolution == 'raw':
+            ts, values = self._read_tier('raw', station_id, start, end, columns)
+        else:
+            ts, values = self._read_rollup(resolution, station_id, start, end, columns)
+
+        if max_points and len(ts) > max_points:
+            ts, values = downsample(ts, values, max(1, int(np.ceil((end - start) / max_points))))
+        return ts, values
+
+    def _read_rollup(self, resolution, station_id, start, end, columns):
+        bucket_seconds = TIERS[resolution][0]
+        rolled_ts, rolled = self._read_tier(resolution, station_id, start, end, columns)
+        fresh_ts, fresh = self._read_tier('raw', station_id, start, end, columns, skip_rolled=True)
+        fresh_ts, fresh = downsample(fresh_ts, fresh, bucket_seconds)
+        ts = np.concatenate([rolled_ts, fresh_ts])
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        # A re-rolled (or not yet re-rolled) day repeats its buckets; the last written row is complete
+        last = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.empty(0, dtype=bool)
+        return ts[last], {name: np.concatenate([rolled[name], fresh[name]])[order][last] for name in columns}
+
+    def stations(self):
+        try:
+            return sorted(os.listdir(os.path.join(self.root, 'raw')))
+        except FileNotFoundError:
+            return []
+
+    # --- Rollups and Retention ---
+
+    def maintain(self, now=None):
+        """
+        Rolls up closed days into the hourly/daily tiers and drops partitions past retention.
+        Returns False without doing anything if another process or thread is already maintaining.
+        """
+        now = time.time() if now is None else now
+        self._last_maintenance = now
+        today = _partition_key(now, 'raw')
+        os.makedirs(self.root, exist_ok=True)
+        with _file_lock(os.path.join(self.root, _MAINTENANCE_LOCK), blocking=False) as acquired:
+            if not acquired:
+                return False
+            for station in self.stations():
+                keys, station_dir = self._partitions('raw', station)
+                for key in keys:
+                    if key < today:
+                        self._roll_up(station, os.path.join(station_dir, key))
+            self._apply_retention(now)
+        return True
+
+    def _roll_up(self, station, part_dir):
+        # Holds the partition's flock from the read to the marker, so no append lands in between
+        marker = os.path.join(part_dir, _ROLLED_MARKER)
+        if os.path.exists(marker):
+            return
+        with _file_lock(os.path.join(part_dir, _PARTITION_LOCK)):
+            if os.path.exists(marker):
+                return
+            data = self._read_partition(part_dir, self.columns)
+            ts = data.pop(TIME_COLUMN)
+            for tier in ('1h', '1d'):
+                bucket_ts, means = downsample(ts, data, TIERS[tier][0])
+                if len(bucket_ts):
+                    self._write_rows(tier, station, _partition_key(bucket_ts[0], tier), bucket_ts, means,
+                                     np.ones(len(bucket_ts), dtype=bool))
+            open(marker, 'w').close()
+
+    def _apply_retention(self, now):
+        # Caller must hold the maintenance lock. Only rolled-up raw partitions are ever deleted.
+        for tier, days in RETENTION_DAYS.items():
+            if days is None:
+                continue
+            cutoff_key = _partition_key(now - days * 86400, tier)
+            tier_dir = os.path.join(self.root, tier)
+            if not os.path.isdir(tier_dir):
+                continue
+            for station in os.listdir(tier_dir):
+                station_dir = os.path.join(tier_dir, station)
+                for key in os.listdir(station_dir):
+                    part_dir = os.path.join(station_dir, key)
+                    if key >= cutoff_key:
+                        continue
+                    with _file_lock(os.path.join(part_dir, _PARTITION_LOCK)):
+                        if tier == 'raw' and not os.path.exists(os.path.join(part_dir, _ROLLED_MARKER)):
+                            continue
+                        shutil.rmtree(part_dir, ignore_errors=True)
+
+
+class BackgroundWriter:
+    """
+    Writes batches of one-row-per-station readings to a store on a daemon thread, so a request
+    that records thousands of stations doesn't wait on one partition append per station. The
+    queue holds at most max_batches batches; past that, submit() waits instead of growing it.
+    """
+
+    def __init__(self, store, max_batches=WRITE_QUEUE_BATCHES):
+        self.store = store
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started on first use rather than at import, so a process forked after import gets its own
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="timeseries-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, station_ids, values, ts=None):
+        """Queues one row per station at ts (default now); values maps column -> values aligned with station_ids."""
+        if not len(station_ids):
+            return
+        self._ensure_started()
+        columns = {name: np.asarray(column, dtype=np.float64) for name, column in values.items()}
+        self._queue.put((list(station_ids), time.time() if ts is None else ts, columns))
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                station_ids, ts, columns = batch
+                for i, station_id in enumerate(station_ids):
+                    self.store.append_many(station_id, np.array([ts]),
+                                           {name: column[i:i + 1] for name, column in columns.items()})
+            except Exception as e:
+                print(f"Error writing {len(batch[0])} station readings to the time-series store: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Waits until every batch submitted so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Writes what is queued, then stops the thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def lookback_window(days, now=None):
+    """Convenience helper: (start, end) epoch seconds covering the last N days."""
+    end = time.time() if now is None else now
+    return end - timedelta(days=days).total_seconds(), end